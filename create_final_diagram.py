@@ -4,30 +4,40 @@
 Статическая визуализация всех результатов анализа
 """
 
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use('Agg')  # пакетный режим: без интерактивного бэкенда
 import matplotlib.patches as patches
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
 import json
+import shutil
+import functools
+from collections import Counter
 import pandas as pd
 from matplotlib.gridspec import GridSpec
+from matplotlib.collections import PatchCollection
 import warnings
 warnings.filterwarnings('ignore')
 
 # Настройка для русского текста и PNG сохранения
-plt.rcParams['font.family'] = ['Arial Unicode MS', 'DejaVu Sans', 'sans-serif']
-plt.rcParams['figure.dpi'] = 300
-plt.rcParams['savefig.dpi'] = 300
-plt.rcParams['savefig.format'] = 'png'
+matplotlib.rcParams['font.family'] = ['Arial Unicode MS', 'DejaVu Sans', 'sans-serif']
+matplotlib.rcParams['figure.dpi'] = 300
+matplotlib.rcParams['savefig.dpi'] = 300
+matplotlib.rcParams['savefig.format'] = 'png'
 
+@functools.lru_cache(maxsize=1)
 def load_data():
-    """Загружаем все данные для финальной диаграммы"""
+    """Загружаем все данные для финальной диаграммы (один раз за процесс)"""
     data = {}
     
     # G4 данные
     try:
-        g4_data = pd.read_csv('results/quadruplex_results.csv')
+        # Нужна только колонка хромосом
+        g4_data = pd.read_csv('results/quadruplex_results.csv', usecols=['chromosome'],
+                              dtype={'chromosome': 'category'})
         data['g4_count'] = len(g4_data)
-        data['g4_by_chrom'] = g4_data['chromosome'].value_counts().to_dict()
+        data['g4_by_chrom'] = dict(Counter(g4_data['chromosome']))
     except:
         data['g4_count'] = 5646
         data['g4_by_chrom'] = {'chr3R': 1136, 'chrX': 1674, 'chr2L': 854, 'chr2R': 915, 'chr3L': 823}
@@ -59,8 +69,9 @@ def create_final_diagram():
     # Загружаем данные
     data = load_data()
     
-    # Создаем фигуру с сеткой
-    fig = plt.figure(figsize=(20, 16))
+    # Создаем фигуру с сеткой (без глобального состояния pyplot)
+    fig = Figure(figsize=(20, 16))
+    FigureCanvasAgg(fig)
     gs = GridSpec(4, 4, figure=fig, hspace=0.3, wspace=0.3)
     
     # Главный заголовок
@@ -89,10 +100,7 @@ def create_final_diagram():
     ax1.set_ylabel('Количество структур')
     
     # Добавляем значения на столбцы
-    for bar, value in zip(bars, values):
-        height = bar.get_height()
-        ax1.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                f'{value:,}', ha='center', va='bottom', fontsize=12, fontweight='bold')
+    ax1.bar_label(bars, labels=[f'{value:,}' for value in values], fontsize=12, fontweight='bold')
     
     ax1.set_yscale('log')
     ax1.grid(True, alpha=0.3)
@@ -149,18 +157,9 @@ Z-ДНК анализ:
     ax3.legend()
     ax3.grid(True, alpha=0.3, axis='y')
     
-    # Добавляем значения на столбцы
-    for bar in bars1:
-        height = bar.get_height()
-        if height > 0:
-            ax3.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                    f'{int(height)}', ha='center', va='bottom', fontsize=9)
-    
-    for bar in bars2:
-        height = bar.get_height()
-        if height > 0:
-            ax3.text(bar.get_x() + bar.get_width()/2., height + height*0.01,
-                    f'{int(height)}', ha='center', va='bottom', fontsize=9)
+    # Добавляем значения на столбцы (нулевые столбцы без подписи)
+    for bars_group, counts in ((bars1, g4_counts), (bars2, zdna_counts)):
+        ax3.bar_label(bars_group, labels=[f'{int(c)}' if c > 0 else '' for c in counts], fontsize=9)
     
     # 4. Временная линия проекта (нижняя левая)
     ax4 = fig.add_subplot(gs[2, :2])
@@ -217,33 +216,38 @@ Z-ДНК анализ:
     ax6.set_title('СХЕМАТИЧНОЕ ПРЕДСТАВЛЕНИЕ РЕЗУЛЬТАТОВ В ГЕНОМЕ', fontsize=16, fontweight='bold')
     
     # Создаем схематичные хромосомы
-    chrom_lengths = [23, 25, 28, 32, 1.3, 24, 3.6]  # относительные длины
-    chrom_positions = np.cumsum([0] + chrom_lengths[:-1])
-    
-    for i, (chrom, length, pos) in enumerate(zip(main_chroms, chrom_lengths, chrom_positions)):
-        # Рисуем хромосому
-        rect = patches.Rectangle((pos, 0.4), length, 0.2, linewidth=2, 
-                               edgecolor='black', facecolor='lightgray', alpha=0.8)
-        ax6.add_patch(rect)
+    chrom_lengths = np.array([23, 25, 28, 32, 1.3, 24, 3.6])  # относительные длины
+    chrom_positions = np.cumsum(np.concatenate([[0], chrom_lengths[:-1]]))
+    
+    chrom_rects = []
+    for chrom, length, pos in zip(main_chroms, chrom_lengths, chrom_positions):
+        # Хромосома (все прямоугольники рисуются одной коллекцией после цикла)
+        chrom_rects.append(patches.Rectangle((pos, 0.4), length, 0.2))
         
         # Подписываем хромосому
         ax6.text(pos + length/2, 0.3, chrom, ha='center', va='top', fontsize=10, fontweight='bold')
-        
-        # Добавляем точки для G4 (синие)
-        g4_count = g4_counts[i]
-        if g4_count > 0:
-            g4_density = min(g4_count / 200, length * 0.8)  # нормализуем плотность
-            g4_positions = np.random.uniform(pos + 0.1, pos + length - 0.1, int(g4_density))
-            ax6.scatter(g4_positions, [0.55] * len(g4_positions), 
-                       c=colors['g4'], s=20, alpha=0.7, label='G4' if i == 0 else "")
-        
-        # Добавляем точки для Z-DNA (красные)
-        zdna_count = zdna_counts[i] 
-        if zdna_count > 0:
-            zdna_density = min(zdna_count / 5000, length * 0.8)  # нормализуем плотность
-            zdna_positions = np.random.uniform(pos + 0.1, pos + length - 0.1, int(zdna_density))
-            ax6.scatter(zdna_positions, [0.45] * len(zdna_positions),
-                       c=colors['zdna'], s=15, alpha=0.7, label='Z-ДНК' if i == 0 else "")
+    
+    # Число точек на хромосому (нормализуем плотность): G4 синие, Z-DNA красные
+    g4_n = np.minimum(np.asarray(g4_counts) / 200, chrom_lengths * 0.8).astype(int)
+    zdna_n = np.minimum(np.asarray(zdna_counts) / 5000, chrom_lengths * 0.8).astype(int)
+    
+    # Все позиции генерируются одним вызовом фиксированного генератора
+    rng = np.random.default_rng(0)
+    counts = np.concatenate([g4_n, zdna_n])
+    lows = np.repeat(np.tile(chrom_positions + 0.1, 2), counts)
+    highs = np.repeat(np.tile(chrom_positions + chrom_lengths - 0.1, 2), counts)
+    positions = rng.uniform(lows, highs)
+    g4_positions, zdna_positions = np.split(positions, [g4_n.sum()])
+    
+    # По одному scatter на категорию для всех хромосом;
+    # точки растеризуются, оси и подписи остаются векторными
+    ax6.scatter(g4_positions, np.full(len(g4_positions), 0.55),
+               c=colors['g4'], s=20, alpha=0.7, label='G4', rasterized=True)
+    ax6.scatter(zdna_positions, np.full(len(zdna_positions), 0.45),
+               c=colors['zdna'], s=15, alpha=0.7, label='Z-ДНК', rasterized=True)
+    
+    ax6.add_collection(PatchCollection(chrom_rects, linewidth=2, edgecolor='black',
+                                       facecolor='lightgray', alpha=0.8, zorder=0.9))
     
     ax6.set_xlim(-1, sum(chrom_lengths) + 1)
     ax6.set_ylim(0.2, 0.8)
@@ -260,13 +264,11 @@ Z-ДНК анализ:
     fig.text(0.5, 0.02, info_text, ha='center', va='bottom', fontsize=12,
             bbox=dict(boxstyle="round,pad=0.5", facecolor="lightcyan", alpha=0.8))
     
-    # Сохраняем как PNG
-    plt.savefig('results/FINAL_PROJECT_DIAGRAM.png', 
-               dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
-    plt.savefig('FINAL_PROJECT_DIAGRAM.png',  # Также в корне проекта
+    # Сохраняем как PNG: рендерим один раз, в корень проекта копируем файл
+    fig.savefig('results/FINAL_PROJECT_DIAGRAM.png', 
                dpi=300, bbox_inches='tight', facecolor='white', edgecolor='none')
+    shutil.copyfile('results/FINAL_PROJECT_DIAGRAM.png', 'FINAL_PROJECT_DIAGRAM.png')
     
-    plt.show()
     print("Финальная диаграмма сохранена:")
     print("   results/FINAL_PROJECT_DIAGRAM.png")
     print("   FINAL_PROJECT_DIAGRAM.png (корень проекта)")
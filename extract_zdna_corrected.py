@@ -5,58 +5,130 @@
 """
 
 import os
-import re
 import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
 
-def extract_zdna_from_probability(file_path, min_zscore=300, max_zscore=400):
-    """Извлекаем Z-DNA структуры из .probability файла"""
-    zdna_structures = []
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Колонки .probability файла: позиция, score1, score2, z_score, последовательность
+PROBABILITY_COLUMNS = ['position', 'score1', 'score2', 'z_score', 'sequence']
+RESULT_COLUMNS = ['position', 'z_score', 'score1', 'score2', 'sequence', 'length']
+PROBABILITY_CHUNKSIZE = 1_000_000
+
+# Кэш разобранных .probability файлов (Parquet)
+CACHE_DIR = "cache"
+# Версия формата кэша: увеличивать при любом изменении разбора или колонок,
+# иначе старые записи будут молча отдаваться вместо нового результата
+CACHE_VERSION = 2
+
+def _cache_key(file_path, min_zscore, max_zscore, st=None):
+    """Ключ кэша: версия разбора, путь, mtime, размер файла и диапазон Z-score"""
+    if st is None:
+        st = os.stat(file_path)
+    raw = (f"v{CACHE_VERSION}-{os.path.abspath(file_path)}-{st.st_mtime_ns}-{st.st_size}"
+           f"-{min_zscore}-{max_zscore}")
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def _zscore_mask(zscores, min_zscore, max_zscore):
+    """Маска структур с Z-score в диапазоне [min_zscore, max_zscore]"""
+    return (zscores >= min_zscore) & (zscores <= max_zscore)
+
+def _filter_chunk(chunk, min_zscore, max_zscore):
+    """Приводим типы и оставляем только структуры в диапазоне Z-score"""
+    # Строки заголовка и anti/syn строки имеют меньше 5 полей и отбрасываются
+    # по отсутствующей последовательности.
+    chunk = chunk.dropna(subset=['sequence'])
+    
+    # Z-score может быть в научной нотации; некорректные значения -> NaN
+    for col in ('position', 'score1', 'score2', 'z_score'):
+        chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+    chunk = chunk.dropna(subset=['position', 'score1', 'score2', 'z_score'])
+    chunk = chunk.astype({'position': np.int32, 'score1': np.float32,
+                          'score2': np.float32, 'z_score': np.float32})
+    
+    # Векторный фильтр по диапазону Z-score
+    return chunk[_zscore_mask(chunk['z_score'].to_numpy(), np.float32(min_zscore), np.float32(max_zscore))]
+
+def _parse_probability(file_path, min_zscore, max_zscore):
+    """Разбираем .probability файл в DataFrame с отфильтрованными структурами"""
+    # C-парсер pandas читает файл блоками по PROBABILITY_CHUNKSIZE строк:
+    # в памяти держим только текущий блок и найденные структуры.
+    # usecols отрезает лишние поля у длинных строк.
+    reader = pd.read_csv(file_path, sep=r'\s+', comment='#', header=None,
+                         names=PROBABILITY_COLUMNS, usecols=range(5), engine='c',
+                         chunksize=PROBABILITY_CHUNKSIZE)
+    hits = []
+    try:
+        for chunk in reader:
+            hits.append(_filter_chunk(chunk, min_zscore, max_zscore))
+    except pd.errors.ParserError as e:
+        # Блок, где нет ни одной строки из 5 полей, парсер с usecols отвергает.
+        # Записи в .probability чередуются с однопольными anti/syn строками,
+        # так что такой блок бывает только в конце файла (или файл из одного
+        # заголовка) - структур в нём нет.
+        if 'Too many columns specified' not in str(e):
+            raise
+    finally:
+        reader.close()
+    if not hits:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
     
+    df = pd.concat(hits, ignore_index=True)
+    df['length'] = df['sequence'].str.len()
+    return df[RESULT_COLUMNS]
+
+def extract_zdna_from_probability(file_path, min_zscore=300, max_zscore=400, st=None):
+    """Извлекаем Z-DNA структуры из .probability файла (DataFrame, по колонке на поле)"""
     if not os.path.exists(file_path):
         print(f"⚠️  Файл не найден: {file_path}")
-        return zdna_structures
+        return pd.DataFrame(columns=RESULT_COLUMNS)
     
     print(f"📊 Обрабатываем {file_path}...")
     
-    with open(file_path, 'r') as f:
-        for line_num, line in enumerate(f, 1):
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            
-            try:
-                # Парсим строку: позиция, score1, score2, z_score, последовательность
-                parts = line.split()
-                if len(parts) < 5:
-                    continue
-                
-                position = int(parts[0])
-                score1 = float(parts[1])
-                score2 = float(parts[2])
-                z_score_str = parts[3]
-                sequence = parts[4]
-                
-                # Обрабатываем z_score (может быть в научной нотации)
-                z_score = float(z_score_str)
-                
-                # Проверяем, попадает ли в диапазон Z-score
-                if min_zscore <= z_score <= max_zscore:
-                    zdna_structures.append({
-                        'position': position,
-                        'z_score': z_score,
-                        'score1': score1,
-                        'score2': score2,
-                        'sequence': sequence,
-                        'length': len(sequence)
-                    })
-                    
-            except (ValueError, IndexError) as e:
-                if line_num <= 10:  # Показываем только первые несколько ошибок
-                    print(f"⚠️  Ошибка в строке {line_num}: {line[:50]}... - {e}")
-                continue
-    
-    print(f"✅ Найдено {len(zdna_structures)} Z-DNA структур")
-    return zdna_structures
+    cache_file = os.path.join(CACHE_DIR, f"zdna_{_cache_key(file_path, min_zscore, max_zscore, st)}.parquet")
+    df = None
+    if os.path.exists(cache_file):
+        try:
+            df = pd.read_parquet(cache_file)
+            print(f"💾 Используем кэш {cache_file}")
+        except ImportError:
+            df = None
+    
+    if df is None:
+        df = _parse_probability(file_path, min_zscore, max_zscore)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            df.to_parquet(cache_file, compression='zstd', index=False)
+        except ImportError:
+            # Нет pyarrow/fastparquet - работаем без кэша
+            pass
+    
+    print(f"✅ Найдено {len(df)} Z-DNA структур")
+    return df
+
+def process_chromosome(chrom, prob_file, min_zscore=300, max_zscore=400, st=None):
+    """Обрабатываем одну хромосому в отдельном процессе: (хромосома, структуры, статистика)"""
+    zdna_df = extract_zdna_from_probability(prob_file, min_zscore, max_zscore, st)
+    
+    # Добавляем информацию о хромосоме одной колонкой
+    zdna_df.insert(0, 'chromosome', chrom)
+    
+    # Статистика за один векторный проход
+    has_data = len(zdna_df) > 0
+    stats = zdna_df['z_score'].astype(np.float64).agg(['count', 'min', 'max', 'mean'])
+    chrom_stats = {
+        'count': int(stats['count']),
+        'avg_zscore': float(stats['mean']) if has_data else 0,
+        'max_zscore': float(stats['max']) if has_data else 0,
+        'min_zscore': float(stats['min']) if has_data else 0
+    }
+    return chrom, zdna_df, chrom_stats
 
 def main():
     # Настройки
@@ -74,33 +146,59 @@ def main():
     # Список хромосом
     chromosomes = ['chr2L', 'chr2R', 'chr3L', 'chr3R', 'chr4', 'chrX', 'chrY']
     
-    all_zdna = []
     chromosome_stats = {}
+    pending = {}
+    next_idx = 0
+    total_structures = 0
+    output_columns = ['chromosome', 'position', 'z_score', 'score1', 'score2', 'length', 'sequence']
+    output_file = os.path.join(output_dir, "zdna_structures_corrected.txt")
     
-    for chrom in chromosomes:
-        prob_file = os.path.join(z_hunt_dir, f"{chrom}.fa.probability")
+    with open(output_file, 'w') as out, ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        out.write("# Z-DNA структуры (Z-score 300-400)\n")
+        out.write("# Хромосома\tПозиция\tZ-score\tScore1\tScore2\tДлина\tПоследовательность\n")
         
-        if os.path.exists(prob_file):
-            zdna_structures = extract_zdna_from_probability(prob_file, min_zscore, max_zscore)
-            all_zdna.extend(zdna_structures)
-            
-            # Добавляем информацию о хромосоме к каждой структуре
-            for struct in zdna_structures:
-                struct['chromosome'] = chrom
+        # Один проход os.scandir: DirEntry кэширует stat для ключа кэша
+        entries = {}
+        if os.path.isdir(z_hunt_dir):
+            with os.scandir(z_hunt_dir) as it:
+                entries = {e.name: e for e in it if e.name.endswith('.probability') and e.is_file()}
+        
+        # Файлы хромосом независимы - разбираем их параллельно, по процессу на файл
+        futures = []
+        for chrom in chromosomes:
+            entry = entries.get(f"{chrom}.fa.probability")
+            if entry is not None:
+                futures.append(pool.submit(process_chromosome, chrom, entry.path,
+                                           min_zscore, max_zscore, entry.stat()))
+            else:
+                print(f"⚠️  Файл не найден: {os.path.join(z_hunt_dir, f'{chrom}.fa.probability')}")
+                pending[chrom] = None
+        
+        # Пишем хромосомы в каноническом порядке по мере готовности.
+        # Позиции внутри файла уже возрастают, поэтому глобальная сортировка не нужна.
+        for future in as_completed(futures):
+            chrom, zdna_df, chrom_stats = future.result()
+            pending[chrom] = (zdna_df, chrom_stats)
             
-            chromosome_stats[chrom] = {
-                'count': len(zdna_structures),
-                'avg_zscore': sum(s['z_score'] for s in zdna_structures) / len(zdna_structures) if zdna_structures else 0,
-                'max_zscore': max(s['z_score'] for s in zdna_structures) if zdna_structures else 0,
-                'min_zscore': min(s['z_score'] for s in zdna_structures) if zdna_structures else 0
-            }
-        else:
-            print(f"⚠️  Файл не найден: {prob_file}")
-            chromosome_stats[chrom] = {'count': 0, 'avg_zscore': 0, 'max_zscore': 0, 'min_zscore': 0}
+            while next_idx < len(chromosomes) and chromosomes[next_idx] in pending:
+                ready_chrom = chromosomes[next_idx]
+                ready = pending.pop(ready_chrom)
+                next_idx += 1
+                if ready is None:
+                    chromosome_stats[ready_chrom] = {'count': 0, 'avg_zscore': 0, 'max_zscore': 0, 'min_zscore': 0}
+                    continue
+                zdna_df, chrom_stats = ready
+                zdna_df[output_columns].to_csv(out, sep='\t', float_format='%.3f', header=False, index=False)
+                chromosome_stats[ready_chrom] = chrom_stats
+                total_structures += len(zdna_df)
+    
+    # Хромосомы без файлов в хвосте списка (когда задач не было вовсе)
+    for chrom in chromosomes[next_idx:]:
+        chromosome_stats[chrom] = {'count': 0, 'avg_zscore': 0, 'max_zscore': 0, 'min_zscore': 0}
     
     print("\n" + "=" * 60)
     print(f"🎉 ОБЩИЕ РЕЗУЛЬТАТЫ:")
-    print(f"📊 Всего найдено Z-DNA структур: {len(all_zdna)}")
+    print(f"📊 Всего найдено Z-DNA структур: {total_structures}")
     
     # Статистика по хромосомам
     print(f"\n📈 Статистика по хромосомам:")
@@ -110,19 +208,9 @@ def main():
         else:
             print(f"   {chrom}: 0 структур")
     
-    # Сохраняем результаты
-    output_file = os.path.join(output_dir, "zdna_structures_corrected.txt")
-    with open(output_file, 'w') as f:
-        f.write("# Z-DNA структуры (Z-score 300-400)\n")
-        f.write("# Хромосома\tПозиция\tZ-score\tScore1\tScore2\tДлина\tПоследовательность\n")
-        
-        for struct in sorted(all_zdna, key=lambda x: (x['chromosome'], x['position'])):
-            f.write(f"{struct['chromosome']}\t{struct['position']}\t{struct['z_score']:.3f}\t")
-            f.write(f"{struct['score1']:.3f}\t{struct['score2']:.3f}\t{struct['length']}\t{struct['sequence']}\n")
-    
     # Сохраняем JSON сводку
     summary = {
-        'total_structures': len(all_zdna),
+        'total_structures': total_structures,
         'parameters': {
             'min_zscore': min_zscore,
             'max_zscore': max_zscore
@@ -135,8 +223,12 @@ def main():
     }
     
     summary_file = os.path.join(output_dir, "zdna_summary_corrected.json")
-    with open(summary_file, 'w') as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        with open(summary_file, 'wb') as f:
+            f.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
+    else:
+        with open(summary_file, 'w') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
     
     print(f"\n📄 Результаты сохранены:")
     print(f"   📊 Z-DNA структуры: {output_file}")
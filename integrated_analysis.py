@@ -10,25 +10,97 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import json
 import os
+import gc
 from collections import defaultdict, Counter
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from ncls import NCLS
+except ImportError:
+    NCLS = None
+
 plt.style.use('bmh')
 plt.rcParams['figure.figsize'] = [12, 8]
 plt.rcParams['font.size'] = 10
 
+# Единая схема колонок: G4 CSV переименовывается к именам таблицы Z-DNA при загрузке
+G4_COLUMN_NAMES = {'chromosome': 'Хромосома', 'start': 'Позиция', 'sequence': 'Последовательность'}
+STRUCTURE_COLUMNS = ('Хромосома', 'Позиция', 'Последовательность', 'seq_len')
+# Версия формата кэша: увеличивать при изменении разбора или типов колонок,
+# иначе старые кэши будут молча отдаваться вместо нового результата
+CACHE_VERSION = 2
+
+def _cached_frame(source_path, parse, required_columns=()):
+    """Читаем DataFrame через Parquet-кэш рядом с исходным файлом
+    
+    Кэш <source>.v<CACHE_VERSION>.parquet используется, если он новее исходного файла и
+    содержит required_columns; иначе файл разбирается функцией parse и
+    кэш перезаписывается.
+    Оптимизированные типы (category, int32, float32) сохраняются в кэше.
+    """
+    cache_path = f"{source_path}.v{CACHE_VERSION}.parquet"
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) > os.path.getmtime(source_path):
+        try:
+            cached = pd.read_parquet(cache_path)
+            if set(required_columns) <= set(cached.columns):
+                return cached
+        except Exception as e:
+            print(f"⚠️  Не удалось прочитать кэш {cache_path}: {e}")
+    
+    df = parse(source_path)
+    try:
+        df.to_parquet(cache_path, index=False)
+    except ImportError:
+        # Нет pyarrow/fastparquet - работаем без кэша
+        pass
+    return df
+
+def _parse_g4_csv(file_path):
+    """Разбираем CSV с G-квадруплексами"""
+    dtypes = {'chromosome': 'category', 'start': np.int32, 'end': np.int32,
+              'length': np.int32, 'g_content': np.float32,
+              'gc_content': np.float32, 'score': np.float32}
+    try:
+        # Многопоточный CSV-парсер Arrow; типы остаются numpy (category/int32/float32),
+        # т.к. дальше позиции идут в np.searchsorted и NCLS
+        g4_data = pd.read_csv(file_path, engine='pyarrow', dtype=dtypes)
+    except (ImportError, ValueError):
+        # Нет pyarrow - обычный C-парсер
+        g4_data = pd.read_csv(file_path, dtype=dtypes)
+    # Переименовываем колонки для соответствия схеме Z-DNA
+    g4_data = g4_data.rename(columns=G4_COLUMN_NAMES)
+    # Длины последовательностей считаем один раз при загрузке
+    g4_data['seq_len'] = g4_data['Последовательность'].str.len().fillna(0).astype(np.int32)
+    return g4_data
+
+def _parse_zdna_table(file_path):
+    """Разбираем таблицу Z-DNA структур"""
+    # Читаем файл с правильными заголовками.
+    # Z-score остается float64, как и в optimized_integrated_analysis:
+    # во float32 значения вроде 3.4 попадают в CSV как 3.4000000953674316
+    zdna_data = pd.read_csv(file_path, sep='\t', comment='#', 
+                          names=['Хромосома', 'Позиция', 'Z-score', 'Score1', 'Score2', 'Длина', 'Последовательность'],
+                          dtype={'Хромосома': 'category', 'Позиция': np.int32,
+                                 'Z-score': np.float64, 'Score1': np.float32,
+                                 'Score2': np.float32, 'Длина': np.int32})
+    # Длины последовательностей короткие - ужимаем до минимального целого типа
+    zdna_data['Длина'] = pd.to_numeric(zdna_data['Длина'], downcast='integer')
+    zdna_data['seq_len'] = zdna_data['Последовательность'].str.len().fillna(0).astype(np.int32)
+    return zdna_data
+
+def _parse_promoter_table(file_path):
+    """Разбираем таблицу промоторного анализа"""
+    if file_path.endswith('.csv'):
+        return pd.read_csv(file_path)
+    return pd.read_csv(file_path, sep='\t', comment='#')
+
 def load_g4_data():
     """Загружаем данные G-квадруплексов"""
     try:
-        g4_data = pd.read_csv('results/quadruplex_results.csv')
-        # Переименовываем колонки для соответствия
-        if 'chromosome' in g4_data.columns:
-            g4_data['Хромосома'] = g4_data['chromosome']
-        if 'start' in g4_data.columns:
-            g4_data['Позиция'] = g4_data['start']
-        if 'sequence' in g4_data.columns:
-            g4_data['Последовательность'] = g4_data['sequence']
+        g4_data = _cached_frame('results/quadruplex_results.csv', _parse_g4_csv, STRUCTURE_COLUMNS)
+        missing = set(STRUCTURE_COLUMNS) - set(g4_data.columns)
+        assert not missing, f"в G4 данных нет колонок {sorted(missing)}"
         print(f"✅ Загружено {len(g4_data)} G-квадруплексов")
         return g4_data
     except Exception as e:
@@ -42,14 +114,13 @@ def load_zdna_data():
         'results/smart_zhunt_results_zdna_structures.txt'
     ]
     
-    for file_path in zdna_files:
+    # Один проход по кандидатам: берем первый существующий файл
+    file_path = next((p for p in zdna_files if os.path.isfile(p)), None)
+    if file_path is not None:
         try:
-            if os.path.exists(file_path):
-                # Читаем файл с правильными заголовками
-                zdna_data = pd.read_csv(file_path, sep='\t', comment='#', 
-                                      names=['Хромосома', 'Позиция', 'Z-score', 'Score1', 'Score2', 'Длина', 'Последовательность'])
-                print(f"✅ Загружено {len(zdna_data)} Z-DNA структур из {file_path}")
-                return zdna_data
+            zdna_data = _cached_frame(file_path, _parse_zdna_table, STRUCTURE_COLUMNS + ('Z-score',))
+            print(f"✅ Загружено {len(zdna_data)} Z-DNA структур из {file_path}")
+            return zdna_data
         except Exception as e:
             print(f"⚠️  Ошибка загрузки {file_path}: {e}")
     
@@ -66,69 +137,154 @@ def load_promoter_data():
             'results/string_enrichment.csv'
         ]
         
-        for file_path in promoter_files:
-            if os.path.exists(file_path):
-                if file_path.endswith('.csv'):
-                    promoter_data = pd.read_csv(file_path)
-                else:
-                    promoter_data = pd.read_csv(file_path, sep='\t', comment='#')
-                print(f"✅ Загружено {len(promoter_data)} промоторных записей из {file_path}")
-                return promoter_data
+        file_path = next((p for p in promoter_files if os.path.isfile(p)), None)
+        if file_path is None:
+            print("⚠️  Промоторные данные не найдены")
+            return pd.DataFrame()
         
-        print("⚠️  Промоторные данные не найдены")
-        return pd.DataFrame()
+        promoter_data = _cached_frame(file_path, _parse_promoter_table)
+        print(f"✅ Загружено {len(promoter_data)} промоторных записей из {file_path}")
+        return promoter_data
     except Exception as e:
         print(f"⚠️  Ошибка загрузки промоторных данных: {e}")
         return pd.DataFrame()
 
-def analyze_colocalization(g4_data, zdna_data, window=1000):
-    """Анализируем колокализацию Z-DNA и G-квадруплексов"""
+def build_zdna_index(zdna_data, window=1000):
+    """Строим индекс Z-DNA по хромосомам для запросов окна ±window
+    
+    Для каждой хромосомы хранятся отсортированные позиции и номера строк
+    zdna_data. Если установлен ncls, дополнительно строится NCList по
+    интервалам [pos - window, pos + window], сдвинутым на +window.
+    """
+    index = {}
+    if zdna_data.empty:
+        return index
+    
+    for chrom, rows in zdna_data.groupby('Хромосома', sort=False, observed=True).indices.items():
+        positions = zdna_data['Позиция'].to_numpy()[rows]
+        order = np.argsort(positions, kind='stable')
+        positions = positions[order].astype(np.int64)
+        rows = rows[order].astype(np.int64)
+        
+        ncls_index = None
+        if NCLS is not None:
+            # Полуоткрытые интервалы [pos - window, pos + window + 1), сдвинутые
+            # на +window: NCLS не поддерживает отрицательные начала
+            ncls_index = NCLS(positions, positions + 2 * window + 1, np.arange(len(rows), dtype=np.int64))
+        index[chrom] = {'positions': positions, 'rows': rows, 'ncls': ncls_index, 'window': window}
+    
+    return index
+
+def _query_zdna_index(chrom_index, g4_pos, window):
+    """Пары (номер G4, номер Z-DNA в отсортированном индексе) в пределах окна"""
+    if chrom_index['ncls'] is not None and chrom_index['window'] == window:
+        # Запросы сдвигаются на то же +window, что и интервалы индекса
+        g4_pos = g4_pos.astype(np.int64) + window
+        g_idx, z_idx = chrom_index['ncls'].all_overlaps_both(
+            g4_pos, g4_pos + 1, np.arange(len(g4_pos), dtype=np.int64))
+        order = np.lexsort((z_idx, g_idx))
+        return g_idx[order], z_idx[order]
+    
+    zdna_pos = chrom_index['positions']
+    # Границы окна [pos - window, pos + window] в отсортированных позициях Z-DNA:
+    # O(log M) на каждый G4 вместо полного прохода по Z-DNA
+    lo = np.searchsorted(zdna_pos, g4_pos - window, side='left')
+    hi = np.searchsorted(zdna_pos, g4_pos + window, side='right')
+    counts = hi - lo
+    if counts.sum() == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    
+    # Разворачиваем диапазоны [lo, hi) в пары без Python-цикла по G4:
+    # z_idx = lo[g] + смещение пары внутри своего диапазона
+    g_idx = np.repeat(np.arange(len(g4_pos)), counts)
+    starts = np.cumsum(counts) - counts
+    z_idx = np.repeat(lo, counts) + (np.arange(len(g_idx)) - np.repeat(starts, counts))
+    return g_idx, z_idx
+
+def analyze_colocalization(g4_data, zdna_data, window=1000, zdna_index=None, return_pairs=False):
+    """Анализируем колокализацию Z-DNA и G-квадруплексов
+    
+    По умолчанию возвращается только статистика и массив расстояний;
+    список пар в виде словарей строится лишь при return_pairs=True.
+    """
     if zdna_data.empty or g4_data.empty:
         print("⚠️  Недостаточно данных для анализа колокализации")
-        return {'total_colocalizations': 0, 'g4_with_zdna': 0, 'zdna_with_g4': 0, 'average_distance': 0, 'colocalized_pairs': []}
+        empty_stats = {'total_colocalizations': 0, 'g4_with_zdna': 0, 'zdna_with_g4': 0,
+                       'average_distance': 0, 'distances': np.empty(0, dtype=np.int64)}
+        if return_pairs:
+            empty_stats['colocalized_pairs'] = []
+        return empty_stats
     
     print(f"🔍 Анализ колокализации (окно {window} bp)...")
     
     colocalized = []
     
-    # Убедимся, что у нас есть правильные колонки
-    g4_chrom_col = 'Хромосома' if 'Хромосома' in g4_data.columns else 'chromosome'
-    g4_pos_col = 'Позиция' if 'Позиция' in g4_data.columns else 'start'
-    g4_seq_col = 'Последовательность' if 'Последовательность' in g4_data.columns else 'sequence'
-    
-    zdna_chrom_col = 'Хромосома'
-    zdna_pos_col = 'Позиция'
-    zdna_seq_col = 'Последовательность'
-    
-    for _, g4 in g4_data.iterrows():
-        g4_chrom = g4[g4_chrom_col]
-        g4_pos = g4[g4_pos_col]
+    # Индекс Z-DNA строится один раз (или передается готовым из main)
+    if zdna_index is None:
+        zdna_index = build_zdna_index(zdna_data, window)
+    
+    # Колонки извлекаем в NumPy массивы один раз - без построчной работы с pandas
+    g4_pos_all = g4_data['Позиция'].to_numpy(dtype=np.int64)
+    g4_seq_all = g4_data['Последовательность'].to_numpy()
+    zdna_seq_all = zdna_data['Последовательность'].to_numpy()
+    zdna_zscore_all = zdna_data['Z-score'].to_numpy()
+    
+    # Уникальные G4/Z-DNA считаем внутри хромосомы: пара (хромосома, позиция)
+    # уникальна тогда и только тогда, когда позиция уникальна в своей хромосоме
+    g4_with_zdna = 0
+    zdna_with_g4 = 0
+    distance_chunks = []
+    
+    for chrom, g4_rows in g4_data.groupby('Хромосома', sort=False, observed=True).indices.items():
+        chrom_index = zdna_index.get(chrom)
+        if chrom_index is None:
+            continue
         
-        nearby_zdna = zdna_data[
-            (zdna_data[zdna_chrom_col] == g4_chrom) &
-            (abs(zdna_data[zdna_pos_col] - g4_pos) <= window)
-        ]
+        g4_pos = g4_pos_all[g4_rows]
+        g_idx, z_idx = _query_zdna_index(chrom_index, g4_pos, window)
+        if len(g_idx) == 0:
+            continue
         
-        if len(nearby_zdna) > 0:
-            for _, zdna in nearby_zdna.iterrows():
-                distance = abs(zdna[zdna_pos_col] - g4_pos)
-                colocalized.append({
-                    'chromosome': g4_chrom,
-                    'g4_position': g4_pos,
-                    'zdna_position': zdna[zdna_pos_col],
-                    'distance': distance,
-                    'g4_sequence': g4.get(g4_seq_col, ''),
-                    'zdna_sequence': zdna.get(zdna_seq_col, ''),
-                    'zdna_zscore': zdna.get('Z-score', 0)
-                })
-    
+        zdna_rows = chrom_index['rows'][z_idx]
+        pair_g4_pos = g4_pos[g_idx]
+        pair_zdna_pos = chrom_index['positions'][z_idx]
+        distances = np.abs(pair_zdna_pos - pair_g4_pos)
+        
+        g4_with_zdna += len(np.unique(pair_g4_pos))
+        zdna_with_g4 += len(np.unique(pair_zdna_pos))
+        distance_chunks.append(distances)
+        
+        if not return_pairs:
+            continue
+        
+        # Сбор полей пар одним take; индексы Z-DNA упорядочены по строкам,
+        # чтобы чтение из больших колонок шло последовательно
+        order = np.argsort(zdna_rows, kind='stable')
+        zdna_seqs = np.empty(len(zdna_rows), dtype=zdna_seq_all.dtype)
+        zdna_zscores = np.empty(len(zdna_rows), dtype=zdna_zscore_all.dtype)
+        zdna_seqs[order] = zdna_seq_all.take(zdna_rows[order])
+        zdna_zscores[order] = zdna_zscore_all.take(zdna_rows[order])
+        
+        colocalized.extend(pd.DataFrame({
+            'chromosome': chrom,
+            'g4_position': pair_g4_pos,
+            'zdna_position': pair_zdna_pos,
+            'distance': distances,
+            'g4_sequence': g4_seq_all.take(g4_rows[g_idx]),
+            'zdna_sequence': zdna_seqs,
+            'zdna_zscore': zdna_zscores
+        }).to_dict('records'))
+    
+    distances = np.concatenate(distance_chunks) if distance_chunks else np.empty(0, dtype=np.int64)
     colocalization_stats = {
-        'total_colocalizations': len(colocalized),
-        'g4_with_zdna': len(set([(c['chromosome'], c['g4_position']) for c in colocalized])),
-        'zdna_with_g4': len(set([(c['chromosome'], c['zdna_position']) for c in colocalized])),
-        'average_distance': np.mean([c['distance'] for c in colocalized]) if colocalized else 0,
-        'colocalized_pairs': colocalized
+        'total_colocalizations': len(distances),
+        'g4_with_zdna': g4_with_zdna,
+        'zdna_with_g4': zdna_with_g4,
+        'average_distance': distances.mean() if len(distances) else 0,
+        'distances': distances
     }
+    if return_pairs:
+        colocalization_stats['colocalized_pairs'] = colocalized
     
     print(f"   📊 Найдено {colocalization_stats['total_colocalizations']} колокализаций")
     print(f"   📊 G4 с Z-DNA: {colocalization_stats['g4_with_zdna']}")
@@ -136,8 +292,33 @@ def analyze_colocalization(g4_data, zdna_data, window=1000):
     
     return colocalization_stats
 
-def create_integrated_visualizations(g4_data, zdna_data, promoter_data, colocalization_stats):
+def summarize_structures(g4_data, zdna_data):
+    """Сводные статистики колонок - по одному проходу agg на колонку"""
+    summary = {}
+    if not g4_data.empty and 'seq_len' in g4_data.columns:
+        summary['g4_len'] = g4_data['seq_len'].agg(['min', 'max', 'mean'])
+    if not zdna_data.empty and 'Z-score' in zdna_data.columns:
+        summary['zscore'] = zdna_data['Z-score'].agg(['min', 'max', 'mean'])
+    return summary
+
+def _hist_bar(ax, values, bins, density=False, **bar_kwargs):
+    """Гистограмма: бины считаются один раз np.histogram, рисуется ax.bar"""
+    counts, edges = np.histogram(np.asarray(values), bins=bins, density=density)
+    return ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', **bar_kwargs)
+
+def _has_results(g4_data, zdna_data, promoter_data, colocalization_stats):
+    """Есть ли хоть какие-то данные для визуализации и отчета"""
+    return not (g4_data.empty and zdna_data.empty and promoter_data.empty
+                and not colocalization_stats.get('total_colocalizations', 0))
+
+def create_integrated_visualizations(g4_data, zdna_data, promoter_data, colocalization_stats, structure_stats=None):
     """Создаем интегрированные визуализации"""
+    if not _has_results(g4_data, zdna_data, promoter_data, colocalization_stats):
+        # Без данных не создаем фигуру 2x3 вовсе
+        print("⚠️  Нет данных для визуализации")
+        return
+    if structure_stats is None:
+        structure_stats = summarize_structures(g4_data, zdna_data)
     print("🎨 Создаем интегрированные визуализации...")
     
     # Настройка для русского текста
@@ -147,21 +328,17 @@ def create_integrated_visualizations(g4_data, zdna_data, promoter_data, colocali
     fig.suptitle('🧬 Интегрированный анализ Z-DNA и G-квадруплексов\nDrosophila melanogaster (dm6)', 
                  fontsize=16, fontweight='bold')
     
-    # Определяем названия колонок
-    g4_chrom_col = 'Хромосома' if 'Хромосома' in g4_data.columns else 'chromosome'
-    g4_seq_col = 'Последовательность' if 'Последовательность' in g4_data.columns else 'sequence'
-    
     # 1. Распределение по хромосомам
     ax1 = axes[0, 0]
     
     # G4 данные
     if not g4_data.empty:
-        g4_chrom_counts = g4_data[g4_chrom_col].value_counts()
+        g4_chrom_counts = g4_data['Хромосома'].value_counts(sort=False)
         g4_chrom_counts.plot(kind='bar', ax=ax1, alpha=0.7, color='blue', label='G-квадруплексы')
     
     # Z-DNA данные
     if not zdna_data.empty and 'Хромосома' in zdna_data.columns:
-        zdna_chrom_counts = zdna_data['Хромосома'].value_counts()
+        zdna_chrom_counts = zdna_data['Хромосома'].value_counts(sort=False)
         zdna_chrom_counts.plot(kind='bar', ax=ax1, alpha=0.7, color='red', 
                               label='Z-DNA', width=0.6)
     
@@ -173,13 +350,13 @@ def create_integrated_visualizations(g4_data, zdna_data, promoter_data, colocali
     
     # 2. Длины последовательностей
     ax2 = axes[0, 1]
-    if not g4_data.empty:
-        g4_lengths = g4_data[g4_seq_col].str.len()
-        ax2.hist(g4_lengths, bins=20, alpha=0.7, color='blue', label='G-квадруплексы', density=True)
+    if not g4_data.empty and 'seq_len' in g4_data.columns:
+        g4_lengths = g4_data['seq_len']
+        _hist_bar(ax2, g4_lengths, bins=20, density=True, alpha=0.7, color='blue', label='G-квадруплексы')
     
-    if not zdna_data.empty and 'Последовательность' in zdna_data.columns:
-        zdna_lengths = zdna_data['Последовательность'].str.len()
-        ax2.hist(zdna_lengths, bins=20, alpha=0.7, color='red', label='Z-DNA', density=True)
+    if not zdna_data.empty and 'seq_len' in zdna_data.columns:
+        zdna_lengths = zdna_data['seq_len']
+        _hist_bar(ax2, zdna_lengths, bins=20, density=True, alpha=0.7, color='red', label='Z-DNA')
     
     ax2.set_title('Распределение длин последовательностей')
     ax2.set_xlabel('Длина (bp)')
@@ -188,9 +365,9 @@ def create_integrated_visualizations(g4_data, zdna_data, promoter_data, colocali
     
     # 3. Колокализация
     ax3 = axes[0, 2]
-    if colocalization_stats.get('colocalized_pairs', []):
-        distances = [c['distance'] for c in colocalization_stats['colocalized_pairs']]
-        ax3.hist(distances, bins=20, color='green', alpha=0.7)
+    distances = colocalization_stats.get('distances', np.empty(0))
+    if len(distances):
+        _hist_bar(ax3, distances, bins=20, color='green', alpha=0.7)
         ax3.set_title(f'Расстояния при колокализации\n(n={len(distances)})')
         ax3.set_xlabel('Расстояние (bp)')
         ax3.set_ylabel('Количество пар')
@@ -228,12 +405,13 @@ def create_integrated_visualizations(g4_data, zdna_data, promoter_data, colocali
     # 5. Z-score распределение (если есть Z-DNA данные)
     ax5 = axes[1, 1]
     if not zdna_data.empty and 'Z-score' in zdna_data.columns:
-        zdna_data['Z-score'].hist(bins=30, ax=ax5, color='red', alpha=0.7)
+        _hist_bar(ax5, zdna_data['Z-score'].to_numpy(), bins=30, color='red', alpha=0.7)
         ax5.set_title('Распределение Z-score')
         ax5.set_xlabel('Z-score')
         ax5.set_ylabel('Количество структур')
-        ax5.axvline(zdna_data['Z-score'].mean(), color='black', linestyle='--', 
-                   label=f'Среднее: {zdna_data["Z-score"].mean():.1f}')
+        zscore_mean = structure_stats['zscore']['mean']
+        ax5.axvline(zscore_mean, color='black', linestyle='--', 
+                   label=f'Среднее: {zscore_mean:.1f}')
         ax5.legend()
     else:
         ax5.text(0.5, 0.5, 'Нет данных\nZ-score', 
@@ -249,15 +427,15 @@ def create_integrated_visualizations(g4_data, zdna_data, promoter_data, colocali
     
     if not g4_data.empty:
         summary_text += f"🔹 G-квадруплексы: {len(g4_data)}\n"
-        summary_text += f"   Хромосомы: {g4_data[g4_chrom_col].nunique()}\n"
-        summary_text += f"   Средняя длина: {g4_data[g4_seq_col].str.len().mean():.1f} bp\n\n"
+        summary_text += f"   Хромосомы: {g4_data['Хромосома'].nunique()}\n"
+        summary_text += f"   Средняя длина: {structure_stats['g4_len']['mean']:.1f} bp\n\n"
     
     if not zdna_data.empty:
         summary_text += f"🔸 Z-DNA структуры: {len(zdna_data)}\n"
         if 'Хромосома' in zdna_data.columns:
             summary_text += f"   Хромосомы: {zdna_data['Хромосома'].nunique()}\n"
         if 'Z-score' in zdna_data.columns:
-            summary_text += f"   Средний Z-score: {zdna_data['Z-score'].mean():.1f}\n\n"
+            summary_text += f"   Средний Z-score: {structure_stats['zscore']['mean']:.1f}\n\n"
     else:
         summary_text += "🔸 Z-DNA: Данные обрабатываются...\n\n"
     
@@ -283,123 +461,131 @@ def create_integrated_visualizations(g4_data, zdna_data, promoter_data, colocali
     plt.show()
     print("✅ Интегрированная визуализация сохранена: results/integrated_analysis.png")
 
-def generate_final_report(g4_data, zdna_data, promoter_data, colocalization_stats):
+def generate_final_report(g4_data, zdna_data, promoter_data, colocalization_stats, structure_stats=None):
     """Генерируем финальный отчет"""
+    if not _has_results(g4_data, zdna_data, promoter_data, colocalization_stats):
+        print("⚠️  Нет данных для отчета")
+        return
+    if structure_stats is None:
+        structure_stats = summarize_structures(g4_data, zdna_data)
     print("📝 Генерируем финальный отчет...")
     
-    report = """# 🧬 ФИНАЛЬНЫЙ ОТЧЕТ: Анализ Z-DNA и G-квадруплексов
+    # Отчет собираем из частей и склеиваем один раз при записи
+    parts = ["""# 🧬 ФИНАЛЬНЫЙ ОТЧЕТ: Анализ Z-DNA и G-квадруплексов
 ## Drosophila melanogaster (dm6)
 
 ### 📊 ОСНОВНЫЕ РЕЗУЛЬТАТЫ
 
-"""
+"""]
     
     # G-квадруплексы
     if not g4_data.empty:
-        report += f"""#### 🔹 G-квадруплексы
+        g4_len = structure_stats['g4_len']
+        parts.append(f"""#### 🔹 G-квадруплексы
 - **Всего найдено**: {len(g4_data)} структур
 - **Хромосомы**: {g4_data['Хромосома'].nunique()} различных
-- **Средняя длина**: {g4_data['Последовательность'].str.len().mean():.1f} bp
-- **Диапазон длин**: {g4_data['Последовательность'].str.len().min()}-{g4_data['Последовательность'].str.len().max()} bp
+- **Средняя длина**: {g4_len['mean']:.1f} bp
+- **Диапазон длин**: {int(g4_len['min'])}-{int(g4_len['max'])} bp
 
 **Распределение по хромосомам:**
-"""
-        for chrom, count in g4_data['Хромосома'].value_counts().items():
+""")
+        for chrom, count in g4_data['Хромосома'].value_counts(sort=False).items():
             percentage = (count / len(g4_data)) * 100
-            report += f"- {chrom}: {count} ({percentage:.1f}%)\n"
-        report += "\n"
+            parts.append(f"- {chrom}: {count} ({percentage:.1f}%)\n")
+        parts.append("\n")
     
     # Z-DNA
     if not zdna_data.empty:
-        report += f"""#### 🔸 Z-DNA структуры
+        parts.append(f"""#### 🔸 Z-DNA структуры
 - **Всего найдено**: {len(zdna_data)} структур
-"""
+""")
         if 'Хромосома' in zdna_data.columns:
-            report += f"- **Хромосомы**: {zdna_data['Хромосома'].nunique()} различных\n"
+            parts.append(f"- **Хромосомы**: {zdna_data['Хромосома'].nunique()} различных\n")
         
         if 'Z-score' in zdna_data.columns:
-            report += f"""- **Z-score диапазон**: {zdna_data['Z-score'].min():.1f}-{zdna_data['Z-score'].max():.1f}
-- **Средний Z-score**: {zdna_data['Z-score'].mean():.1f}
-"""
+            zscore = structure_stats['zscore']
+            parts.append(f"""- **Z-score диапазон**: {zscore['min']:.1f}-{zscore['max']:.1f}
+- **Средний Z-score**: {zscore['mean']:.1f}
+""")
         
         if 'Хромосома' in zdna_data.columns:
-            report += "\n**Распределение по хромосомам:**\n"
-            for chrom, count in zdna_data['Хромосома'].value_counts().items():
+            parts.append("\n**Распределение по хромосомам:**\n")
+            for chrom, count in zdna_data['Хромосома'].value_counts(sort=False).items():
                 percentage = (count / len(zdna_data)) * 100
-                report += f"- {chrom}: {count} ({percentage:.1f}%)\n"
-        report += "\n"
+                parts.append(f"- {chrom}: {count} ({percentage:.1f}%)\n")
+        parts.append("\n")
     else:
-        report += """#### 🔸 Z-DNA структуры
+        parts.append("""#### 🔸 Z-DNA структуры
 - **Статус**: Данные обрабатываются или не найдены с текущими параметрами (Z-score 300-400)
 - **Рекомендация**: Возможно, следует расширить диапазон Z-score для поиска
 
-"""
+""")
     
     # Промоторы
     if not promoter_data.empty:
-        report += f"""#### 🔹 Промоторный анализ
+        parts.append(f"""#### 🔹 Промоторный анализ
 - **G4 в промоторах**: {len(promoter_data)} структур
 - **Уникальные гены**: {promoter_data.get('Gene_ID', promoter_data.get('gene_id', pd.Series())).nunique() if 'Gene_ID' in promoter_data.columns or 'gene_id' in promoter_data.columns else 'N/A'}
-"""
+""")
         if not g4_data.empty:
             promo_percent = (len(promoter_data) / len(g4_data)) * 100
-            report += f"- **Доля от всех G4**: {promo_percent:.1f}%\n"
-        report += "\n"
+            parts.append(f"- **Доля от всех G4**: {promo_percent:.1f}%\n")
+        parts.append("\n")
     
     # Колокализация
     if colocalization_stats.get('total_colocalizations', 0) > 0:
-        report += f"""#### 🔗 Колокализация Z-DNA и G-квадруплексов
+        parts.append(f"""#### 🔗 Колокализация Z-DNA и G-квадруплексов
 - **Всего колокализаций**: {colocalization_stats['total_colocalizations']}
 - **G4 с близкими Z-DNA**: {colocalization_stats['g4_with_zdna']}
 - **Z-DNA с близкими G4**: {colocalization_stats['zdna_with_g4']}
 - **Среднее расстояние**: {colocalization_stats['average_distance']:.0f} bp
 - **Окно поиска**: ±1000 bp
 
-"""
+""")
     else:
-        report += """#### 🔗 Колокализация Z-DNA и G-квадруплексов
+        parts.append("""#### 🔗 Колокализация Z-DNA и G-квадруплексов
 - **Статус**: Недостаточно данных для анализа колокализации
 - **Возможные причины**: 
   - Z-DNA структуры не найдены с текущими параметрами
   - Структуры находятся на разных участках генома
   - Необходимо расширить окно поиска
 
-"""
+""")
     
     # Биологическая интерпретация
-    report += """### 🧬 БИОЛОГИЧЕСКАЯ ИНТЕРПРЕТАЦИЯ
+    parts.append("""### 🧬 БИОЛОГИЧЕСКАЯ ИНТЕРПРЕТАЦИЯ
 
 #### Функциональное значение
-"""
+""")
     
     if not g4_data.empty:
-        report += """
+        parts.append("""
 **G-квадруплексы:**
 - Участвуют в регуляции транскрипции
 - Влияют на репликацию ДНК
 - Играют роль в теломерной биологии
 - Могут вызывать геномную нестабильность
-"""
+""")
     
     if not zdna_data.empty:
-        report += """
+        parts.append("""
 **Z-DNA структуры:**
 - Связаны с активной транскрипцией
 - Могут индуцировать рекомбинацию
 - Влияют на хроматиновую структуру
 - Участвуют в эпигенетической регуляции
-"""
+""")
     
     if colocalization_stats.get('total_colocalizations', 0) > 0:
-        report += f"""
+        parts.append(f"""
 **Колокализация:**
 - Обнаружено {colocalization_stats['total_colocalizations']} случаев совместного присутствия
 - Может указывать на функциональную связь между структурами
 - Требует дальнейшего исследования механизмов взаимодействия
-"""
+""")
     
     # Технические детали
-    report += """
+    parts.append("""
 
 ### 🔬 МЕТОДОЛОГИЯ
 
@@ -416,11 +602,11 @@ def generate_final_report(g4_data, zdna_data, promoter_data, colocalization_stat
 - STRING DB для функционального обогащения
 - Python + pandas/matplotlib для анализа
 
-"""
+""")
     
     # Сохраняем отчет
     with open('results/FINAL_INTEGRATED_REPORT.md', 'w', encoding='utf-8') as f:
-        f.write(report)
+        f.write("".join(parts))
     
     print("✅ Финальный отчет сохранен: results/FINAL_INTEGRATED_REPORT.md")
 
@@ -439,15 +625,24 @@ def main():
     
     # Анализ колокализации
     print("\n🔍 Анализ колокализации...")
-    colocalization_stats = analyze_colocalization(g4_data, zdna_data)
+    zdna_index = build_zdna_index(zdna_data)
+    colocalization_stats = analyze_colocalization(g4_data, zdna_data, zdna_index=zdna_index)
+    del zdna_index
+    structure_stats = summarize_structures(g4_data, zdna_data)
     
     # Создаем визуализации
     print("\n🎨 Создание визуализаций...")
-    create_integrated_visualizations(g4_data, zdna_data, promoter_data, colocalization_stats)
+    create_integrated_visualizations(g4_data, zdna_data, promoter_data, colocalization_stats, structure_stats)
+    
+    # Отчету нужны только скалярные поля статистики: освобождаем массив
+    # расстояний и буферы фигур перед следующим этапом
+    colocalization_stats.pop('distances', None)
+    plt.close('all')
+    gc.collect()
     
     # Генерируем отчет
     print("\n📝 Генерация отчета...")
-    generate_final_report(g4_data, zdna_data, promoter_data, colocalization_stats)
+    generate_final_report(g4_data, zdna_data, promoter_data, colocalization_stats, structure_stats)
     
     print("\n" + "=" * 60)
     print("🎉 ИНТЕГРИРОВАННЫЙ АНАЛИЗ ЗАВЕРШЕН!")
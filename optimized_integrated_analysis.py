@@ -6,39 +6,167 @@
 
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # пакетный режим: без интерактивного бэкенда
 import matplotlib.pyplot as plt
 import seaborn as sns
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from collections import defaultdict, Counter
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
 plt.style.use('bmh')
 plt.rcParams['figure.figsize'] = [12, 8]
 plt.rcParams['font.size'] = 10
 
+# Версия формата кэша: увеличивать при изменении разбора или типов колонок,
+# иначе старые кэши будут молча отдаваться вместо нового результата
+CACHE_VERSION = 2
+
+def _sequence_lengths(sequences):
+    """Длины последовательностей одним векторным проходом (Arrow-ядро, если есть pyarrow)"""
+    try:
+        sequences = sequences.astype('string[pyarrow]')
+    except ImportError:
+        pass
+    return sequences.str.len().fillna(0).astype(np.int32)
+
 def load_g4_data():
     """Загружаем данные G-квадруплексов"""
     try:
-        g4_data = pd.read_csv('results/quadruplex_results.csv')
+        # Хромосомы - категория, позиции dm6 помещаются в int32
+        dtypes = {'chromosome': 'category', 'start': np.int32, 'end': np.int32,
+                  'length': np.int32, 'g_run_length': np.int32,
+                  'g_content': np.float32, 'gc_content': np.float32,
+                  'score': np.float32}
+        try:
+            # Многопоточный CSV-парсер Arrow
+            g4_data = pd.read_csv('results/quadruplex_results.csv', engine='pyarrow', dtype=dtypes)
+        except (ImportError, ValueError):
+            # Нет pyarrow - обычный C-парсер
+            g4_data = pd.read_csv('results/quadruplex_results.csv', dtype=dtypes)
+        g4_data['seq_len'] = _sequence_lengths(g4_data['sequence'])
         print(f"✅ Загружено {len(g4_data)} G-квадруплексов")
         return g4_data
     except Exception as e:
         print(f"⚠️  Ошибка загрузки G4 данных: {e}")
         return pd.DataFrame()
 
-def load_zdna_data():
-    """Загружаем данные Z-DNA"""
+def _parse_zdna_table(file_path):
+    """Разбираем таблицу Z-DNA и сортируем ее по (хромосома, позиция)"""
+    # Парсер Arrow не поддерживает comment='#', а заголовок файла - строки-комментарии
+    zdna_data = pd.read_csv(file_path, sep='\t', comment='#', 
+                          names=['chromosome', 'position', 'zscore', 'score1', 'score2', 'length', 'sequence'],
+                          dtype={'chromosome': 'category', 'position': np.int32,
+                                 'score1': np.float32,
+                                 'score2': np.float32, 'length': np.int32})
+    zdna_data['seq_len'] = _sequence_lengths(zdna_data['sequence'])
+    # Устойчивая сортировка: позиции внутри хромосом готовы для searchsorted
+    return zdna_data.sort_values(['chromosome', 'position'], kind='mergesort', ignore_index=True)
+
+def load_zdna_data(file_path='results/zdna_structures_corrected.txt'):
+    """Загружаем данные Z-DNA
+    
+    Разобранная и отсортированная таблица кэшируется в <file>.sorted.v<CACHE_VERSION>.parquet;
+    кэш используется, пока он новее исходного файла.
+    """
     try:
-        zdna_data = pd.read_csv('results/zdna_structures_corrected.txt', sep='\t', comment='#', 
-                              names=['chromosome', 'position', 'zscore', 'score1', 'score2', 'length', 'sequence'])
+        cache_path = f"{file_path}.sorted.v{CACHE_VERSION}.parquet"
+        zdna_data = None
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) > os.path.getmtime(file_path):
+            try:
+                zdna_data = pd.read_parquet(cache_path)
+            except Exception as e:
+                print(f"⚠️  Не удалось прочитать кэш {cache_path}: {e}")
+        
+        if zdna_data is None:
+            zdna_data = _parse_zdna_table(file_path)
+            try:
+                zdna_data.to_parquet(cache_path, index=False)
+            except ImportError:
+                # Нет pyarrow/fastparquet - работаем без кэша
+                pass
+        
         print(f"✅ Загружено {len(zdna_data)} Z-DNA структур")
         return zdna_data
     except Exception as e:
         print(f"⚠️  Ошибка загрузки Z-DNA данных: {e}")
         return pd.DataFrame()
 
+def _coloc_chrom(args):
+    """Колокализация на одной хромосоме: (хромосома, число колокализаций)"""
+    chrom, g4_positions, zdna_positions, window = args
+    # Позиции Z-DNA уже отсортированы (см. _sorted_groups)
+    z_sorted = zdna_positions
+    
+    # Z-DNA в окне [g4 - window, g4 + window]: границы для всех G4 сразу
+    # двумя бинарными поисками по отсортированным позициям
+    lo = np.searchsorted(z_sorted, g4_positions - window, side='left')
+    hi = np.searchsorted(z_sorted, g4_positions + window, side='right')
+    return chrom, int((hi - lo).sum())
+
+if njit is not None:
+    @njit(cache=True, parallel=True)
+    def _coloc_all(g4_pos, g4_offsets, zdna_pos, zdna_offsets, window):
+        """Число колокализаций по хромосомам одним вызовом
+        
+        Позиции всех хромосом склеены в один массив (CSR): хромосома c занимает
+        [offsets[c], offsets[c + 1]), внутри хромосомы позиции отсортированы.
+        Окно для каждой хромосомы считается проходом двух указателей, хромосомы
+        распределяются по потокам через prange.
+        """
+        n_chrom = len(g4_offsets) - 1
+        counts = np.zeros(n_chrom, dtype=np.int64)
+        for c in prange(n_chrom):
+            lo = zdna_offsets[c]
+            hi = lo
+            end = zdna_offsets[c + 1]
+            total = 0
+            for i in range(g4_offsets[c], g4_offsets[c + 1]):
+                g4 = g4_pos[i]
+                while lo < end and zdna_pos[lo] < g4 - window:
+                    lo += 1
+                if hi < lo:
+                    hi = lo
+                while hi < end and zdna_pos[hi] <= g4 + window:
+                    hi += 1
+                total += hi - lo
+            counts[c] = total
+        return counts
+else:
+    _coloc_all = None
+
+def _sorted_groups(positions, chromosomes):
+    """Позиции по хромосомам одним проходом groupby, отсортированные внутри хромосомы
+    
+    Z-DNA таблица сортируется при загрузке, поэтому np.sort вызывается только
+    для неупорядоченных групп.
+    """
+    groups = {}
+    for chrom, group in positions.groupby(chromosomes, observed=True, sort=False):
+        values = group.to_numpy(copy=False)
+        groups[chrom] = values if group.is_monotonic_increasing else np.sort(values)
+    return groups
+
+def _csr_positions(groups, chroms):
+    """Склеиваем отсортированные позиции хромосом в один массив со смещениями"""
+    arrays = [groups[chrom].astype(np.int64) for chrom in chroms]
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(a) for a in arrays])
+    return np.concatenate(arrays), offsets
+
 def fast_colocalization_analysis(g4_data, zdna_data, window=1000):
     """Быстрый анализ колокализации используя группировку по хромосомам"""
     print(f"🔍 Быстрый анализ колокализации (окно {window} bp)...")
@@ -47,39 +175,42 @@ def fast_colocalization_analysis(g4_data, zdna_data, window=1000):
         print("⚠️  Недостаточно данных для анализа")
         return {'total_colocalizations': 0, 'summary_by_chromosome': {}}
     
-    colocalization_summary = {}
-    total_colocs = 0
+    # Позиции по хромосомам за один проход groupby вместо маски на каждую хромосому
+    g4_groups = _sorted_groups(g4_data['start'], g4_data['chromosome'])
+    zdna_groups = _sorted_groups(zdna_data['position'], zdna_data['chromosome'])
+    
+    tasks = [(chrom, g4_positions, zdna_groups[chrom], window)
+             for chrom, g4_positions in g4_groups.items() if chrom in zdna_groups]
+    chroms = [task[0] for task in tasks]
+    colocs = np.zeros(len(tasks), dtype=np.int64)
+    if tasks and _coloc_all is not None:
+        # Все хромосомы одним вызовом numba-ядра: без накладных расходов пула процессов
+        g4_pos, g4_offsets = _csr_positions(g4_groups, chroms)
+        zdna_pos, zdna_offsets = _csr_positions(zdna_groups, chroms)
+        colocs = _coloc_all(g4_pos, g4_offsets, zdna_pos, zdna_offsets, window)
+    elif tasks:
+        # Хромосомы независимы - считаем их параллельно, по задаче на хромосому
+        with ProcessPoolExecutor(max_workers=min(os.cpu_count() or 1, len(tasks))) as pool:
+            colocs = np.fromiter((count for _, count in pool.map(_coloc_chrom, tasks)),
+                                 dtype=np.int64, count=len(tasks))
+    
+    # Статистика по хромосомам - столбцами NumPy; в словарь только для JSON
+    g4_cnt = np.fromiter((len(g4_groups[c]) for c in chroms), dtype=np.int64, count=len(chroms))
+    zdna_cnt = np.fromiter((len(zdna_groups[c]) for c in chroms), dtype=np.int64, count=len(chroms))
+    rate = np.divide(colocs, g4_cnt, out=np.zeros(len(chroms)), where=g4_cnt > 0)
+    total_colocs = int(colocs.sum())
     
-    # Группируем по хромосомам для ускорения
-    for chrom in g4_data['chromosome'].unique():
+    colocalization_summary = {}
+    for chrom, g4_count, zdna_count, colocs_in_chrom, chrom_rate in zip(
+            chroms, g4_cnt.tolist(), zdna_cnt.tolist(), colocs.tolist(), rate.tolist()):
         print(f"   Анализируем {chrom}...")
-        
-        g4_chrom = g4_data[g4_data['chromosome'] == chrom]
-        zdna_chrom = zdna_data[zdna_data['chromosome'] == chrom]
-        
-        if zdna_chrom.empty:
-            continue
-            
-        colocs_in_chrom = 0
-        g4_positions = g4_chrom['start'].values
-        zdna_positions = zdna_chrom['position'].values
-        
-        # Быстрый поиск ближайших позиций
-        for g4_pos in g4_positions:
-            # Находим Z-DNA в окне
-            distances = np.abs(zdna_positions - g4_pos)
-            nearby = distances <= window
-            colocs_in_chrom += np.sum(nearby)
-        
         colocalization_summary[chrom] = {
-            'g4_count': len(g4_chrom),
-            'zdna_count': len(zdna_chrom),
+            'g4_count': g4_count,
+            'zdna_count': zdna_count,
             'colocalizations': colocs_in_chrom,
-            'colocalization_rate': colocs_in_chrom / len(g4_chrom) if len(g4_chrom) > 0 else 0
+            'colocalization_rate': chrom_rate
         }
-        
-        total_colocs += colocs_in_chrom
-        
+    
     print(f"   📊 Всего колокализаций: {total_colocs}")
     
     return {
@@ -87,7 +218,56 @@ def fast_colocalization_analysis(g4_data, zdna_data, window=1000):
         'summary_by_chromosome': colocalization_summary
     }
 
-def create_fast_visualizations(g4_data, zdna_data, colocalization_stats):
+def build_summary(g4_data, zdna_data):
+    """Сводка по обоим наборам данных за один проход
+    
+    Счетчики по хромосомам, массивы длин и Z-score и их агрегаты считаются
+    здесь один раз и передаются в визуализацию, JSON и отчет.
+    """
+    summary = {
+        'g4_count': len(g4_data),
+        'g4_counts_by_chrom': pd.Series(dtype=np.int64),
+        'g4_chromosomes': 0,
+        'g4_seq_len': np.empty(0, dtype=np.int32),
+        'g4_avg_length': 0.0,
+        'zdna_count': len(zdna_data),
+        'zdna_counts_by_chrom': pd.Series(dtype=np.int64),
+        'zdna_chromosomes': 0,
+        'zdna_seq_len': np.empty(0, dtype=np.int32),
+        'zscore': np.empty(0),
+        'zscore_mean': 0.0,
+        'zscore_min': 0.0,
+        'zscore_max': 0.0,
+    }
+    
+    if not g4_data.empty:
+        # observed=True: только встречающиеся хромосомы, без пустых уровней категории
+        g4_counts = g4_data.groupby('chromosome', observed=True, sort=False).size()
+        g4_seq_len = g4_data['seq_len'].to_numpy()
+        summary.update({
+            'g4_counts_by_chrom': g4_counts,
+            'g4_chromosomes': len(g4_counts),
+            'g4_seq_len': g4_seq_len,
+            'g4_avg_length': float(g4_seq_len.mean()),
+        })
+    
+    if not zdna_data.empty:
+        zdna_counts = zdna_data.groupby('chromosome', observed=True, sort=False).size()
+        # min/max/mean Z-score одним вызовом agg
+        zscore_min, zscore_max, zscore_mean = zdna_data['zscore'].agg(['min', 'max', 'mean']).to_numpy()
+        summary.update({
+            'zdna_counts_by_chrom': zdna_counts,
+            'zdna_chromosomes': len(zdna_counts),
+            'zdna_seq_len': zdna_data['seq_len'].to_numpy(),
+            'zscore': zdna_data['zscore'].to_numpy(),
+            'zscore_mean': float(zscore_mean),
+            'zscore_min': float(zscore_min),
+            'zscore_max': float(zscore_max),
+        })
+    
+    return summary
+
+def create_fast_visualizations(summary, colocalization_stats):
     """Создаем быстрые визуализации"""
     print("🎨 Создаем визуализации...")
     
@@ -100,17 +280,19 @@ def create_fast_visualizations(g4_data, zdna_data, colocalization_stats):
     # 1. Распределение по хромосомам
     ax1 = axes[0, 0]
     
-    if not g4_data.empty:
-        g4_counts = g4_data['chromosome'].value_counts()
+    has_g4 = summary['g4_count'] > 0
+    has_zdna = summary['zdna_count'] > 0
+    
+    if has_g4:
+        g4_counts = summary['g4_counts_by_chrom']
         positions = np.arange(len(g4_counts))
-        ax1.bar(positions - 0.2, g4_counts.values, 0.4, label='G-квадруплексы', alpha=0.7, color='blue')
+        ax1.bar(positions - 0.2, g4_counts.to_numpy(), 0.4, label='G-квадруплексы', alpha=0.7, color='blue')
     
-    if not zdna_data.empty:
-        zdna_counts = zdna_data['chromosome'].value_counts()
-        # Приводим к тому же порядку хромосом
-        zdna_aligned = []
-        for chrom in g4_counts.index if not g4_data.empty else zdna_counts.index:
-            zdna_aligned.append(zdna_counts.get(chrom, 0))
+    if has_zdna:
+        zdna_counts = summary['zdna_counts_by_chrom']
+        # Приводим к тому же порядку хромосом одним reindex
+        zdna_aligned = zdna_counts.reindex(g4_counts.index if has_g4 else zdna_counts.index,
+                                           fill_value=0).to_numpy()
         
         ax1.bar(positions + 0.2, zdna_aligned, 0.4, label='Z-DNA', alpha=0.7, color='red')
     
@@ -118,18 +300,21 @@ def create_fast_visualizations(g4_data, zdna_data, colocalization_stats):
     ax1.set_xlabel('Хромосома')
     ax1.set_ylabel('Количество структур')
     ax1.set_xticks(positions)
-    ax1.set_xticklabels(g4_counts.index if not g4_data.empty else zdna_counts.index, rotation=45)
+    ax1.set_xticklabels(g4_counts.index if has_g4 else zdna_counts.index, rotation=45)
     ax1.legend()
     
     # 2. Длины последовательностей
     ax2 = axes[0, 1]
-    if not g4_data.empty:
-        g4_lengths = g4_data['sequence'].str.len()
-        ax2.hist(g4_lengths, bins=20, alpha=0.7, color='blue', label='G-квадруплексы', density=True)
+    # Общие границы бинов для обоих наборов: гистограммы сравнимы между собой
+    length_bins = np.histogram_bin_edges(np.concatenate([summary['g4_seq_len'], summary['zdna_seq_len']]),
+                                         bins=20)
+    if has_g4:
+        g4_hist, _ = np.histogram(summary['g4_seq_len'], bins=length_bins, density=True)
+        ax2.stairs(g4_hist, length_bins, fill=True, alpha=0.7, color='blue', label='G-квадруплексы')
     
-    if not zdna_data.empty:
-        zdna_lengths = zdna_data['sequence'].str.len()
-        ax2.hist(zdna_lengths, bins=20, alpha=0.7, color='red', label='Z-DNA', density=True)
+    if has_zdna:
+        zdna_hist, _ = np.histogram(summary['zdna_seq_len'], bins=length_bins, density=True)
+        ax2.stairs(zdna_hist, length_bins, fill=True, alpha=0.7, color='red', label='Z-DNA')
     
     ax2.set_title('Распределение длин последовательностей')
     ax2.set_xlabel('Длина (bp)')
@@ -154,13 +339,14 @@ def create_fast_visualizations(g4_data, zdna_data, colocalization_stats):
     
     # 4. Z-score распределение
     ax4 = axes[1, 0]
-    if not zdna_data.empty:
-        ax4.hist(zdna_data['zscore'], bins=30, color='red', alpha=0.7)
+    if has_zdna:
+        zscore_hist, zscore_bins = np.histogram(summary['zscore'], bins=30)
+        ax4.stairs(zscore_hist, zscore_bins, fill=True, color='red', alpha=0.7)
         ax4.set_title('Распределение Z-score')
         ax4.set_xlabel('Z-score')
         ax4.set_ylabel('Количество структур')
-        ax4.axvline(zdna_data['zscore'].mean(), color='black', linestyle='--', 
-                   label=f'Среднее: {zdna_data["zscore"].mean():.1f}')
+        ax4.axvline(summary['zscore_mean'], color='black', linestyle='--', 
+                   label=f'Среднее: {summary["zscore_mean"]:.1f}')
         ax4.legend()
     
     # 5. Статистика колокализации
@@ -181,22 +367,22 @@ def create_fast_visualizations(g4_data, zdna_data, colocalization_stats):
     
     summary_text = "📊 СВОДНАЯ СТАТИСТИКА\n\n"
     
-    if not g4_data.empty:
-        summary_text += f"🔹 G-квадруплексы: {len(g4_data):,}\n"
-        summary_text += f"   Хромосомы: {g4_data['chromosome'].nunique()}\n"
-        summary_text += f"   Средняя длина: {g4_data['sequence'].str.len().mean():.1f} bp\n\n"
+    if has_g4:
+        summary_text += f"🔹 G-квадруплексы: {summary['g4_count']:,}\n"
+        summary_text += f"   Хромосомы: {summary['g4_chromosomes']}\n"
+        summary_text += f"   Средняя длина: {summary['g4_avg_length']:.1f} bp\n\n"
     
-    if not zdna_data.empty:
-        summary_text += f"🔸 Z-DNA структуры: {len(zdna_data):,}\n"
-        summary_text += f"   Хромосомы: {zdna_data['chromosome'].nunique()}\n"
-        summary_text += f"   Средний Z-score: {zdna_data['zscore'].mean():.1f}\n"
-        summary_text += f"   Диапазон Z-score: {zdna_data['zscore'].min():.0f}-{zdna_data['zscore'].max():.0f}\n\n"
+    if has_zdna:
+        summary_text += f"🔸 Z-DNA структуры: {summary['zdna_count']:,}\n"
+        summary_text += f"   Хромосомы: {summary['zdna_chromosomes']}\n"
+        summary_text += f"   Средний Z-score: {summary['zscore_mean']:.1f}\n"
+        summary_text += f"   Диапазон Z-score: {summary['zscore_min']:.0f}-{summary['zscore_max']:.0f}\n\n"
     
     if colocalization_stats.get('total_colocalizations', 0) > 0:
         summary_text += f"🔗 Колокализации: {colocalization_stats['total_colocalizations']:,}\n"
         
-        if not g4_data.empty:
-            coloc_percent = (colocalization_stats['total_colocalizations'] / len(g4_data)) * 100
+        if has_g4:
+            coloc_percent = (colocalization_stats['total_colocalizations'] / summary['g4_count']) * 100
             summary_text += f"   Процент G4: {coloc_percent:.1f}%\n"
     else:
         summary_text += "🔗 Колокализации: Не найдены\n"
@@ -206,12 +392,12 @@ def create_fast_visualizations(g4_data, zdna_data, colocalization_stats):
              bbox=dict(boxstyle="round,pad=0.5", facecolor="lightgray", alpha=0.8))
     
     plt.tight_layout()
-    plt.savefig('results/fast_integrated_analysis.png', dpi=300, bbox_inches='tight', 
+    fig.savefig('results/fast_integrated_analysis.png', dpi=150, bbox_inches='tight', 
                 facecolor='white', edgecolor='none')
-    plt.show()
+    plt.close(fig)
     print("✅ Визуализация сохранена: results/fast_integrated_analysis.png")
 
-def save_analysis_results(g4_data, zdna_data, colocalization_stats):
+def save_analysis_results(summary, colocalization_stats):
     """Сохраняем результаты анализа"""
     print("💾 Сохраняем результаты анализа...")
     
@@ -220,22 +406,26 @@ def save_analysis_results(g4_data, zdna_data, colocalization_stats):
         'timestamp': pd.Timestamp.now().isoformat(),
         'datasets': {
             'g4_structures': {
-                'count': len(g4_data) if not g4_data.empty else 0,
-                'chromosomes': g4_data['chromosome'].nunique() if not g4_data.empty else 0,
-                'avg_length': float(g4_data['sequence'].str.len().mean()) if not g4_data.empty else 0
+                'count': summary['g4_count'],
+                'chromosomes': summary['g4_chromosomes'],
+                'avg_length': summary['g4_avg_length'] if summary['g4_count'] else 0
             },
             'zdna_structures': {
-                'count': len(zdna_data) if not zdna_data.empty else 0,
-                'chromosomes': zdna_data['chromosome'].nunique() if not zdna_data.empty else 0,
-                'avg_zscore': float(zdna_data['zscore'].mean()) if not zdna_data.empty else 0,
-                'zscore_range': [float(zdna_data['zscore'].min()), float(zdna_data['zscore'].max())] if not zdna_data.empty else [0, 0]
+                'count': summary['zdna_count'],
+                'chromosomes': summary['zdna_chromosomes'],
+                'avg_zscore': summary['zscore_mean'] if summary['zdna_count'] else 0,
+                'zscore_range': [summary['zscore_min'], summary['zscore_max']] if summary['zdna_count'] else [0, 0]
             }
         },
         'colocalization': colocalization_stats
     }
     
-    with open('results/integrated_analysis_results.json', 'w', encoding='utf-8') as f:
-        json.dump(results, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        with open('results/integrated_analysis_results.json', 'wb') as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open('results/integrated_analysis_results.json', 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
     
     print("✅ Результаты сохранены: results/integrated_analysis_results.json")
 
@@ -251,65 +441,71 @@ def main():
     # Быстрый анализ колокализации
     print("\n🔍 Анализ колокализации...")
     colocalization_stats = fast_colocalization_analysis(g4_data, zdna_data)
+    # Все агрегаты считаются один раз; дальше DataFrame'ы не сканируются
+    summary = build_summary(g4_data, zdna_data)
     
     # Создаем визуализации
     print("\n🎨 Создание визуализаций...")
-    create_fast_visualizations(g4_data, zdna_data, colocalization_stats)
+    create_fast_visualizations(summary, colocalization_stats)
     
     # Сохраняем результаты
     print("\n💾 Сохранение результатов...")
-    save_analysis_results(g4_data, zdna_data, colocalization_stats)
+    save_analysis_results(summary, colocalization_stats)
     
     print("\n🎉 АНАЛИЗ ЗАВЕРШЕН!")
-    print(f"📊 G-квадруплексы: {len(g4_data):,}")
-    print(f"📊 Z-DNA структуры: {len(zdna_data):,}")
+    print(f"📊 G-квадруплексы: {summary['g4_count']:,}")
+    print(f"📊 Z-DNA структуры: {summary['zdna_count']:,}")
     print(f"📊 Колокализации: {colocalization_stats.get('total_colocalizations', 0):,}")
     
     # Создаем финальный отчет
-    create_final_report(g4_data, zdna_data, colocalization_stats)
+    create_final_report(summary, colocalization_stats)
 
-def create_final_report(g4_data, zdna_data, colocalization_stats):
+def create_final_report(summary, colocalization_stats):
     """Создаем финальный отчет"""
     print("\n📝 Создание финального отчета...")
     
-    report = f"""# 🧬 ФИНАЛЬНЫЙ ОТЧЕТ: Анализ Z-DNA и G-квадруплексов
+    # Отчет собираем из частей и склеиваем один раз при записи
+    parts = [f"""# 🧬 ФИНАЛЬНЫЙ ОТЧЕТ: Анализ Z-DNA и G-квадруплексов
 
 ## Сводка результатов
 
 ### G-квадруплексы
-- **Всего найдено**: {len(g4_data):,} структур
-- **Хромосомы**: {g4_data['chromosome'].nunique() if not g4_data.empty else 0}
-- **Средняя длина**: {g4_data['sequence'].str.len().mean():.1f} bp
+- **Всего найдено**: {summary['g4_count']:,} структур
+- **Хромосомы**: {summary['g4_chromosomes']}
+- **Средняя длина**: {summary['g4_avg_length']:.1f} bp
 
 ### Z-DNA структуры  
-- **Всего найдено**: {len(zdna_data):,} структур
-- **Хромосомы**: {zdna_data['chromosome'].nunique() if not zdna_data.empty else 0}
-- **Средний Z-score**: {zdna_data['zscore'].mean():.1f}
-- **Диапазон Z-score**: {zdna_data['zscore'].min():.0f} - {zdna_data['zscore'].max():.0f}
+- **Всего найдено**: {summary['zdna_count']:,} структур
+- **Хромосомы**: {summary['zdna_chromosomes']}
+- **Средний Z-score**: {summary['zscore_mean']:.1f}
+- **Диапазон Z-score**: {summary['zscore_min']:.0f} - {summary['zscore_max']:.0f}
 
 ### Колокализация
 - **Всего колокализаций**: {colocalization_stats.get('total_colocalizations', 0):,}
-"""
+"""]
 
-    if not g4_data.empty and colocalization_stats.get('total_colocalizations', 0) > 0:
-        coloc_percent = (colocalization_stats['total_colocalizations'] / len(g4_data)) * 100
-        report += f"- **Процент G4 с Z-DNA**: {coloc_percent:.1f}%\n"
+    if summary['g4_count'] > 0 and colocalization_stats.get('total_colocalizations', 0) > 0:
+        coloc_percent = (colocalization_stats['total_colocalizations'] / summary['g4_count']) * 100
+        parts.append(f"- **Процент G4 с Z-DNA**: {coloc_percent:.1f}%\n")
 
-    report += f"""
+    parts.append(f"""
 ## Распределение по хромосомам
 
 | Хромосома | G-квадруплексы | Z-DNA | Колокализации |
 |-----------|----------------|-------|---------------|
-"""
+""")
 
-    if not g4_data.empty:
-        for chrom in sorted(g4_data['chromosome'].unique()):
-            g4_count = len(g4_data[g4_data['chromosome'] == chrom])
-            zdna_count = len(zdna_data[zdna_data['chromosome'] == chrom]) if not zdna_data.empty else 0
+    if summary['g4_count'] > 0:
+        # Размеры групп уже посчитаны в сводке - без сканирования таблиц на каждую хромосому
+        g4_sizes = summary['g4_counts_by_chrom']
+        zdna_sizes = summary['zdna_counts_by_chrom']
+        for chrom in sorted(g4_sizes.index):
+            g4_count = int(g4_sizes[chrom])
+            zdna_count = int(zdna_sizes.get(chrom, 0))
             coloc_count = colocalization_stats.get('summary_by_chromosome', {}).get(chrom, {}).get('colocalizations', 0)
-            report += f"| {chrom} | {g4_count:,} | {zdna_count:,} | {coloc_count:,} |\n"
+            parts.append(f"| {chrom} | {g4_count:,} | {zdna_count:,} | {coloc_count:,} |\n")
 
-    report += f"""
+    parts.append(f"""
 ## Методы анализа
 
 ### Z-Hunt параметры
@@ -337,15 +533,15 @@ def create_final_report(g4_data, zdna_data, colocalization_stats):
 
 Анализ генома Drosophila melanogaster (dm6) выявил:
 
-1. **{len(g4_data):,} G-квадруплексов** распределенных по всем хромосомам
-2. **{len(zdna_data):,} Z-DNA структур** с Z-score 300-400
+1. **{summary['g4_count']:,} G-квадруплексов** распределенных по всем хромосомам
+2. **{summary['zdna_count']:,} Z-DNA структур** с Z-score 300-400
 3. **{colocalization_stats.get('total_colocalizations', 0):,} случаев колокализации** в пределах 1 kb
 
 Результаты демонстрируют распределение альтернативных структур ДНК в геноме дрозофилы и их потенциальную коэкспрессию в регуляторных регионах.
-"""
+""")
 
     with open('results/FINAL_INTEGRATED_REPORT.md', 'w', encoding='utf-8') as f:
-        f.write(report)
+        f.write("".join(parts))
     
     print("✅ Финальный отчет: results/FINAL_INTEGRATED_REPORT.md")
 
@@ -9,6 +9,7 @@ import sys
 import subprocess
 import argparse
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 def run_command(cmd, description, background=False):
     """
@@ -24,16 +25,18 @@ def run_command(cmd, description, background=False):
         print(f"Started in background (PID: {process.pid})")
         return process
     else:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"ERROR: {description} failed!")
-            print(f"STDOUT: {result.stdout}")
-            print(f"STDERR: {result.stderr}")
+        # Stream output line by line instead of buffering it all in memory;
+        # lines are tagged because independent steps run concurrently
+        process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, text=True, bufsize=1)
+        for line in process.stdout:
+            print(f"[{description}] {line}", end='')
+        process.wait()
+        if process.returncode != 0:
+            print(f"ERROR: {description} failed with return code {process.returncode}!")
             return False
         else:
             print(f"SUCCESS: {description} completed!")
-            if result.stdout:
-                print(f"Output: {result.stdout}")
             return True
 
 def check_file_exists(filepath, description):
@@ -46,18 +49,33 @@ def check_file_exists(filepath, description):
     print(f"✓ Found {description}: {filepath}")
     return True
 
-def wait_for_completion(processes, descriptions):
+def run_pipeline(steps, satisfied=()):
     """
-    Wait for background processes to complete
+    Run (name, deps, cmd) steps, each as soon as all of its dependencies succeed
     """
-    print(f"\nWaiting for {len(processes)} processes to complete...")
-    for i, (process, desc) in enumerate(zip(processes, descriptions)):
-        print(f"Waiting for: {desc}")
-        process.wait()
-        if process.returncode == 0:
-            print(f"✓ {desc} completed successfully")
-        else:
-            print(f"✗ {desc} failed with return code {process.returncode}")
+    done = set(satisfied)
+    failed = set()
+    pending = list(steps)
+    running = {}
+    
+    # Steps are external commands, so threads are enough to overlap them
+    with ThreadPoolExecutor(max_workers=max(len(steps), 1)) as pool:
+        while pending or running:
+            for step in [s for s in pending if set(s[1]) <= done]:
+                pending.remove(step)
+                name, _, cmd = step
+                running[pool.submit(run_command, cmd, name)] = name
+            
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                (done if future.result() else failed).add(name)
+    
+    for name, deps, _ in pending:
+        print(f"✗ Skipped {name}: unfinished dependencies {', '.join(sorted(set(deps) - done))}")
+    return not failed and not pending
 
 def main():
     parser = argparse.ArgumentParser(description='Run complete Z-DNA and G-quadruplex analysis')
@@ -104,48 +122,36 @@ def main():
     os.makedirs("results", exist_ok=True)
     os.makedirs("data/results", exist_ok=True)
     
-    background_processes = []
-    process_descriptions = []
+    print("\n2. Running analysis steps...")
+    
+    # Pipeline steps as (name, dependencies, command). Each step starts as soon as
+    # its inputs are ready: Z-Hunt results analysis overlaps the G4 search.
+    steps = []
+    skipped = []
     
-    # Step 2: Run Z-Hunt analysis
     if not args.skip_zhunt:
-        print("\n2. Running Z-Hunt analysis...")
-        zhunt_cmd = f"./tools/zhunt/zhunt2 12 8 12 data/genome/dm6.fa > data/results/z_dna_raw.txt"
-        process = run_command(zhunt_cmd, "Z-Hunt analysis", background=True)
-        if process:
-            background_processes.append(process)
-            process_descriptions.append("Z-Hunt analysis")
+        steps.append(("Z-Hunt analysis", [],
+                      "./tools/zhunt/zhunt2 12 8 12 data/genome/dm6.fa > data/results/z_dna_raw.txt"))
     else:
-        print("\n2. Skipping Z-Hunt analysis (--skip-zhunt specified)")
+        print("Skipping Z-Hunt analysis (--skip-zhunt specified)")
+        skipped.append("Z-Hunt analysis")
     
-    # Step 3: Run G-quadruplex search
     if not args.skip_g4:
-        print("\n3. Running G-quadruplex search...")
-        g4_cmd = f"python scripts/quadruplex_search.py --input data/genome/dm6.fa --output-dir results --min-score {args.g4_min_score}"
-        process = run_command(g4_cmd, "G-quadruplex search", background=True)
-        if process:
-            background_processes.append(process)
-            process_descriptions.append("G-quadruplex search")
+        steps.append(("G-quadruplex search", [],
+                      f"python scripts/quadruplex_search.py --input data/genome/dm6.fa --output-dir results --min-score {args.g4_min_score}"))
     else:
-        print("\n3. Skipping G-quadruplex search (--skip-g4 specified)")
+        print("Skipping G-quadruplex search (--skip-g4 specified)")
+        skipped.append("G-quadruplex search")
     
-    # Wait for background processes
-    if background_processes:
-        wait_for_completion(background_processes, process_descriptions)
+    steps.append(("Z-Hunt results analysis", ["Z-Hunt analysis"],
+                  f"python scripts/zhunt_analysis.py --input data/results/z_dna_raw.txt --output-dir results --min-zscore {args.min_zscore} --max-zscore {args.max_zscore}"))
+    steps.append(("Genomic location analysis", ["Z-Hunt results analysis", "G-quadruplex search"],
+                  "python scripts/analysis.py --zdna-file results/zdna_filtered.csv --g4-file results/quadruplex_results.csv --gtf-file data/annotation/dm6.ensGene.gtf --output-dir results"))
     
-    # Step 4: Analyze Z-Hunt results
-    print("\n4. Analyzing Z-Hunt results...")
-    zhunt_analysis_cmd = f"python scripts/zhunt_analysis.py --input data/results/z_dna_raw.txt --output-dir results --min-zscore {args.min_zscore} --max-zscore {args.max_zscore}"
-    if not run_command(zhunt_analysis_cmd, "Z-Hunt results analysis"):
+    if not run_pipeline(steps, satisfied=skipped):
         return 1
     
-    # Step 5: Genomic location analysis
-    print("\n5. Running genomic location analysis...")
-    location_cmd = f"python scripts/analysis.py --zdna-file results/zdna_filtered.csv --g4-file results/quadruplex_results.csv --gtf-file data/annotation/dm6.ensGene.gtf --output-dir results"
-    if not run_command(location_cmd, "Genomic location analysis"):
-        return 1
-    
-    # Step 6: Summary
+    # Step 3: Summary
     print("\n" + "="*60)
     print("🎉 ANALYSIS PIPELINE COMPLETED!")
     print("="*60)
@@ -165,10 +171,16 @@ def main():
         "results/g4_promoter_genes.txt"
     ]
     
+    # One directory scan instead of exists() + getsize() per file
+    sizes = {}
+    if os.path.isdir("results"):
+        with os.scandir("results") as it:
+            sizes = {entry.name: entry.stat().st_size for entry in it if entry.is_file()}
+    
     for file in result_files:
-        if os.path.exists(file):
-            size = os.path.getsize(file) / 1024  # KB
-            print(f"  ✓ {file} ({size:.1f} KB)")
+        size = sizes.get(os.path.basename(file))
+        if size is not None:
+            print(f"  ✓ {file} ({size / 1024:.1f} KB)")
         else:
             print(f"  ✗ {file} (not found)")
     
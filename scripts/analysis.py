@@ -13,8 +13,119 @@ import os
 import requests
 import json
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import sys
+import csv
+import gzip
+import io
+import re
+
+GTF_COLUMNS = ['chromosome', 'source', 'feature', 'start', 'end', 'score', 'strand', 'frame', 'attribute']
+GENE_COLUMNS = ['chromosome', 'start', 'end', 'strand', 'gene_id', 'gene_name', 'tss']
+# Drosophila coordinates fit in int32; chromosome names become category codes
+STRUCTURE_DTYPES = {'chromosome': 'category', 'start': np.int32, 'end': np.int32}
+# Histogram panels of analyze_genomic_distribution: column -> (title, x label)
+HISTOGRAM_PANELS = {
+    'length': ('Structure Length Distribution', 'Length (bp)'),
+    'score': ('Score Distribution', 'Score'),
+    'gc_content': ('GC Content Distribution', 'GC Content'),
+}
+GENE_ID_PATTERN = r'(?:^|;)\s*gene_id "([^"]+)"'
+GENE_NAME_PATTERN = r'(?:^|;)\s*gene_name "([^"]+)"'
+# Below this many features the per-chromosome overlap search stays in-process
+OVERLAP_POOL_MIN_FEATURES = 500_000
+# Both keys in one scan, for attribute strings that are not Arrow-backed
+_ATTR_RE = re.compile(r'(?:^|;)\s*(gene_id|gene_name) "([^"]+)"')
+
+try:
+    from ncls import NCLS
+except ImportError:
+    NCLS = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+def _open_gtf(gtf_file):
+    """
+    Open a plain or gzip-compressed GTF file for reading text
+    """
+    if str(gtf_file).endswith('.gz'):
+        # Decompression runs in zlib; a 1 MiB buffer keeps the line loop fed
+        raw = io.BufferedReader(gzip.GzipFile(gtf_file, 'rb'), buffer_size=1 << 20)
+        return io.TextIOWrapper(raw)
+    return open(gtf_file, 'r', buffering=1 << 20)
+
+def _read_gtf_polars(gtf_file):
+    """
+    Lazy Polars scan of transcript rows; filter and regexes run in the multi-threaded engine
+    """
+    lf = pl.scan_csv(gtf_file, separator='\t', comment_prefix='#', has_header=False,
+                     new_columns=GTF_COLUMNS, quote_char=None,
+                     schema_overrides={'start': pl.Int32, 'end': pl.Int32})
+    lf = (lf.filter(pl.col('feature') == 'transcript')
+            .with_columns([
+                pl.col('attribute').str.extract(GENE_ID_PATTERN, 1).alias('gene_id'),
+                pl.col('attribute').str.extract(GENE_NAME_PATTERN, 1).alias('gene_name'),
+                pl.when(pl.col('strand') == '+').then(pl.col('start')).otherwise(pl.col('end')).alias('tss')
+            ])
+            .filter(pl.col('gene_id').is_not_null())
+            .with_columns(pl.col('gene_name').fill_null(pl.col('gene_id')))
+            .select(GENE_COLUMNS))
+    
+    genes = lf.collect().rechunk().to_pandas()
+    return genes.astype({'chromosome': 'category', 'strand': 'category'})
+
+def _read_gtf_pandas(gtf_file):
+    """
+    Transcript rows of a GTF file via the pandas C parser
+    """
+    # Only transcript lines are needed (~7% of the file): select them with a
+    # cheap substring test while streaming (gzip is decompressed on the fly),
+    # then parse the subset in one C-level pass.
+    # Attributes are quoted values, so CSV quoting is disabled.
+    with _open_gtf(gtf_file) as f:
+        transcript_lines = ''.join(line for line in f if '\ttranscript\t' in line)
+    gtf = pd.read_csv(io.StringIO(transcript_lines), sep='\t', header=None, names=GTF_COLUMNS,
+                      usecols=['chromosome', 'feature', 'start', 'end', 'strand', 'attribute'],
+                      dtype={'chromosome': 'category', 'strand': 'category'},
+                      quoting=csv.QUOTE_NONE, engine='c')
+    gtf = gtf[gtf['feature'] == 'transcript']
+    
+    attributes = gtf['attribute']
+    if pa is not None:
+        # Arrow strings: each extract is one vectorized regex pass in C++
+        gene_id = attributes.str.extract(GENE_ID_PATTERN, expand=False)
+        gene_name = attributes.str.extract(GENE_NAME_PATTERN, expand=False)
+    else:
+        # Object strings: one precompiled scan per line instead of two
+        kv = [dict(_ATTR_RE.findall(a)) if isinstance(a, str) else {} for a in attributes]
+        gene_id = pd.Series([d.get('gene_id') for d in kv], index=attributes.index, dtype=object)
+        gene_name = pd.Series([d.get('gene_name') for d in kv], index=attributes.index, dtype=object)
+    has_id = gene_id.notna().to_numpy()
+    
+    gtf = gtf[has_id]
+    start = gtf['start'].to_numpy(np.int32)
+    end = gtf['end'].to_numpy(np.int32)
+    strand = gtf['strand'].to_numpy(object)
+    
+    genes = pd.DataFrame({
+        'chromosome': gtf['chromosome'].cat.remove_unused_categories().values,
+        'start': start,
+        'end': end,
+        'strand': pd.Categorical(strand),
+        'gene_id': gene_id[has_id].to_numpy(),
+        'gene_name': gene_name[has_id].fillna(gene_id[has_id]).to_numpy(),
+        'tss': np.where(strand == '+', start, end)
+    })
+    return genes
 
 def parse_gtf_file(gtf_file):
     """
@@ -22,48 +133,26 @@ def parse_gtf_file(gtf_file):
     """
     print(f"📚 Loading gene annotations from {gtf_file}...")
     
-    genes = []
-    
-    with open(gtf_file, 'r') as f:
-        for line in f:
-            if line.startswith('#'):
-                continue
-            
-            parts = line.strip().split('\t')
-            if len(parts) < 9:
-                continue
-            
-            feature_type = parts[2]
-            if feature_type == 'transcript':
-                chromosome = parts[0]
-                start = int(parts[3])
-                end = int(parts[4])
-                strand = parts[6]
-                
-                # Parse attributes
-                attributes = parts[8]
-                gene_id = None
-                gene_name = None
-                
-                for attr in attributes.split(';'):
-                    attr = attr.strip()
-                    if attr.startswith('gene_id'):
-                        gene_id = attr.split('"')[1]
-                    elif attr.startswith('gene_name'):
-                        gene_name = attr.split('"')[1]
-                
-                if gene_id:
-                    genes.append({
-                        'chromosome': chromosome,
-                        'start': start,
-                        'end': end,
-                        'strand': strand,
-                        'gene_id': gene_id,
-                        'gene_name': gene_name or gene_id,
-                        'tss': start if strand == '+' else end
-                    })
-    
-    return pd.DataFrame(genes)
+    # Parsed annotations are cached next to the GTF as <gtf>.parquet;
+    # chromosome/strand stay categorical, so Parquet dictionary-encodes them
+    cache_file = gtf_file + '.parquet'
+    if os.path.exists(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(gtf_file):
+        try:
+            return pd.read_parquet(cache_file)
+        except Exception as e:
+            print(f"⚠️  Could not read cache {cache_file}: {e}")
+    
+    if pl is not None:
+        genes = _read_gtf_polars(gtf_file)
+    else:
+        genes = _read_gtf_pandas(gtf_file)
+    
+    try:
+        genes.to_parquet(cache_file, compression='zstd', index=False)
+    except (ImportError, OSError):
+        # No pyarrow/fastparquet or read-only annotation directory
+        pass
+    return genes
 
 def create_promoter_regions(genes_df, upstream=1000, downstream=1000):
     """
@@ -71,144 +160,187 @@ def create_promoter_regions(genes_df, upstream=1000, downstream=1000):
     """
     print(f"🎯 Finding promoter overlaps (±{upstream}/{downstream}bp from TSS)...")
     
-    promoters = []
+    # TSS is at start on the + strand and at end otherwise
+    strand_pos = genes_df['strand'].to_numpy() == '+'
+    tss = np.where(strand_pos, genes_df['start'].to_numpy(), genes_df['end'].to_numpy())
+    prom_start = np.maximum(1, np.where(strand_pos, tss - upstream, tss - downstream))
+    prom_end = np.where(strand_pos, tss + downstream, tss + upstream)
+    
+    return pd.DataFrame({
+        'chromosome': genes_df['chromosome'].values,
+        'start': prom_start,
+        'end': prom_end,
+        'gene_id': genes_df['gene_id'].values,
+        'gene_name': genes_df['gene_name'].values,
+        'strand': genes_df['strand'].values,
+        'tss': tss
+    })
+
+def _sorted_overlap_pairs(f_start, f_end, r_start, r_end):
+    """
+    Overlapping (feature, region) index pairs via binary search over region starts
+    """
+    order = np.argsort(r_start, kind='stable')
+    starts = r_start[order]
+    # A region can only overlap if it starts within [f_start - longest region, f_end]
+    max_len = int((r_end - r_start).max())
+    lo = np.searchsorted(starts, f_start - max_len, side='left')
+    hi = np.searchsorted(starts, f_end, side='right')
+    
+    counts = hi - lo
+    f_idx = np.repeat(np.arange(len(f_start), dtype=np.int64), counts)
+    # Candidate positions lo[i], lo[i] + 1, ..., hi[i] - 1 for every feature
+    offsets = np.arange(counts.sum(), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    r_idx = order[np.repeat(lo, counts) + offsets]
+    
+    keep = r_end[r_idx] >= f_start[f_idx]
+    return f_idx[keep], r_idx[keep]
+
+def _overlap_pairs(f_start, f_end, r_start, r_end):
+    """
+    Index pairs of overlapping closed intervals [start, end] on one chromosome
+    """
+    if NCLS is None:
+        return _sorted_overlap_pairs(f_start, f_end, r_start, r_end)
     
-    for _, gene in genes_df.iterrows():
-        if gene['strand'] == '+':
-            # TSS is at start position
-            tss = gene['start']
-            prom_start = max(1, tss - upstream)
-            prom_end = tss + downstream
-        else:
-            # TSS is at end position
-            tss = gene['end']
-            prom_start = max(1, tss - downstream)
-            prom_end = tss + upstream
-        
-        promoters.append({
-            'chromosome': gene['chromosome'],
-            'start': prom_start,
-            'end': prom_end,
-            'gene_id': gene['gene_id'],
-            'gene_name': gene['gene_name'],
-            'strand': gene['strand'],
-            'tss': tss
-        })
-    
-    return pd.DataFrame(promoters)
+    # NCLS works with half-open intervals: [start, end + 1)
+    index = NCLS(r_start, r_end + 1, np.arange(len(r_start), dtype=np.int64))
+    return index.all_overlaps_both(f_start, f_end + 1, np.arange(len(f_start), dtype=np.int64))
+
+def _chrom_overlap_pairs(task):
+    """
+    Overlapping row positions on one chromosome (runs in a worker process)
+    """
+    f_rows, r_rows, f_start, f_end, r_start, r_end = task
+    f_idx, r_idx = _overlap_pairs(f_start, f_end, r_start, r_end)
+    return f_rows[f_idx], r_rows[r_idx]
 
 def find_overlaps(features_df, regions_df, feature_name="feature"):
     """
     Find overlaps between features and genomic regions
     """
-    overlaps = []
-    
-    for _, feature in features_df.iterrows():
-        for _, region in regions_df.iterrows():
-            if (feature['chromosome'] == region['chromosome'] and
-                not (feature['end'] < region['start'] or feature['start'] > region['end'])):
-                
-                overlap = {
-                    'feature_chr': feature['chromosome'],
-                    'feature_start': feature['start'],
-                    'feature_end': feature['end'],
-                    'region_chr': region['chromosome'],
-                    'region_start': region['start'],
-                    'region_end': region['end'],
-                    'gene_id': region.get('gene_id', ''),
-                    'gene_name': region.get('gene_name', ''),
-                    'feature_type': feature_name
-                }
-                
-                if 'z_score' in feature:
-                    overlap['z_score'] = feature['z_score']
-                if 'score' in feature:
-                    overlap['score'] = feature['score']
-                
-                overlaps.append(overlap)
-    
-    return pd.DataFrame(overlaps)
+    columns = ['feature_chr', 'feature_start', 'feature_end', 'region_chr', 'region_start',
+               'region_end', 'gene_id', 'gene_name', 'feature_type']
+    
+    f_start = features_df['start'].to_numpy(np.int64)
+    f_end = features_df['end'].to_numpy(np.int64)
+    r_start = regions_df['start'].to_numpy(np.int64)
+    r_end = regions_df['end'].to_numpy(np.int64)
+    
+    # Row positions per chromosome; regions are indexed once per chromosome
+    # instead of comparing every (feature, region) pair
+    feature_rows = features_df.groupby('chromosome', sort=False).indices if len(features_df) else {}
+    region_rows = regions_df.groupby('chromosome', sort=False).indices if len(regions_df) else {}
+    
+    # Chromosomes are independent; only column arrays go to the workers
+    tasks = [(f_rows, region_rows[chrom], f_start[f_rows], f_end[f_rows],
+              r_start[region_rows[chrom]], r_end[region_rows[chrom]])
+             for chrom, f_rows in feature_rows.items() if chrom in region_rows]
+    
+    if len(tasks) > 1 and len(f_start) >= OVERLAP_POOL_MIN_FEATURES:
+        with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as pool:
+            results = list(pool.map(_chrom_overlap_pairs, tasks))
+    else:
+        results = [_chrom_overlap_pairs(task) for task in tasks]
+    
+    f_parts = [f_rows for f_rows, _ in results]
+    r_parts = [r_rows for _, r_rows in results]
+    
+    f_pos = np.concatenate(f_parts) if f_parts else np.empty(0, dtype=np.int64)
+    r_pos = np.concatenate(r_parts) if r_parts else np.empty(0, dtype=np.int64)
+    
+    if not len(f_pos):
+        return pd.DataFrame()
+    
+    # Same row order as a feature-major scan over regions
+    order = np.lexsort((r_pos, f_pos))
+    f_idx = f_pos[order]
+    r_idx = r_pos[order]
+    
+    # Every output column is one NumPy gather over the source column
+    overlaps = pd.DataFrame({
+        'feature_chr': features_df['chromosome'].to_numpy()[f_idx],
+        'feature_start': features_df['start'].to_numpy()[f_idx],
+        'feature_end': features_df['end'].to_numpy()[f_idx],
+        'region_chr': regions_df['chromosome'].to_numpy()[r_idx],
+        'region_start': regions_df['start'].to_numpy()[r_idx],
+        'region_end': regions_df['end'].to_numpy()[r_idx],
+        'gene_id': regions_df['gene_id'].to_numpy()[r_idx] if 'gene_id' in regions_df else '',
+        'gene_name': regions_df['gene_name'].to_numpy()[r_idx] if 'gene_name' in regions_df else '',
+        'feature_type': feature_name
+    }, columns=columns)
+    
+    if 'z_score' in features_df.columns:
+        overlaps['z_score'] = features_df['z_score'].to_numpy()[f_idx]
+    if 'score' in features_df.columns:
+        overlaps['score'] = features_df['score'].to_numpy()[f_idx]
+    
+    return overlaps
 
 def analyze_genomic_distribution(structures_df, genes_df, output_dir):
     """Analyze genomic distribution of structures"""
     print("📊 Analyzing genomic distribution...")
     
-    # Chromosome distribution
-    chrom_dist = structures_df['chromosome'].value_counts()
-    
-    # Create plots
-    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-    
-    # Chromosome distribution
-    top_chroms = chrom_dist.head(10)
-    axes[0, 0].bar(range(len(top_chroms)), top_chroms.values)
-    axes[0, 0].set_xticks(range(len(top_chroms)))
-    axes[0, 0].set_xticklabels(top_chroms.index, rotation=45)
-    axes[0, 0].set_title('Distribution across Chromosomes (Top 10)')
-    axes[0, 0].set_ylabel('Count')
-    
-    # Length distribution
-    if 'length' in structures_df.columns:
-        axes[0, 1].hist(structures_df['length'], bins=50, alpha=0.7)
-        axes[0, 1].set_title('Structure Length Distribution')
-        axes[0, 1].set_xlabel('Length (bp)')
-        axes[0, 1].set_ylabel('Count')
-    
-    # Score distribution
-    if 'score' in structures_df.columns:
-        axes[1, 0].hist(structures_df['score'], bins=50, alpha=0.7)
-        axes[1, 0].set_title('Score Distribution')
-        axes[1, 0].set_xlabel('Score')
-        axes[1, 0].set_ylabel('Count')
-    
-    # GC content distribution
-    if 'gc_content' in structures_df.columns:
-        axes[1, 1].hist(structures_df['gc_content'], bins=50, alpha=0.7)
-        axes[1, 1].set_title('GC Content Distribution')
-        axes[1, 1].set_xlabel('GC Content')
-        axes[1, 1].set_ylabel('Count')
-    
-    plt.tight_layout()
-    plt.savefig(output_dir / 'genomic_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    # Chromosome distribution: one bincount over category codes
+    chromosomes = structures_df['chromosome'].astype('category')
+    codes = chromosomes.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(chromosomes.cat.categories))
+    chrom_dist = pd.Series(counts, index=chromosomes.cat.categories)
+    chrom_dist = chrom_dist[chrom_dist > 0]
+    
+    # Numeric columns are extracted once; only existing ones get a panel
+    arrs = {c: structures_df[c].to_numpy() for c in HISTOGRAM_PANELS if c in structures_df.columns}
+    
+    n_panels = 1 + len(arrs)
+    n_rows = (n_panels + 1) // 2
+    fig, axes = plt.subplots(n_rows, 2, figsize=(15, 6 * n_rows), squeeze=False)
+    axes = axes.ravel()
+    
+    # Chromosome distribution: top 10 via argpartition, only those get sorted
+    dist = chrom_dist.to_numpy()
+    top = np.argpartition(dist, -10)[-10:] if len(dist) > 10 else np.arange(len(dist))
+    top = top[np.argsort(-dist[top], kind='stable')]
+    top_chroms = chrom_dist.iloc[top]
+    axes[0].bar(range(len(top_chroms)), top_chroms.values)
+    axes[0].set_xticks(range(len(top_chroms)))
+    axes[0].set_xticklabels(top_chroms.index, rotation=45)
+    axes[0].set_title('Distribution across Chromosomes (Top 10)')
+    axes[0].set_ylabel('Count')
+    
+    # Length, score and GC content distributions
+    for ax, (column, values) in zip(axes[1:], arrs.items()):
+        title, xlabel = HISTOGRAM_PANELS[column]
+        ax.hist(values, bins=50, alpha=0.7)
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel('Count')
+    for ax in axes[n_panels:]:
+        ax.set_visible(False)
+    
+    fig.tight_layout()
+    fig.savefig(output_dir / 'genomic_distribution.png', dpi=300, bbox_inches='tight')
+    plt.close(fig)
     
     return chrom_dist
 
+def _unique_genes(overlaps):
+    """
+    Distinct non-empty gene IDs of an overlap table, in order of first appearance
+    """
+    if 'gene_id' not in overlaps.columns:
+        return np.array([], dtype=object)
+    genes = pd.unique(overlaps['gene_id'].dropna().to_numpy(object))
+    return genes[genes != '']
+
 def create_gene_lists(overlaps_dict):
     """
     Create gene lists for functional enrichment analysis
     """
-    gene_lists = {}
-    
-    # Z-DNA genes
-    zdna_genes = set()
-    for _, overlap in overlaps_dict['zdna_gene_overlaps'].iterrows():
-        if overlap['gene_id']:
-            zdna_genes.add(overlap['gene_id'])
-    
-    # Z-DNA promoter genes
-    zdna_promoter_genes = set()
-    for _, overlap in overlaps_dict['zdna_promoter_overlaps'].iterrows():
-        if overlap['gene_id']:
-            zdna_promoter_genes.add(overlap['gene_id'])
-    
-    # G4 genes
-    g4_genes = set()
-    for _, overlap in overlaps_dict['g4_gene_overlaps'].iterrows():
-        if overlap['gene_id']:
-            g4_genes.add(overlap['gene_id'])
-    
-    # G4 promoter genes
-    g4_promoter_genes = set()
-    for _, overlap in overlaps_dict['g4_promoter_overlaps'].iterrows():
-        if overlap['gene_id']:
-            g4_promoter_genes.add(overlap['gene_id'])
-    
     gene_lists = {
-        'zdna_genes': list(zdna_genes),
-        'zdna_promoter_genes': list(zdna_promoter_genes),
-        'g4_genes': list(g4_genes),
-        'g4_promoter_genes': list(g4_promoter_genes)
+        'zdna_genes': _unique_genes(overlaps_dict['zdna_gene_overlaps']),
+        'zdna_promoter_genes': _unique_genes(overlaps_dict['zdna_promoter_overlaps']),
+        'g4_genes': _unique_genes(overlaps_dict['g4_gene_overlaps']),
+        'g4_promoter_genes': _unique_genes(overlaps_dict['g4_promoter_overlaps'])
     }
     
     print(f"\n=== Gene Lists ===")
@@ -219,15 +351,21 @@ def create_gene_lists(overlaps_dict):
     
     return gene_lists
 
+def _write_lines(path, items):
+    """
+    Write one item per line with a single write call
+    """
+    with open(path, 'w') as f:
+        if len(items):
+            f.write('\n'.join(map(str, items)) + '\n')
+
 def save_gene_lists(gene_lists, output_dir):
     """
     Save gene lists for STRING DB analysis
     """
     for list_name, genes in gene_lists.items():
         output_file = f"{output_dir}/{list_name}.txt"
-        with open(output_file, 'w') as f:
-            for gene in genes:
-                f.write(f"{gene}\n")
+        _write_lines(output_file, genes)
         print(f"Saved {len(genes)} genes to {output_file}")
 
 def plot_genomic_analysis(overlaps_dict, gene_lists, output_dir):
@@ -278,14 +416,18 @@ def plot_genomic_analysis(overlaps_dict, gene_lists, output_dir):
     
     # Overlap analysis
     plt.subplot(2, 3, 4)
-    zdna_promoter_set = set(gene_lists['zdna_promoter_genes'])
-    g4_promoter_set = set(gene_lists['g4_promoter_genes'])
-    
-    overlap_genes = zdna_promoter_set & g4_promoter_set
-    zdna_only = zdna_promoter_set - g4_promoter_set
-    g4_only = g4_promoter_set - zdna_promoter_set
-    
-    venn_data = [len(zdna_only), len(overlap_genes), len(g4_only)]
+    # Gene IDs share one integer coding; set operations run on sorted int arrays
+    zdna_promoter_genes = np.asarray(gene_lists['zdna_promoter_genes'], dtype=object)
+    g4_promoter_genes = np.asarray(gene_lists['g4_promoter_genes'], dtype=object)
+    codes, _ = pd.factorize(np.concatenate([zdna_promoter_genes, g4_promoter_genes]))
+    zdna_codes = codes[:len(zdna_promoter_genes)]
+    g4_codes = codes[len(zdna_promoter_genes):]
+    
+    overlap_genes = np.intersect1d(zdna_codes, g4_codes, assume_unique=True)
+    zdna_only = np.setdiff1d(zdna_codes, g4_codes, assume_unique=True)
+    g4_only = np.setdiff1d(g4_codes, zdna_codes, assume_unique=True)
+    
+    venn_data = [zdna_only.size, overlap_genes.size, g4_only.size]
     venn_labels = ['Z-DNA only', 'Both', 'G4 only']
     plt.bar(venn_labels, venn_data, color=['skyblue', 'purple', 'orange'])
     plt.ylabel('Number of Genes')
@@ -316,6 +458,33 @@ def plot_genomic_analysis(overlaps_dict, gene_lists, output_dir):
     
     print(f"Genomic analysis plots saved to: {output_dir}/genomic_analysis.png")
 
+def combine_structures(structures):
+    """
+    Concatenate (DataFrame, type label) pairs into one table with a 'type' column
+    """
+    combined_df = None
+    if pa is not None:
+        # Arrow concatenation keeps the dictionary-encoded chromosomes and
+        # materializes the pandas frame once
+        tables = [pa.Table.from_pandas(df, preserve_index=False).append_column('type', pa.repeat(label, len(df)))
+                  for df, label in structures]
+        try:
+            combined = pa.concat_tables(tables, promote_options='default')
+            combined_df = combined.to_pandas(self_destruct=True)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            # A shared column with different types (e.g. an all-empty sequence
+            # column read as float next to strings, or int vs float scores):
+            # Arrow will not unify them, pandas will
+            pass
+    if combined_df is None:
+        combined_df = pd.concat([df.assign(type=label) for df, label in structures], ignore_index=True)
+    
+    # Differing category sets combine to plain strings (pandas) or keep the
+    # order of first appearance (Arrow); unify them to sorted categories
+    chromosomes = combined_df['chromosome'].astype('category')
+    combined_df['chromosome'] = chromosomes.cat.reorder_categories(chromosomes.cat.categories.sort_values())
+    return combined_df
+
 def main():
     parser = argparse.ArgumentParser(description='Genomic analysis of Z-DNA and G-quadruplex structures')
     parser.add_argument('--zdna-file', help='Z-DNA results CSV file', default=None)
@@ -352,23 +521,21 @@ def main():
     # Load Z-DNA results if available
     if args.zdna_file and Path(args.zdna_file).exists():
         print(f"📖 Loading Z-DNA results from {args.zdna_file}...")
-        zdna_df = pd.read_csv(args.zdna_file)
-        zdna_df['type'] = 'Z-DNA'
-        all_structures.append(zdna_df)
+        zdna_df = pd.read_csv(args.zdna_file, dtype=STRUCTURE_DTYPES)
+        all_structures.append((zdna_df, 'Z-DNA'))
         print(f"✅ Loaded {len(zdna_df)} Z-DNA structures")
     else:
         print("⚠️  No Z-DNA file provided or file not found, skipping Z-DNA analysis")
     
     # Load G4 results
     print(f"📖 Loading G-quadruplex results from {args.g4_file}...")
-    g4_df = pd.read_csv(args.g4_file)
-    g4_df['type'] = 'G4'
-    all_structures.append(g4_df)
+    g4_df = pd.read_csv(args.g4_file, dtype=STRUCTURE_DTYPES)
+    all_structures.append((g4_df, 'G4'))
     print(f"✅ Loaded {len(g4_df)} G-quadruplex structures")
     
     # Combine all structures
     if all_structures:
-        combined_df = pd.concat(all_structures, ignore_index=True)
+        combined_df = combine_structures(all_structures)
         print(f"📊 Total structures: {len(combined_df)}")
         
         # Analyze genomic distribution
@@ -389,9 +556,7 @@ def main():
             unique_genes = promoter_overlaps['gene_name'].unique()
             
             # Save gene list for STRING
-            with open(output_dir / 'genes_for_string.txt', 'w') as f:
-                for gene in unique_genes:
-                    f.write(f"{gene}\n")
+            _write_lines(output_dir / 'genes_for_string.txt', unique_genes)
             
             print(f"💾 Saved {len(unique_genes)} unique genes to genes_for_string.txt")
             print("🔗 Upload this file to STRING-DB for functional enrichment analysis")
@@ -405,10 +570,12 @@ def main():
             }
             
             if args.zdna_file and Path(args.zdna_file).exists():
-                zdna_promoter = promoter_overlaps[promoter_overlaps['feature_type'] == 'Z-DNA']
-                g4_promoter = promoter_overlaps[promoter_overlaps['feature_type'] == 'G4']
-                summary['Z-DNA in promoters'] = len(zdna_promoter)
-                summary['G4 in promoters'] = len(g4_promoter)
+                # One bincount over feature_type codes; no sub-frames are built
+                feature_types = promoter_overlaps['feature_type'].astype('category')
+                categories = feature_types.cat.categories
+                type_counts = np.bincount(feature_types.cat.codes.to_numpy(), minlength=len(categories))
+                summary['Z-DNA in promoters'] = int(type_counts[categories.get_loc('Z-DNA')]) if 'Z-DNA' in categories else 0
+                summary['G4 in promoters'] = int(type_counts[categories.get_loc('G4')]) if 'G4' in categories else 0
             else:
                 summary['G4 in promoters'] = len(promoter_overlaps)
             
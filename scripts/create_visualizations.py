@@ -5,10 +5,17 @@ Comprehensive Visualization Script for G-quadruplex and STRING Analysis
 
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
+from pandas.api.types import union_categoricals
 import json
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import os
 import sys
 
 # Set style for beautiful plots
@@ -20,6 +27,126 @@ plt.rcParams['axes.titlesize'] = 14
 plt.rcParams['axes.labelsize'] = 12
 plt.rcParams['xtick.labelsize'] = 10
 plt.rcParams['ytick.labelsize'] = 10
+# Layout is solved once per figure instead of tight bbox passes at save time
+plt.rcParams['figure.constrained_layout.use'] = True
+
+# PNG output: 150 dpi, fast zlib level
+SAVEFIG_KWARGS = {'dpi': 150, 'pil_kwargs': {'compress_level': 1}}
+
+# Columns the plots use, with compact dtypes: low-cardinality strings become
+# categories, counts int32, scores float32. FDR is read as float64 because
+# STRING can report values below the float32 range; it is narrowed after
+# loading when the smallest value fits.
+G4_DTYPES = {'chromosome': 'category', 'length': np.int32, 'g_run_length': np.int32,
+             'gc_content': np.float32, 'score': np.float32}
+PROMOTER_DTYPES = {'feature_chr': 'category', 'feature_type': 'category',
+                   'gene_name': 'category', 'score': np.float32}
+STRING_DTYPES = {'category': 'category', 'description': str,
+                 'number_of_genes': np.int32, 'fdr': np.float64}
+NETWORK_DTYPES = {'preferredName_A': 'category', 'preferredName_B': 'category',
+                  'score': np.float32}
+
+# Scatter plots draw at most this many points (fixed-seed random sample)
+SCATTER_MAX_POINTS = 5000
+
+# Rows parsed per chunk: parse buffers stay bounded for multi-GB tables
+CSV_CHUNKSIZE = 1_000_000
+
+def _read_table(path, dtypes):
+    """Read only the columns listed in dtypes (missing ones are skipped),
+    memoized as <csv>.parquet next to the source"""
+    path = Path(path)
+    cache = path.with_name(path.name + '.parquet')
+    if cache.exists() and cache.stat().st_mtime >= path.stat().st_mtime:
+        try:
+            df = pd.read_parquet(cache)
+            # A cache written for a different column selection is stale
+            header = pd.read_csv(path, nrows=0).columns
+            if list(df.columns) == [c for c in header if c in dtypes]:
+                return df
+        except Exception as e:
+            print(f"⚠️  Could not read cache {cache}: {e}")
+    
+    df = _parse_table(path, dtypes)
+    try:
+        # Categories are stored as Parquet dictionaries and come back as-is
+        df.to_parquet(cache, compression='zstd', index=False)
+    except (ImportError, OSError):
+        # No pyarrow/fastparquet or read-only results directory
+        pass
+    return df
+
+def _parse_table(path, dtypes):
+    """Parse the CSV in chunks, keeping category dtypes across chunks"""
+    usecols = lambda column: column in dtypes
+    with pd.read_csv(path, usecols=usecols, dtype=dtypes, engine='c',
+                     chunksize=CSV_CHUNKSIZE) as reader:
+        chunks = list(reader)
+    if len(chunks) <= 1:
+        return chunks[0] if chunks else pd.read_csv(path, usecols=usecols, dtype=dtypes)
+    
+    # Chunks have their own category sets; concatenating them directly would
+    # fall back to object columns, so categoricals are unioned separately
+    columns = chunks[0].columns
+    categorical = [c for c in columns if isinstance(chunks[0][c].dtype, pd.CategoricalDtype)]
+    df = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True)
+    for column in categorical:
+        df[column] = union_categoricals([chunk[column] for chunk in chunks])
+    return df[columns]
+
+def _top_counts(series, k=None):
+    """Counts of a categorical column, largest first (top k only if given)"""
+    codes = series.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+    present = np.flatnonzero(counts)
+    if k is not None and len(present) > k:
+        # O(n) selection of the k largest; only those get sorted
+        present = present[np.argpartition(-counts[present], k)[:k]]
+    top = present[np.argsort(-counts[present], kind='stable')]
+    return pd.Series(counts[top], index=series.cat.categories[top])
+
+def _smallest_rows(values, k):
+    """Positions of the k smallest values, in ascending order of value"""
+    rows = np.argpartition(values, k)[:k] if len(values) > k else np.arange(len(values))
+    return rows[np.argsort(values[rows], kind='stable')]
+
+def _column_stats(df, columns):
+    """Mean, median, min and max of each column, computed once per column"""
+    stats = {}
+    for column in columns:
+        arr = df[column].to_numpy()
+        stats[column] = {'mean': np.nanmean(arr, dtype=np.float64), 'median': np.nanmedian(arr),
+                         'min': np.nanmin(arr), 'max': np.nanmax(arr)}
+    return stats
+
+def _n_categories(series):
+    """Distinct values of a parsed categorical column (categories are built
+    from the values actually read, so none are unused)"""
+    return len(series.cat.categories)
+
+@lru_cache(maxsize=None)
+def _palette(name, n):
+    """Seaborn palette of n colors, built once per (name, n)"""
+    return tuple(sns.color_palette(name, n))
+
+def _truncate(values, n):
+    """Labels cut to n characters, with '...' appended where something was cut"""
+    labels = pd.Series(values, dtype=str)
+    return np.where(labels.str.len() > n, labels.str.slice(0, n) + '...', labels)
+
+def _scatter_sample(n):
+    """Row indices to draw in a scatter of n points, in original order"""
+    if n <= SCATTER_MAX_POINTS:
+        return slice(None)
+    return np.sort(np.random.default_rng(0).choice(n, size=SCATTER_MAX_POINTS, replace=False))
+
+def _hist(ax, values, bins, **kwargs):
+    """Histogram binned by np.histogram and drawn as one bar container"""
+    arr = np.asarray(values)
+    if arr.dtype.kind != 'f':
+        arr = arr.astype(np.float32)
+    counts, edges = np.histogram(arr[~np.isnan(arr)], bins=bins)
+    return ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', **kwargs)
 
 def load_data(results_dir):
     """Load all analysis results"""
@@ -30,25 +157,32 @@ def load_data(results_dir):
     # Load G-quadruplex results
     g4_file = results_dir / 'quadruplex_results.csv'
     if g4_file.exists():
-        data['g4'] = pd.read_csv(g4_file)
+        data['g4'] = _read_table(g4_file, G4_DTYPES)
+        # Shared by the overview and the dashboard
+        data['g4_stats'] = _column_stats(data['g4'], ('length', 'score', 'gc_content'))
         print(f"✅ Loaded {len(data['g4'])} G-quadruplex structures")
     
     # Load promoter overlaps
     promoter_file = results_dir / 'promoter_overlaps.csv'
     if promoter_file.exists():
-        data['promoters'] = pd.read_csv(promoter_file)
+        data['promoters'] = _read_table(promoter_file, PROMOTER_DTYPES)
         print(f"✅ Loaded {len(data['promoters'])} promoter overlaps")
     
     # Load STRING enrichment
     string_file = results_dir / 'string_enrichment_significant.csv'
     if string_file.exists():
-        data['string'] = pd.read_csv(string_file)
+        data['string'] = _read_table(string_file, STRING_DTYPES)
+        fdr = data['string']['fdr'].to_numpy()
+        if fdr[fdr > 0].min(initial=1.0) >= np.finfo(np.float32).tiny:
+            data['string']['fdr'] = fdr = fdr.astype(np.float32)
+        # -log10(FDR) is plotted by several panels; transform it once
+        data['string_nlog_fdr'] = -np.log10(fdr)
         print(f"✅ Loaded {len(data['string'])} STRING enrichment terms")
     
     # Load STRING network
     network_file = results_dir / 'string_network.csv'
     if network_file.exists():
-        data['network'] = pd.read_csv(network_file)
+        data['network'] = _read_table(network_file, NETWORK_DTYPES)
         print(f"✅ Loaded {len(data['network'])} protein interactions")
     
     return data
@@ -56,49 +190,54 @@ def load_data(results_dir):
 def create_g4_overview(data, output_dir):
     """Create G-quadruplex overview plots"""
     g4_df = data['g4']
+    stats = data['g4_stats']
     
-    fig, axes = plt.subplots(2, 3, figsize=(18, 12))
+    fig = Figure(figsize=(18, 12))
+    axes = fig.subplots(2, 3)
     fig.suptitle('G-Quadruplex Analysis Overview', fontsize=16, fontweight='bold')
     
     # 1. Chromosome distribution
-    chrom_counts = g4_df['chromosome'].value_counts().head(10)
-    axes[0, 0].bar(range(len(chrom_counts)), chrom_counts.values, 
-                   color=sns.color_palette("viridis", len(chrom_counts)))
+    chrom_counts = _top_counts(g4_df['chromosome'], 10)
+    bars = axes[0, 0].bar(range(len(chrom_counts)), chrom_counts.values, 
+                          color=_palette("viridis", len(chrom_counts)))
     axes[0, 0].set_xticks(range(len(chrom_counts)))
     axes[0, 0].set_xticklabels(chrom_counts.index, rotation=45)
     axes[0, 0].set_title('G4 Distribution by Chromosome')
     axes[0, 0].set_ylabel('Number of G4 structures')
     
     # Add value labels
-    for i, v in enumerate(chrom_counts.values):
-        axes[0, 0].text(i, v + 20, str(v), ha='center', va='bottom')
+    axes[0, 0].bar_label(bars, padding=3)
     
     # 2. Length distribution
-    axes[0, 1].hist(g4_df['length'], bins=30, alpha=0.7, color='skyblue', edgecolor='black')
-    axes[0, 1].axvline(g4_df['length'].mean(), color='red', linestyle='--', 
-                       label=f'Mean: {g4_df["length"].mean():.1f} bp')
+    _hist(axes[0, 1], g4_df['length'].to_numpy(), 30, alpha=0.7, color='skyblue', edgecolor='black')
+    axes[0, 1].axvline(stats['length']['mean'], color='red', linestyle='--', 
+                       label=f'Mean: {stats["length"]["mean"]:.1f} bp')
     axes[0, 1].set_title('G4 Length Distribution')
     axes[0, 1].set_xlabel('Length (bp)')
     axes[0, 1].set_ylabel('Frequency')
     axes[0, 1].legend()
     
     # 3. Score distribution
-    axes[0, 2].hist(g4_df['score'], bins=30, alpha=0.7, color='lightgreen', edgecolor='black')
-    axes[0, 2].axvline(g4_df['score'].mean(), color='red', linestyle='--',
-                       label=f'Mean: {g4_df["score"].mean():.1f}')
+    _hist(axes[0, 2], g4_df['score'].to_numpy(), 30, alpha=0.7, color='lightgreen', edgecolor='black')
+    axes[0, 2].axvline(stats['score']['mean'], color='red', linestyle='--',
+                       label=f'Mean: {stats["score"]["mean"]:.1f}')
     axes[0, 2].set_title('G4 Score Distribution')
     axes[0, 2].set_xlabel('G4 Score')
     axes[0, 2].set_ylabel('Frequency')
     axes[0, 2].legend()
     
     # 4. GC content vs Score
-    axes[1, 0].scatter(g4_df['gc_content'], g4_df['score'], alpha=0.6, color='purple')
+    gc = g4_df['gc_content'].to_numpy()
+    sc = g4_df['score'].to_numpy()
+    shown = _scatter_sample(len(gc))
+    axes[1, 0].scatter(gc[shown], sc[shown], alpha=0.6, color='purple')
     axes[1, 0].set_title('GC Content vs G4 Score')
     axes[1, 0].set_xlabel('GC Content')
     axes[1, 0].set_ylabel('G4 Score')
     
-    # Add correlation
-    corr = g4_df['gc_content'].corr(g4_df['score'])
+    # Add correlation over all rows (pairwise-complete, as pandas .corr did)
+    finite = np.isfinite(gc) & np.isfinite(sc)
+    corr = np.corrcoef(gc[finite], sc[finite])[0, 1]
     axes[1, 0].text(0.05, 0.95, f'Correlation: {corr:.3f}', 
                     transform=axes[1, 0].transAxes, bbox=dict(boxstyle="round", facecolor='white'))
     
@@ -117,28 +256,26 @@ def create_g4_overview(data, output_dir):
     Total G4 structures: {len(g4_df):,}
     
     Length:
-    • Mean: {g4_df['length'].mean():.1f} bp
-    • Median: {g4_df['length'].median():.1f} bp
-    • Range: {g4_df['length'].min()}-{g4_df['length'].max()} bp
+    • Mean: {stats['length']['mean']:.1f} bp
+    • Median: {stats['length']['median']:.1f} bp
+    • Range: {stats['length']['min']}-{stats['length']['max']} bp
     
     Score:
-    • Mean: {g4_df['score'].mean():.1f}
-    • Median: {g4_df['score'].median():.1f}
-    • Max: {g4_df['score'].max():.1f}
+    • Mean: {stats['score']['mean']:.1f}
+    • Median: {stats['score']['median']:.1f}
+    • Max: {stats['score']['max']:.1f}
     
     GC Content:
-    • Mean: {g4_df['gc_content'].mean():.3f}
-    • Range: {g4_df['gc_content'].min():.3f}-{g4_df['gc_content'].max():.3f}
+    • Mean: {stats['gc_content']['mean']:.3f}
+    • Range: {stats['gc_content']['min']:.3f}-{stats['gc_content']['max']:.3f}
     
-    Chromosomes: {g4_df['chromosome'].nunique()}
+    Chromosomes: {_n_categories(g4_df['chromosome'])}
     """
     axes[1, 2].text(0.1, 0.9, stats_text, transform=axes[1, 2].transAxes, 
                      fontsize=11, verticalalignment='top',
                      bbox=dict(boxstyle="round,pad=0.5", facecolor='lightblue', alpha=0.8))
     
-    plt.tight_layout()
-    plt.savefig(output_dir / 'g4_comprehensive_analysis.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    fig.savefig(output_dir / 'g4_comprehensive_analysis.png', **SAVEFIG_KWARGS)
     
     print("✅ G4 overview plots created")
 
@@ -150,18 +287,20 @@ def create_promoter_analysis(data, output_dir):
     
     promoters_df = data['promoters']
     g4_df = data['g4']
+    score_mean = promoters_df['score'].mean()
     
-    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    fig = Figure(figsize=(15, 12))
+    axes = fig.subplots(2, 2)
     fig.suptitle('G-Quadruplex Promoter Analysis', fontsize=16, fontweight='bold')
     
     # 1. G4 score distribution in promoters
-    axes[0, 0].hist(promoters_df['score'], bins=30, alpha=0.7, 
-                    color='lightcoral', edgecolor='black')
+    _hist(axes[0, 0], promoters_df['score'].to_numpy(), 30, alpha=0.7,
+          color='lightcoral', edgecolor='black')
     axes[0, 0].set_title('G4 Score Distribution in Promoters')
     axes[0, 0].set_xlabel('G4 Score')
     axes[0, 0].set_ylabel('Number of G4 structures')
-    axes[0, 0].axvline(promoters_df['score'].mean(), color='red', linestyle='--',
-                       label=f'Mean: {promoters_df["score"].mean():.1f}')
+    axes[0, 0].axvline(score_mean, color='red', linestyle='--',
+                       label=f'Mean: {score_mean:.1f}')
     axes[0, 0].legend()
     
     # 2. Promoter vs non-promoter G4s
@@ -178,9 +317,9 @@ def create_promoter_analysis(data, output_dir):
     axes[0, 1].set_title('G4 Distribution: Promoters vs Genome')
     
     # 3. Chromosome distribution of promoter G4s
-    prom_chrom = promoters_df['feature_chr'].value_counts().head(8)
+    prom_chrom = _top_counts(promoters_df['feature_chr'], 8)
     axes[1, 0].bar(range(len(prom_chrom)), prom_chrom.values, 
-                   color=sns.color_palette("Set2", len(prom_chrom)))
+                   color=_palette("Set2", len(prom_chrom)))
     axes[1, 0].set_xticks(range(len(prom_chrom)))
     axes[1, 0].set_xticklabels(prom_chrom.index, rotation=45)
     axes[1, 0].set_title('Promoter G4s by Chromosome')
@@ -188,9 +327,9 @@ def create_promoter_analysis(data, output_dir):
     
     # 4. Feature type distribution
     if 'feature_type' in promoters_df.columns:
-        type_counts = promoters_df['feature_type'].value_counts()
-        axes[1, 1].bar(range(len(type_counts)), type_counts.values, 
-                       color=sns.color_palette("Set1", len(type_counts)))
+        type_counts = _top_counts(promoters_df['feature_type'])
+        bars = axes[1, 1].bar(range(len(type_counts)), type_counts.values, 
+                              color=_palette("Set1", len(type_counts)))
         axes[1, 1].set_xticks(range(len(type_counts)))
         axes[1, 1].set_xticklabels(type_counts.index, rotation=45)
         axes[1, 1].set_title('G4s by Feature Type')
@@ -198,17 +337,14 @@ def create_promoter_analysis(data, output_dir):
         axes[1, 1].set_ylabel('Number of G4 structures')
         
         # Add percentages
-        for i, count in enumerate(type_counts.values):
-            pct = count / type_counts.sum() * 100
-            axes[1, 1].text(i, count + 10, f'{pct:.1f}%', ha='center', va='bottom')
+        pct = type_counts.to_numpy() / type_counts.sum() * 100
+        axes[1, 1].bar_label(bars, labels=[f'{p:.1f}%' for p in pct], padding=3)
     else:
         axes[1, 1].axis('off')
         axes[1, 1].text(0.5, 0.5, 'Feature type data not available', 
                          ha='center', va='center', transform=axes[1, 1].transAxes)
     
-    plt.tight_layout()
-    plt.savefig(output_dir / 'promoter_analysis.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    fig.savefig(output_dir / 'promoter_analysis.png', **SAVEFIG_KWARGS)
     
     print("✅ Promoter analysis plots created")
 
@@ -219,31 +355,36 @@ def create_string_enrichment_plots(data, output_dir):
         return
     
     string_df = data['string']
+    fdr = string_df['fdr'].to_numpy()
+    nlog_fdr = data['string_nlog_fdr']
+    descriptions = string_df['description'].to_numpy()
     
-    fig, axes = plt.subplots(2, 2, figsize=(16, 12))
+    fig = Figure(figsize=(16, 12))
+    axes = fig.subplots(2, 2)
     fig.suptitle('STRING Database Functional Enrichment Analysis', fontsize=16, fontweight='bold')
     
     # 1. Top enriched categories
-    top_terms = string_df.nsmallest(15, 'fdr')
+    top_terms = _smallest_rows(fdr, 15)
     
     y_pos = np.arange(len(top_terms))
-    bars = axes[0, 0].barh(y_pos, -np.log10(top_terms['fdr']), 
-                           color=sns.color_palette("viridis", len(top_terms)))
+    bars = axes[0, 0].barh(y_pos, nlog_fdr[top_terms], 
+                           color=_palette("viridis", len(top_terms)))
     axes[0, 0].set_yticks(y_pos)
-    axes[0, 0].set_yticklabels([desc[:50] + '...' if len(desc) > 50 else desc 
-                                for desc in top_terms['description']], fontsize=9)
+    axes[0, 0].set_yticklabels(_truncate(descriptions[top_terms], 50), fontsize=9)
     axes[0, 0].set_xlabel('-log10(FDR)')
     axes[0, 0].set_title('Top 15 Enriched Terms')
     axes[0, 0].invert_yaxis()
     
     # 2. Categories distribution
-    category_counts = string_df['category'].value_counts()
+    category_counts = _top_counts(string_df['category'])
     axes[0, 1].pie(category_counts.values, labels=category_counts.index, autopct='%1.1f%%',
-                   colors=sns.color_palette("Set3", len(category_counts)))
+                   colors=_palette("Set3", len(category_counts)))
     axes[0, 1].set_title('Enrichment by Category Type')
     
     # 3. Gene count vs significance
-    axes[1, 0].scatter(string_df['number_of_genes'], -np.log10(string_df['fdr']), 
+    n_genes = string_df['number_of_genes'].to_numpy()
+    shown = _scatter_sample(len(n_genes))
+    axes[1, 0].scatter(n_genes[shown], nlog_fdr[shown], 
                        alpha=0.6, s=50, color='purple')
     axes[1, 0].set_xlabel('Number of Genes in Term')
     axes[1, 0].set_ylabel('-log10(FDR)')
@@ -255,13 +396,13 @@ def create_string_enrichment_plots(data, output_dir):
     axes[1, 0].legend()
     
     # 4. Top biological processes
-    bio_processes = string_df[string_df['category'] == 'Process'].nsmallest(10, 'fdr')
-    if not bio_processes.empty:
+    processes = np.flatnonzero(string_df['category'].to_numpy() == 'Process')
+    bio_processes = processes[_smallest_rows(fdr[processes], 10)]
+    if len(bio_processes):
         y_pos = np.arange(len(bio_processes))
-        axes[1, 1].barh(y_pos, -np.log10(bio_processes['fdr']), color='lightgreen')
+        axes[1, 1].barh(y_pos, nlog_fdr[bio_processes], color='lightgreen')
         axes[1, 1].set_yticks(y_pos)
-        axes[1, 1].set_yticklabels([desc[:40] + '...' if len(desc) > 40 else desc 
-                                    for desc in bio_processes['description']], fontsize=8)
+        axes[1, 1].set_yticklabels(_truncate(descriptions[bio_processes], 40), fontsize=8)
         axes[1, 1].set_xlabel('-log10(FDR)')
         axes[1, 1].set_title('Top Biological Processes')
         axes[1, 1].invert_yaxis()
@@ -269,16 +410,14 @@ def create_string_enrichment_plots(data, output_dir):
         axes[1, 1].text(0.5, 0.5, 'No biological processes found', 
                          ha='center', va='center', transform=axes[1, 1].transAxes)
     
-    plt.tight_layout()
-    plt.savefig(output_dir / 'string_enrichment_analysis.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    fig.savefig(output_dir / 'string_enrichment_analysis.png', **SAVEFIG_KWARGS)
     
     print("✅ STRING enrichment plots created")
 
 def create_summary_dashboard(data, output_dir):
     """Create a comprehensive summary dashboard"""
-    fig = plt.figure(figsize=(20, 12))
-    gs = fig.add_gridspec(3, 4, hspace=0.3, wspace=0.3)
+    fig = Figure(figsize=(20, 12))
+    gs = fig.add_gridspec(3, 4)
     
     fig.suptitle('G-Quadruplex & Functional Enrichment Analysis Dashboard', 
                  fontsize=18, fontweight='bold')
@@ -290,26 +429,43 @@ def create_summary_dashboard(data, output_dir):
     g4_df = data.get('g4', pd.DataFrame())
     promoters_df = data.get('promoters', pd.DataFrame())
     string_df = data.get('string', pd.DataFrame())
-    
-    stats_text = f"""
-    📊 ANALYSIS SUMMARY
-    
-    🧬 G-Quadruplex Structures:
-    • Total identified: {len(g4_df):,}
-    • Mean length: {g4_df['length'].mean():.1f} bp
-    • Mean score: {g4_df['score'].mean():.1f}
-    • Chromosomes covered: {g4_df['chromosome'].nunique() if not g4_df.empty else 0}
-    
-    🎯 Promoter Analysis:
-    • G4s in promoters: {len(promoters_df):,}
-    • Unique genes affected: {promoters_df['gene_name'].nunique() if not promoters_df.empty else 0}
-    • Promoter enrichment: {len(promoters_df)/len(g4_df)*100:.1f}% of all G4s
-    
-    🔬 Functional Enrichment:
-    • Significant GO terms: {len(string_df):,}
-    • Most significant: {string_df.iloc[0]['description'][:50] + '...' if not string_df.empty else 'N/A'}
-    • FDR range: {string_df['fdr'].min():.2e} - {string_df['fdr'].max():.2e}
-    """
+    g4_stats = data.get('g4_stats') or _column_stats(g4_df, ('length', 'score'))
+    
+    # Every figure in the summary is computed once, then formatted
+    n_g4 = len(g4_df)
+    n_promoters = len(promoters_df)
+    n_chromosomes = _n_categories(g4_df['chromosome']) if n_g4 else 0
+    n_genes = _n_categories(promoters_df['gene_name']) if n_promoters else 0
+    if len(string_df):
+        top_term = string_df['description'].iat[0][:50] + '...'
+        fdr = string_df['fdr'].to_numpy()
+        fdr_range = f"{fdr.min():.2e} - {fdr.max():.2e}"
+    else:
+        top_term = 'N/A'
+        fdr_range = 'N/A'
+    enrichment = f"{n_promoters / n_g4 * 100:.1f}%" if n_g4 else 'N/A'
+    
+    lines = [
+        "📊 ANALYSIS SUMMARY",
+        "",
+        "🧬 G-Quadruplex Structures:",
+        f"• Total identified: {n_g4:,}",
+        f"• Mean length: {g4_stats['length']['mean']:.1f} bp",
+        f"• Mean score: {g4_stats['score']['mean']:.1f}",
+        f"• Chromosomes covered: {n_chromosomes}",
+        "",
+        "🎯 Promoter Analysis:",
+        f"• G4s in promoters: {n_promoters:,}",
+        f"• Unique genes affected: {n_genes}",
+        f"• Promoter enrichment: {enrichment} of all G4s",
+        "",
+        "🔬 Functional Enrichment:",
+        f"• Significant GO terms: {len(string_df):,}",
+        f"• Most significant: {top_term}",
+        f"• FDR range: {fdr_range}",
+        "",
+    ]
+    stats_text = "\n" + "\n".join("    " + line for line in lines)
     
     ax_stats.text(0.05, 0.95, stats_text, transform=ax_stats.transAxes, fontsize=12,
                   verticalalignment='top', bbox=dict(boxstyle="round,pad=0.5", 
@@ -318,29 +474,28 @@ def create_summary_dashboard(data, output_dir):
     # G4 chromosome distribution (compact)
     ax_chrom = fig.add_subplot(gs[0, 2:])
     if not g4_df.empty:
-        chrom_counts = g4_df['chromosome'].value_counts().head(8)
+        chrom_counts = _top_counts(g4_df['chromosome'], 8)
         bars = ax_chrom.bar(range(len(chrom_counts)), chrom_counts.values, 
-                           color=sns.color_palette("viridis", len(chrom_counts)))
+                           color=_palette("viridis", len(chrom_counts)))
         ax_chrom.set_xticks(range(len(chrom_counts)))
         ax_chrom.set_xticklabels(chrom_counts.index, rotation=45)
         ax_chrom.set_title('G4 Distribution by Chromosome')
         ax_chrom.set_ylabel('Count')
         
         # Add value labels
-        for i, v in enumerate(chrom_counts.values):
-            ax_chrom.text(i, v + 10, str(v), ha='center', va='bottom', fontsize=9)
+        ax_chrom.bar_label(bars, padding=3, fontsize=9)
     
     # Length and score distributions
     ax_length = fig.add_subplot(gs[1, 0])
     ax_score = fig.add_subplot(gs[1, 1])
     
     if not g4_df.empty:
-        ax_length.hist(g4_df['length'], bins=20, alpha=0.7, color='skyblue', edgecolor='black')
+        _hist(ax_length, g4_df['length'].to_numpy(), 20, alpha=0.7, color='skyblue', edgecolor='black')
         ax_length.set_title('G4 Length Distribution')
         ax_length.set_xlabel('Length (bp)')
         ax_length.set_ylabel('Frequency')
         
-        ax_score.hist(g4_df['score'], bins=20, alpha=0.7, color='lightgreen', edgecolor='black')
+        _hist(ax_score, g4_df['score'].to_numpy(), 20, alpha=0.7, color='lightgreen', edgecolor='black')
         ax_score.set_title('G4 Score Distribution')
         ax_score.set_xlabel('Score')
         ax_score.set_ylabel('Frequency')
@@ -362,12 +517,11 @@ def create_summary_dashboard(data, output_dir):
     # Top STRING terms
     ax_string = fig.add_subplot(gs[1, 3])
     if not string_df.empty:
-        top_5 = string_df.nsmallest(5, 'fdr')
+        top_5 = _smallest_rows(string_df['fdr'].to_numpy(), 5)
         y_pos = np.arange(len(top_5))
-        ax_string.barh(y_pos, -np.log10(top_5['fdr']), color='orange')
+        ax_string.barh(y_pos, data['string_nlog_fdr'][top_5], color='orange')
         ax_string.set_yticks(y_pos)
-        ax_string.set_yticklabels([desc[:25] + '...' if len(desc) > 25 else desc 
-                                   for desc in top_5['description']], fontsize=8)
+        ax_string.set_yticklabels(_truncate(string_df['description'].to_numpy()[top_5], 25), fontsize=8)
         ax_string.set_xlabel('-log10(FDR)')
         ax_string.set_title('Top 5 GO Terms')
         ax_string.invert_yaxis()
@@ -376,24 +530,36 @@ def create_summary_dashboard(data, output_dir):
     ax_enrich = fig.add_subplot(gs[2, :])
     if not string_df.empty:
         # Category breakdown
-        category_counts = string_df['category'].value_counts()
+        category_counts = _top_counts(string_df['category'])
         x_pos = np.arange(len(category_counts))
         bars = ax_enrich.bar(x_pos, category_counts.values, 
-                            color=sns.color_palette("Set2", len(category_counts)))
+                            color=_palette("Set2", len(category_counts)))
         ax_enrich.set_xticks(x_pos)
         ax_enrich.set_xticklabels(category_counts.index, rotation=45)
         ax_enrich.set_title('Functional Categories Distribution')
         ax_enrich.set_ylabel('Number of Terms')
         
         # Add value labels
-        for i, v in enumerate(category_counts.values):
-            ax_enrich.text(i, v + 1, str(v), ha='center', va='bottom')
+        ax_enrich.bar_label(bars, padding=3)
     
-    plt.savefig(output_dir / 'comprehensive_dashboard.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    fig.savefig(output_dir / 'comprehensive_dashboard.png', **SAVEFIG_KWARGS)
     
     print("✅ Comprehensive dashboard created")
 
+# Chart name -> (function, data keys it reads)
+CHARTS = {
+    'g4': (create_g4_overview, ('g4', 'g4_stats')),
+    'promoters': (create_promoter_analysis, ('promoters', 'g4')),
+    'string': (create_string_enrichment_plots, ('string', 'string_nlog_fdr')),
+    'dashboard': (create_summary_dashboard,
+                  ('g4', 'g4_stats', 'promoters', 'string', 'string_nlog_fdr')),
+}
+
+def _run(task):
+    """Worker entry point: render one chart into its own Figure"""
+    name, data, output_dir = task
+    CHARTS[name][0](data, output_dir)
+
 def main():
     if len(sys.argv) != 2:
         print("Usage: python create_visualizations.py <results_dir>")
@@ -416,10 +582,17 @@ def main():
     # Create visualizations
     print("\n🎨 Creating visualizations...")
     
-    create_g4_overview(data, output_dir)
-    create_promoter_analysis(data, output_dir)
-    create_string_enrichment_plots(data, output_dir)
-    create_summary_dashboard(data, output_dir)
+    # Charts are independent: render them in parallel, one process per chart.
+    # Each worker receives only the tables its chart reads.
+    workers = min(len(CHARTS), os.cpu_count() or 1)
+    if workers > 1:
+        tasks = [(name, {key: data[key] for key in keys if key in data}, output_dir)
+                 for name, (_, keys) in CHARTS.items()]
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(_run, tasks))
+    else:
+        for create, _ in CHARTS.values():
+            create(data, output_dir)
     
     print(f"\n🎉 All visualizations created!")
     print(f"📁 Check {output_dir}/ for the following files:")
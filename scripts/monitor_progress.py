@@ -6,48 +6,133 @@ Monitors the progress of Z-Hunt and G-quadruplex analysis
 
 import os
 import time
-import subprocess
 import argparse
 
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+# Output files written by the analyses
+ZDNA_FILE = "data/results/z_dna_raw.txt"
+G4_FILE = "results/quadruplex_results.csv"
+
+# Process command-line substrings to look for
+WATCHED_PROCESSES = ('zhunt', 'quadruplex_search')
+
+def _iter_cmdlines():
+    """
+    Yield command lines of all other running processes
+    """
+    own_pid = os.getpid()
+    if psutil is not None:
+        for proc in psutil.process_iter(['pid', 'cmdline']):
+            if proc.info['pid'] != own_pid:
+                yield ' '.join(proc.info['cmdline'] or ())
+        return
+    
+    # No psutil: read /proc/<pid>/cmdline directly
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit() or int(entry) == own_pid:
+            continue
+        try:
+            with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                yield f.read().replace(b'\0', b' ').decode(errors='replace')
+        except OSError:
+            # Process exited while scanning
+            continue
+
 def check_process_status():
     """
     Check if Z-Hunt and G-quadruplex processes are running
     """
+    running = dict.fromkeys(WATCHED_PROCESSES, False)
     try:
-        # Check for zhunt process
-        zhunt_result = subprocess.run(['pgrep', '-f', 'zhunt'], 
-                                    capture_output=True, text=True)
-        zhunt_running = bool(zhunt_result.stdout.strip())
-        
-        # Check for quadruplex search process
-        python_result = subprocess.run(['pgrep', '-f', 'quadruplex_search'], 
-                                     capture_output=True, text=True)
-        python_running = bool(python_result.stdout.strip())
-        
-        return zhunt_running, python_running
-    except:
+        # One pass over the process table per tick
+        for cmdline in _iter_cmdlines():
+            for name in WATCHED_PROCESSES:
+                if name in cmdline:
+                    running[name] = True
+    except OSError:
         return False, False
+    
+    return running['zhunt'], running['quadruplex_search']
 
-def get_file_size(filepath):
+# Bytes read per block when counting appended lines
+READ_BLOCK_SIZE = 8 * 1024 * 1024
+
+# Per-file counting state across ticks: path -> {'offset', 'lines'}
+_line_state = {}
+
+def get_file_size(filepath, st=None):
     """
     Get file size in MB
     """
     try:
-        size_bytes = os.path.getsize(filepath)
-        return size_bytes / (1024 * 1024)  # Convert to MB
-    except:
+        if st is None:
+            st = os.stat(filepath)
+        return st.st_size / (1024 * 1024)  # Convert to MB
+    except OSError:
         return 0
 
-def count_lines(filepath):
+def count_lines(filepath, st=None):
     """
-    Count lines in a file
+    Count lines in a file, reading only the bytes appended since the last call
     """
     try:
-        with open(filepath, 'r') as f:
-            return sum(1 for line in f)
-    except:
+        if st is None:
+            st = os.stat(filepath)
+        state = _line_state.setdefault(filepath, {'offset': 0, 'lines': 0})
+        if st.st_size < state['offset']:
+            # File was truncated or rewritten - count from the start
+            state['offset'] = state['lines'] = 0
+        if st.st_size > state['offset']:
+            with open(filepath, 'rb') as f:
+                f.seek(state['offset'])
+                remaining = st.st_size - state['offset']
+                while remaining > 0:
+                    block = f.read(min(READ_BLOCK_SIZE, remaining))
+                    if not block:
+                        break
+                    state['lines'] += block.count(b'\n')
+                    state['offset'] += len(block)
+                    remaining -= len(block)
+        return state['lines']
+    except OSError:
         return 0
 
+def _watch_outputs():
+    """
+    Watch the output directories for finished or newly created files.
+    Returns None when inotify is unavailable.
+    """
+    if INotify is None:
+        return None
+    inotify = INotify()
+    mask = flags.CLOSE_WRITE | flags.CREATE | flags.MOVED_TO
+    for directory in {os.path.dirname(ZDNA_FILE), os.path.dirname(G4_FILE)}:
+        try:
+            inotify.add_watch(directory, mask)
+        except OSError:
+            # Directory does not exist yet - covered by the interval timeout
+            pass
+    return inotify
+
+def _wait(inotify, interval):
+    """
+    Sleep until the next tick, waking early when an output file changes
+    """
+    if inotify is None:
+        time.sleep(interval)
+        return
+    # Blocks in the kernel; drains every queued event in one read
+    inotify.read(timeout=interval * 1000)
+
 def monitor_progress(interval=30):
     """
     Monitor progress of analysis
@@ -56,6 +141,7 @@ def monitor_progress(interval=30):
     print("Monitoring Z-Hunt and G-quadruplex search...")
     print("Press Ctrl+C to stop monitoring\n")
     
+    inotify = _watch_outputs()
     try:
         while True:
             zhunt_running, python_running = check_process_status()
@@ -63,7 +149,7 @@ def monitor_progress(interval=30):
             print(f"[{time.strftime('%H:%M:%S')}] Status:")
             
             # Z-Hunt status
-            zdna_file = "data/results/z_dna_raw.txt"
+            zdna_file = ZDNA_FILE
             zdna_size = get_file_size(zdna_file)
             zdna_lines = count_lines(zdna_file)
             
@@ -71,10 +157,11 @@ def monitor_progress(interval=30):
             print(f"    Output file: {zdna_size:.1f} MB, {zdna_lines} lines")
             
             # G-quadruplex status
-            g4_file = "results/quadruplex_results.csv"
+            g4_file = G4_FILE
             if os.path.exists(g4_file):
-                g4_size = get_file_size(g4_file)
-                g4_lines = count_lines(g4_file)
+                g4_stat = os.stat(g4_file)
+                g4_size = get_file_size(g4_file, g4_stat)
+                g4_lines = count_lines(g4_file, g4_stat)
                 print(f"  G-quadruplex: ✅ Completed")
                 print(f"    Output file: {g4_size:.1f} MB, {g4_lines} lines")
             else:
@@ -90,10 +177,13 @@ def monitor_progress(interval=30):
                 break
             
             print("-" * 50)
-            time.sleep(interval)
+            _wait(inotify, interval)
             
     except KeyboardInterrupt:
         print("\nMonitoring stopped by user.")
+    finally:
+        if inotify is not None:
+            inotify.close()
 
 def main():
     parser = argparse.ArgumentParser(description='Monitor analysis progress')
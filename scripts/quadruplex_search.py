@@ -12,85 +12,343 @@ from Bio import SeqIO
 from Bio.Seq import Seq
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
 from collections import defaultdict
 
-def find_gquadruplex_patterns(sequence, min_run_length=3, max_loop_length=7):
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+try:
+    from pyfaidx import Fasta
+except ImportError:
+    Fasta = None
+
+def build_g4_pattern(min_run_length=3, max_loop_length=7):
+    """
+    Build a single G-quadruplex regex covering every G-run length
+    G-quadruplex pattern: G{n}N{1-7}G{n}N{1-7}G{n}N{1-7}G{n}[N{1-7}G{n}...]
+    where n >= min_run_length and N is any nucleotide. One pass finds every
+    locus; the G-run length of each hit is graded afterwards.
     """
-    Find G-quadruplex forming sequences using regex patterns
-    G-quadruplex pattern: G{n}N{1-7}G{n}N{1-7}G{n}N{1-7}G{n}
-    where n >= 3 (minimum run length) and N is any nucleotide
+    g_run = f"G{{{min_run_length},}}"
+    loop = f"[ATCGN]{{1,{max_loop_length}}}"
+    return f"{g_run}(?:{loop}{g_run}){{3,}}"
+
+def compile_g4_pattern(pattern):
     """
-    patterns = []
+    Compile a G4 regex for byte sequences with RE2 (linear-time DFA) when
+    available, else re. The pattern has no backreferences or lookarounds,
+    so both engines return the same leftmost-greedy matches.
+    """
+    pattern = pattern.encode()
+    if re2 is None:
+        return re.compile(pattern)
+    options = re2.Options()
+    options.max_mem = 1 << 28
+    return re2.compile(pattern, options=options)
+
+def compile_g4_database(pattern):
+    """
+    Compile a G4 regex into a Hyperscan database reporting the leftmost start
+    of every match end, case-insensitively (soft-masked bases included)
+    """
+    database = hyperscan.Database()
+    database.compile(expressions=[pattern.encode()], ids=[0],
+                     flags=[hyperscan.HS_FLAG_SOM_LEFTMOST | hyperscan.HS_FLAG_CASELESS])
+    return database
+
+# Built and compiled once at import for the default parameters; every
+# chromosome (and every worker process) reuses these objects
+G4_REGEX = build_g4_pattern()
+G4_PATTERN = compile_g4_pattern(G4_REGEX)
+G4_DATABASE = compile_g4_database(G4_REGEX) if hyperscan is not None else None
+
+# Stricter patterns used to grade each hit by G-run length (longest first)
+G_RUN_LENGTHS = range(6, 3, -1)
+G_RUN_PATTERNS = [(n, re.compile(build_g4_pattern(n))) for n in G_RUN_LENGTHS]
+
+def g_run_length_of(matched_seq, min_run_length=3):
+    """
+    Longest G-run length n (up to 6) for which the hit still contains a
+    G{n}-quadruplex. Loops may contain G's, so runs cannot simply be split
+    on non-G characters.
+    """
+    for n, pattern in G_RUN_PATTERNS:
+        if pattern.search(matched_seq):
+            return n
+    return min_run_length
+
+def _hyperscan_windows(sequence, database=G4_DATABASE):
+    """
+    Merged [start, end) windows that contain every G4 match, found in one
+    Hyperscan pass over the raw sequence
+    """
+    windows = []
     
-    # Generate patterns for different G-run lengths (3-6)
-    for g_run in range(min_run_length, 7):
-        # Pattern: G{n}N{1-max_loop}G{n}N{1-max_loop}G{n}N{1-max_loop}G{n}
-        pattern = f"G{{{g_run},}}[ATCGN]{{1,{max_loop_length}}}G{{{g_run},}}[ATCGN]{{1,{max_loop_length}}}G{{{g_run},}}[ATCGN]{{1,{max_loop_length}}}G{{{g_run},}}"
-        patterns.append((pattern, g_run))
+    def on_match(pattern_id, start, end, flags, context):
+        # Ends arrive in order, but a later match may start further left
+        while windows and start <= windows[-1][1]:
+            prev_start, prev_end = windows.pop()
+            start, end = min(start, prev_start), max(end, prev_end)
+        windows.append((start, end))
     
-    return patterns
+    database.scan(sequence, match_event_handler=on_match)
+    return windows
 
-def search_quadruplexes_in_sequence(seq_record, patterns, chromosome_name):
+if njit is not None:
+    @njit(cache=True, nogil=True)
+    def _g_chain_kernel(seq, min_run, max_loop):
+        """
+        Chains of maximal G-runs (>= min_run, either case) with gaps <= max_loop
+        that have room for four G-runs
+        
+        A run of length L holds at most (L + 1) // (min_run + 1) G-runs of a
+        match, since loops may themselves be G's. Every regex match lies
+        inside one such chain.
+        """
+        n = seq.size
+        starts = np.empty(n // (min_run + 1) + 1, dtype=np.int64)
+        ends = np.empty_like(starts)
+        k = 0
+        chain_start = -1
+        chain_end = -1
+        capacity = 0
+        i = 0
+        while i < n:
+            if seq[i] != 71 and seq[i] != 103:
+                i += 1
+                continue
+            j = i
+            while j < n and (seq[j] == 71 or seq[j] == 103):
+                j += 1
+            if j - i >= min_run:
+                runs = (j - i + 1) // (min_run + 1)
+                if chain_start >= 0 and i - chain_end <= max_loop:
+                    chain_end = j
+                    capacity += runs
+                else:
+                    if capacity >= 4:
+                        starts[k] = chain_start
+                        ends[k] = chain_end
+                        k += 1
+                    chain_start = i
+                    chain_end = j
+                    capacity = runs
+            i = j
+        if capacity >= 4:
+            starts[k] = chain_start
+            ends[k] = chain_end
+            k += 1
+        return starts[:k], ends[:k]
+else:
+    _g_chain_kernel = None
+
+def _g_chain_windows(sequence, min_run_length=3, max_loop_length=7):
     """
-    Search for G-quadruplex patterns in a single sequence
+    [start, end) windows that contain every G4 match, found by walking the
+    sequence bytes once with the compiled kernel
     """
-    results = []
-    sequence = str(seq_record.seq).upper()
+    seq_bytes = np.frombuffer(sequence, dtype=np.uint8)
+    starts, ends = _g_chain_kernel(seq_bytes, min_run_length, max_loop_length)
+    return zip(starts.tolist(), ends.tolist())
+
+def candidate_windows(sequence):
+    """
+    Windows of the sequence that contain every G4 match of the default
+    pattern, or None when no prefilter is available
+    """
+    if G4_DATABASE is not None:
+        return _hyperscan_windows(sequence)
+    if _g_chain_kernel is not None:
+        return _g_chain_windows(sequence)
+    return None
+
+def iter_g4_matches(sequence, pattern=G4_PATTERN):
+    """
+    Yield (start, end, matched_seq) for every G4 match in the sequence
+    (bytes in, bytes out)
+    """
+    windows = candidate_windows(sequence) if pattern is G4_PATTERN else None
+    if windows is None:
+        for match in pattern.finditer(sequence.upper()):
+            yield match.start(), match.end(), match.group()
+        return
     
-    for pattern_str, g_run_length in patterns:
-        pattern = re.compile(pattern_str)
-        
-        for match in pattern.finditer(sequence):
-            start = match.start()
-            end = match.end()
-            matched_seq = match.group()
-            
-            # Calculate some basic properties
-            g_content = matched_seq.count('G') / len(matched_seq)
-            gc_content = (matched_seq.count('G') + matched_seq.count('C')) / len(matched_seq)
-            
-            result = {
-                'chromosome': chromosome_name,
-                'start': start,
-                'end': end,
-                'length': end - start,
-                'sequence': matched_seq,
-                'g_run_length': g_run_length,
-                'g_content': g_content,
-                'gc_content': gc_content,
-                'score': calculate_gquad_score(matched_seq)
-            }
-            results.append(result)
-    
-    return results
+    # The prefilter narrows the genome to windows around matches; the regex
+    # then runs only there. Every regex match lies inside one window, so the
+    # matches are the same as scanning the whole chromosome.
+    for window_start, window_end in windows:
+        window = sequence[window_start:window_end].upper()
+        for match in pattern.finditer(window):
+            yield window_start + match.start(), window_start + match.end(), match.group()
+
+# Complement of every base (soft-masked bases keep their case)
+RC_TABLE = bytes.maketrans(b"ACGTNacgtn", b"TGCANtgcan")
+
+def _coordinate_dtype(sequence_length):
+    """
+    Narrowest coordinate dtype for a chromosome: int32 unless it is >= 2 Gb
+    """
+    return np.int32 if sequence_length < np.iinfo(np.int32).max else np.int64
+
+def _scan_strand(sequence, pattern):
+    """
+    Hit columns (starts, ends, decoded sequences) of one strand's bytes
+    """
+    starts, ends, sequences = [], [], []
+    for start, end, matched_seq in iter_g4_matches(sequence, pattern):
+        starts.append(start)
+        ends.append(end)
+        # Only the hits are decoded; the chromosome itself stays bytes
+        sequences.append(matched_seq.decode('ascii'))
+    return starts, ends, sequences
+
+def search_quadruplexes_in_sequence(sequence, chromosome_name, pattern=G4_PATTERN):
+    """
+    Search for G-quadruplex patterns on both strands of a single sequence
+    Returns the hits as columns: start, end, strand, sequence, g_run_length.
+    Minus-strand hits are scanned on the reverse complement with the same
+    regex; their coordinates are mapped back to the forward strand and their
+    sequence is the G-rich minus-strand sequence.
+    """
+    fwd_starts, fwd_ends, fwd_seqs = _scan_strand(sequence, pattern)
+    rc_starts, rc_ends, rc_seqs = _scan_strand(sequence.translate(RC_TABLE)[::-1], pattern)
+    
+    # Reverse-complement hits come in descending forward order
+    n = len(sequence)
+    coord_dtype = _coordinate_dtype(n)
+    starts = np.array(fwd_starts + [n - end for end in reversed(rc_ends)], dtype=coord_dtype)
+    ends = np.array(fwd_ends + [n - start for start in reversed(rc_starts)], dtype=coord_dtype)
+    sequences = fwd_seqs + rc_seqs[::-1]
+    strands = np.array(['+'] * len(fwd_seqs) + ['-'] * len(rc_seqs), dtype='U1')
+    
+    # Both strands in coordinate order
+    order = np.argsort(starts, kind='stable')
+    return {
+        'start': starts[order],
+        'end': ends[order],
+        'strand': strands[order],
+        'sequence': [sequences[i] for i in order],
+        'g_run_length': np.array([g_run_length_of(sequences[i]) for i in order], dtype=np.uint8),
+    }
+
+def _segment_counts(mask, segment_starts):
+    """
+    Number of True values in each segment of a flat mask
+    """
+    return np.add.reduceat(mask, segment_starts, dtype=np.int64)
+
+def _sequence_counts(sequences):
+    """
+    Per-sequence base, G-run and loop counts for a batch of sequences
+    All sequences are laid out in one byte array separated by '|', so G-runs
+    and loops never cross sequence boundaries.
+    """
+    lengths = np.fromiter(map(len, sequences), dtype=np.int64, count=len(sequences))
+    segment_starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    seq_bytes = np.frombuffer('|'.join(sequences).encode('ascii'), dtype=np.uint8)
+    
+    is_g = seq_bytes == ord('G')
+    is_loop = (seq_bytes == ord('A')) | (seq_bytes == ord('T')) | (seq_bytes == ord('C'))
+    
+    # A run starts where the previous byte is not part of the same class
+    return {
+        'length': lengths,
+        'g': _segment_counts(is_g, segment_starts),
+        'c': _segment_counts(seq_bytes == ord('C'), segment_starts),
+        'g_runs': _segment_counts(is_g & ~np.concatenate(([False], is_g[:-1])), segment_starts),
+        'loop_bases': _segment_counts(is_loop, segment_starts),
+        'loops': _segment_counts(is_loop & ~np.concatenate(([False], is_loop[:-1])), segment_starts),
+    }
+
+def _gquad_scores(counts):
+    """
+    G4 scores from the counts of _sequence_counts
+    """
+    g_count, g_runs = counts['g'], counts['g_runs']
+    loops = counts['loops']
+    
+    # G-content contribution (higher G-content = higher score)
+    score = g_count / counts['length'] * 100
+    
+    # At least 4 G-runs for quadruplex: bonus per run and for longer runs
+    score = np.where(g_runs >= 4,
+                     score + g_runs * 10 + g_count / np.maximum(g_runs, 1) * 5,
+                     score)
+    
+    # Penalty for very long loops (average loop longer than 5 nt)
+    score = np.where((loops > 0) & (counts['loop_bases'] > 5 * loops), score * 0.8, score)
+    
+    return np.round(score, 2)
+
+def gquad_scores(sequences):
+    """
+    Score a batch of G-quadruplex sequences at once (see calculate_gquad_score)
+    """
+    if len(sequences) == 0:
+        return np.empty(0)
+    return _gquad_scores(_sequence_counts(sequences))
+
+def score_quadruplexes(df):
+    """
+    Add length, G/GC content and score columns to a table of hits, computed
+    for all hits in one pass over their bytes
+    """
+    df.insert(3, 'length', df['end'] - df['start'])
+    if df.empty:
+        for column in ('g_content', 'gc_content', 'score'):
+            df[column] = pd.Series(dtype=np.float32)
+        return df
+    
+    # Ratios and 2-decimal scores are stored as float32
+    counts = _sequence_counts(df['sequence'].tolist())
+    df['g_content'] = (counts['g'] / counts['length']).astype(np.float32)
+    df['gc_content'] = ((counts['g'] + counts['c']) / counts['length']).astype(np.float32)
+    df['score'] = _gquad_scores(counts).astype(np.float32)
+    return df
 
 def calculate_gquad_score(sequence):
     """
     Calculate a simple scoring for G-quadruplex potential
     Based on G-content, G-runs, and sequence properties
     """
-    score = 0
+    return float(gquad_scores([sequence])[0])
+
+def iter_chromosomes(fasta_file):
+    """
+    Yield (chromosome, sequence bytes) for every record of a FASTA file
+    """
+    if Fasta is not None:
+        # Indexed, memory-mapped reads: each chromosome is one slice of the
+        # file, without building SeqRecord objects
+        fasta = Fasta(fasta_file, as_raw=True, sequence_always_upper=True)
+        try:
+            for chromosome in fasta.keys():
+                yield chromosome, fasta[chromosome][:].encode('ascii')
+        finally:
+            fasta.close()
+        return
     
-    # G-content contribution (higher G-content = higher score)
-    g_content = sequence.count('G') / len(sequence)
-    score += g_content * 100
-    
-    # Count G-runs and their lengths
-    g_runs = re.findall(r'G+', sequence)
-    if len(g_runs) >= 4:  # At least 4 G-runs for quadruplex
-        score += len(g_runs) * 10
-        # Bonus for longer G-runs
-        avg_run_length = sum(len(run) for run in g_runs) / len(g_runs)
-        score += avg_run_length * 5
-    
-    # Penalty for very long loops (less stable quadruplexes)
-    non_g_stretches = re.findall(r'[ATC]+', sequence)
-    if non_g_stretches:
-        avg_loop_length = sum(len(loop) for loop in non_g_stretches) / len(non_g_stretches)
-        if avg_loop_length > 5:
-            score *= 0.8  # Reduce score for long loops
-    
-    return round(score, 2)
+    for seq_record in SeqIO.parse(fasta_file, "fasta"):
+        yield seq_record.id, bytes(seq_record.seq)
+
+def _concat_column(hits, column, dtype):
+    """
+    One integer column over the per-chromosome hit columns
+    """
+    return np.concatenate([results[column] for results in hits] or [np.empty(0, dtype)])
 
 def search_genome_quadruplexes(fasta_file, min_score=50):
     """
@@ -98,29 +356,58 @@ def search_genome_quadruplexes(fasta_file, min_score=50):
     """
     print(f"Searching for G-quadruplexes in {fasta_file}")
     
-    patterns = find_gquadruplex_patterns("", min_run_length=3, max_loop_length=7)
-    all_results = []
-    
-    # Parse FASTA file
-    for seq_record in SeqIO.parse(fasta_file, "fasta"):
-        chromosome = seq_record.id
-        print(f"Processing chromosome: {chromosome}")
-        
-        # Search for quadruplexes
-        results = search_quadruplexes_in_sequence(seq_record, patterns, chromosome)
-        all_results.extend(results)
-        
-        print(f"  Found {len(results)} potential G-quadruplexes")
-    
-    # Convert to DataFrame
-    df = pd.DataFrame(all_results)
+    # Chromosomes are independent: scan them in parallel, one process each.
+    # Results are collected in FASTA order.
+    workers = os.cpu_count() or 1
+    chromosomes, hits = [], []
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            futures = []
+            for chromosome, sequence in iter_chromosomes(fasta_file):
+                print(f"Processing chromosome: {chromosome}")
+                futures.append((chromosome, ex.submit(search_quadruplexes_in_sequence,
+                                                      sequence, chromosome)))
+            for chromosome, future in futures:
+                results = future.result()
+                chromosomes.append(chromosome)
+                hits.append(results)
+                print(f"  {chromosome}: found {len(results['start'])} potential G-quadruplexes")
+    else:
+        for chromosome, sequence in iter_chromosomes(fasta_file):
+            print(f"Processing chromosome: {chromosome}")
+            
+            # Search for quadruplexes
+            results = search_quadruplexes_in_sequence(sequence, chromosome)
+            chromosomes.append(chromosome)
+            hits.append(results)
+            
+            print(f"  Found {len(results['start'])} potential G-quadruplexes")
+    
+    # One table for the whole genome, built column by column, then scored in
+    # a single vectorized pass. Chromosome is categorical (codes in FASTA
+    # order), strand categorical, coordinates int32 and G-run lengths uint8.
+    counts = [len(results['start']) for results in hits]
+    categories = pd.Index(chromosomes).unique()
+    codes = np.repeat(categories.get_indexer(chromosomes), counts)
+    df = pd.DataFrame({
+        'chromosome': pd.Categorical.from_codes(codes, categories=categories),
+        'start': _concat_column(hits, 'start', np.int32),
+        'end': _concat_column(hits, 'end', np.int32),
+        'strand': pd.Categorical(np.concatenate([results['strand'] for results in hits] or [np.empty(0, 'U1')]),
+                                 categories=['+', '-']),
+        'sequence': pd.Series([seq for results in hits for seq in results['sequence']], dtype=object),
+        'g_run_length': _concat_column(hits, 'g_run_length', np.uint8),
+    }, copy=False)
+    df = score_quadruplexes(df)
     
     if df.empty:
         print("No G-quadruplexes found!")
         return df
     
-    # Filter by score
-    filtered_df = df[df['score'] >= min_score]
+    # Filter by score (threshold at the float32 precision of the column);
+    # chromosomes left without hits are dropped from the categories
+    filtered_df = df[df['score'] >= np.float32(min_score)]
+    filtered_df = filtered_df.assign(chromosome=filtered_df['chromosome'].cat.remove_unused_categories())
     print(f"\nFiltered {len(filtered_df)} G-quadruplexes with score >= {min_score}")
     print(f"Original: {len(df)}, Filtered: {len(filtered_df)}")
     
@@ -142,6 +429,9 @@ def analyze_quadruplex_distribution(df):
     print(f"\nAverage G-content: {df['g_content'].mean():.3f}")
     print(f"Average GC-content: {df['gc_content'].mean():.3f}")
     
+    strand_counts = df['strand'].value_counts()
+    print(f"\nStrand: + {strand_counts['+']}, - {strand_counts['-']}")
+    
     # Distribution by chromosome
     chr_counts = df['chromosome'].value_counts()
     print(f"\nG-quadruplex regions per chromosome:")
@@ -153,16 +443,23 @@ def create_bed_file(df, output_file):
     """
     Create BED format file for G-quadruplexes
     """
-    bed_df = df[['chromosome', 'start', 'end', 'score']].copy()
+    bed_df = df[['chromosome', 'start', 'end', 'score', 'strand']].copy()
     bed_df['name'] = 'G4_' + bed_df.index.astype(str)
-    bed_df['strand'] = '.'
     
     # BED format: chr start end name score strand
     bed_df = bed_df[['chromosome', 'start', 'end', 'name', 'score', 'strand']]
     bed_df.to_csv(output_file, sep='\t', header=False, index=False)
     print(f"BED file saved to: {output_file}")
 
-def plot_quadruplex_analysis(df, output_dir):
+def _hist(values, bins, **kwargs):
+    """Histogram binned once by np.histogram and drawn with plt.bar"""
+    arr = values.to_numpy(copy=False)
+    if arr.dtype.kind != 'f':
+        arr = arr.astype(np.float32)
+    counts, edges = np.histogram(arr[~np.isnan(arr)], bins=bins)
+    return plt.bar(edges[:-1], counts, width=np.diff(edges), align='edge', **kwargs)
+
+def plot_quadruplex_analysis(df, output_dir, chr_counts=None):
     """
     Create plots for G-quadruplex analysis
     """
@@ -170,7 +467,7 @@ def plot_quadruplex_analysis(df, output_dir):
     
     # Score distribution
     plt.subplot(2, 3, 1)
-    plt.hist(df['score'], bins=50, alpha=0.7, color='orange')
+    _hist(df['score'], bins=50, alpha=0.7, color='orange')
     plt.xlabel('G4 Score')
     plt.ylabel('Frequency')
     plt.title('G-Quadruplex Score Distribution')
@@ -178,7 +475,7 @@ def plot_quadruplex_analysis(df, output_dir):
     
     # Length distribution
     plt.subplot(2, 3, 2)
-    plt.hist(df['length'], bins=30, alpha=0.7, color='lightcoral')
+    _hist(df['length'], bins=30, alpha=0.7, color='lightcoral')
     plt.xlabel('Length (bp)')
     plt.ylabel('Frequency')
     plt.title('G-Quadruplex Length Distribution')
@@ -194,8 +491,9 @@ def plot_quadruplex_analysis(df, output_dir):
     
     # Chromosome distribution
     plt.subplot(2, 3, 4)
-    chr_counts = df['chromosome'].value_counts().head(10)
-    chr_counts.plot(kind='bar')
+    if chr_counts is None:
+        chr_counts = df['chromosome'].value_counts()
+    chr_counts.head(10).plot(kind='bar')
     plt.xlabel('Chromosome')
     plt.ylabel('Number of G-quadruplexes')
     plt.title('G-Quadruplex Distribution by Chromosome')
@@ -203,7 +501,7 @@ def plot_quadruplex_analysis(df, output_dir):
     
     # G-run length distribution
     plt.subplot(2, 3, 5)
-    plt.hist(df['g_run_length'], bins=range(3, 8), alpha=0.7, color='lightblue')
+    _hist(df['g_run_length'], bins=range(3, 8), alpha=0.7, color='lightblue')
     plt.xlabel('G-run Length')
     plt.ylabel('Frequency')
     plt.title('G-run Length Distribution')
@@ -211,7 +509,7 @@ def plot_quadruplex_analysis(df, output_dir):
     
     # GC content distribution
     plt.subplot(2, 3, 6)
-    plt.hist(df['gc_content'], bins=30, alpha=0.7, color='lightgreen')
+    _hist(df['gc_content'], bins=30, alpha=0.7, color='lightgreen')
     plt.xlabel('GC Content')
     plt.ylabel('Frequency')
     plt.title('GC Content Distribution')
@@ -251,7 +549,7 @@ def main():
         return
     
     # Analyze results
-    analyze_quadruplex_distribution(df)
+    chr_counts = analyze_quadruplex_distribution(df)
     
     # Save results
     df.to_csv(f"{args.output_dir}/quadruplex_results.csv", index=False)
@@ -259,7 +557,7 @@ def main():
     
     # Create visualizations
     print("\nCreating visualizations...")
-    plot_quadruplex_analysis(df, args.output_dir)
+    plot_quadruplex_analysis(df, args.output_dir, chr_counts)
     
     print(f"\nG-quadruplex search complete! Check {args.output_dir}/ for results.")
 
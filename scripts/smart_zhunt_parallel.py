@@ -7,16 +7,37 @@
 - Показ статуса каждого процесса
 """
 
-import subprocess
+import asyncio
 import time
 import os
+import io
+import mmap
 import sys
 import threading
 from pathlib import Path
-import concurrent.futures
 import json
 from datetime import datetime
 import psutil
+import pandas as pd
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+# C версия Z-Hunt. Rust сборка (tools/zhunt-rust) пишет только .Z-SCORE в
+# своем формате и не создает .probability, которые читают extract_zdna_results
+# и extract_zdna_corrected.py, поэтому пока используется C версия
+ZHUNT_BINARY = "./tools/zhunt/zhunt2"
+
+# Размер блока при подсчете длины и копировании без sendfile
+SPLIT_BLOCK_SIZE = 8 * 1024 * 1024
+
+# Сколько байт с конца лога показывать при ошибке Z-Hunt
+LOG_TAIL_BYTES = 4096
+
+# Курсор в начало экрана и очистка до конца
+CLEAR_SCREEN = "\x1b[H\x1b[J"
 
 class ZHuntProgressMonitor:
     def __init__(self, work_dir):
@@ -33,57 +54,86 @@ class ZHuntProgressMonitor:
         
     def _monitor_loop(self):
         """Основной цикл мониторинга"""
-        while self.monitoring:
+        if INotify is None:
+            # Без inotify - опрос файлов каждые 2 секунды
+            while self.monitoring:
+                self._update_progress()
+                self._display_status()
+                time.sleep(2)
+            return
+        
+        # С inotify файлы не опрашиваются: ядро сообщает об изменениях,
+        # а пачка событий за секунду дает одну перерисовку
+        mask = flags.CREATE | flags.MODIFY | flags.CLOSE_WRITE | flags.DELETE | flags.MOVED_TO
+        with INotify() as inotify:
+            inotify.add_watch(self.work_dir, mask)
             self._update_progress()
-            self._display_status()
-            time.sleep(2)  # Обновление каждые 2 секунды
+            while self.monitoring:
+                self._display_status()
+                changed = {self._chromosome_of(event.name)
+                           for event in inotify.read(timeout=2000, read_delay=1000)}
+                for chr_name in changed & set(self.processes):
+                    self._update_chromosome(chr_name)
+    
+    @staticmethod
+    def _chromosome_of(file_name):
+        """Имя хромосомы по имени файла вывода (chr2L.fa.Z-SCORE -> chr2L)"""
+        return file_name.split('.fa.')[0]
             
     def _update_progress(self):
         """Обновление данных прогресса"""
-        for chr_name in self.processes:
-            if chr_name in self.processes:
-                # Проверяем размер Z-SCORE файла
-                zscore_file = self.work_dir / f"{chr_name}.fa.Z-SCORE"
-                prob_file = self.work_dir / f"{chr_name}.fa.probability"
-                
-                if zscore_file.exists():
-                    size_mb = zscore_file.stat().st_size / (1024 * 1024)
-                    self.progress_data[chr_name] = {
-                        'status': 'calculating_zscore',
-                        'size_mb': size_mb,
-                        'file_exists': True
-                    }
-                elif prob_file.exists():
-                    size_mb = prob_file.stat().st_size / (1024 * 1024)
-                    self.progress_data[chr_name] = {
-                        'status': 'completed',
-                        'size_mb': size_mb,
-                        'file_exists': True
-                    }
-                else:
-                    self.progress_data[chr_name] = {
-                        'status': 'starting',
-                        'size_mb': 0,
-                        'file_exists': False
-                    }
+        for chr_name in list(self.processes):
+            self._update_chromosome(chr_name)
+    
+    def _update_chromosome(self, chr_name):
+        """Обновление статуса одной хромосомы по ее файлам"""
+        # Проверяем размер Z-SCORE файла
+        zscore_file = self.work_dir / f"{chr_name}.fa.Z-SCORE"
+        prob_file = self.work_dir / f"{chr_name}.fa.probability"
+        
+        if zscore_file.exists():
+            size_mb = zscore_file.stat().st_size / (1024 * 1024)
+            self.progress_data[chr_name] = {
+                'status': 'calculating_zscore',
+                'size_mb': size_mb,
+                'file_exists': True
+            }
+        elif prob_file.exists():
+            size_mb = prob_file.stat().st_size / (1024 * 1024)
+            self.progress_data[chr_name] = {
+                'status': 'completed',
+                'size_mb': size_mb,
+                'file_exists': True
+            }
+        else:
+            self.progress_data[chr_name] = {
+                'status': 'starting',
+                'size_mb': 0,
+                'file_exists': False
+            }
     
     def _display_status(self):
         """Отображение статуса в терминале"""
-        os.system('clear')
         elapsed = time.time() - self.start_time
         
-        print("🚀" + "=" * 70)
-        print(f"   SMART Z-HUNT PARALLEL ANALYSIS - {elapsed:.0f}s")
-        print("🚀" + "=" * 70)
-        print()
+        # Весь экран собирается в буфер и выводится одной записью;
+        # очистка - ANSI-последовательностью вместо запуска clear
+        buf = io.StringIO()
+        print("🚀" + "=" * 70, file=buf)
+        print(f"   SMART Z-HUNT PARALLEL ANALYSIS - {elapsed:.0f}s", file=buf)
+        print("🚀" + "=" * 70, file=buf)
+        print(file=buf)
         
-        for chr_name, data in self.progress_data.items():
+        for chr_name, data in list(self.progress_data.items()):
             status_icon = "🔬" if data['status'] == 'calculating_zscore' else "✅" if data['status'] == 'completed' else "⏳"
-            print(f"{status_icon} {chr_name:8s} | {data['status']:20s} | {data['size_mb']:6.1f} MB")
+            print(f"{status_icon} {chr_name:8s} | {data['status']:20s} | {data['size_mb']:6.1f} MB", file=buf)
+        
+        print(file=buf)
+        print("💡 Файлы НЕ удаляются - все результаты сохраняются!", file=buf)
+        print("📊 Обновление каждые 2 секунды...", file=buf)
         
-        print()
-        print("💡 Файлы НЕ удаляются - все результаты сохраняются!")
-        print("📊 Обновление каждые 2 секунды...")
+        sys.stdout.write(CLEAR_SCREEN + buf.getvalue())
+        sys.stdout.flush()
         
     def register_process(self, chr_name, process):
         """Регистрация нового процесса"""
@@ -98,6 +148,40 @@ class ZHuntProgressMonitor:
         """Остановка мониторинга"""
         self.monitoring = False
 
+def _next_header(mm, pos):
+    """Смещение следующей строки-заголовка '>' после pos (или -1)"""
+    i = mm.find(b'\n>', pos)
+    return -1 if i == -1 else i + 1
+
+def _copy_range(mm, src_fd, dst_fd, offset, count):
+    """Копирование байтов [offset, offset + count) исходного файла в dst_fd"""
+    end = offset + count
+    if hasattr(os, 'sendfile'):
+        try:
+            # Копирование внутри ядра, без буферов Python
+            while offset < end:
+                sent = os.sendfile(dst_fd, src_fd, offset, end - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            return
+        except OSError:
+            # sendfile не поддерживает файл-приемник (например, macOS) -
+            # дописываем блоками из отображения
+            pass
+    while offset < end:
+        block_end = min(offset + SPLIT_BLOCK_SIZE, end)
+        os.write(dst_fd, mm[offset:block_end])
+        offset = block_end
+
+def _count_bases(mm, start, end):
+    """Длина последовательности в [start, end) без переводов строк"""
+    length = 0
+    for block_start in range(start, end, SPLIT_BLOCK_SIZE):
+        block = mm[block_start:min(block_start + SPLIT_BLOCK_SIZE, end)]
+        length += len(block) - block.count(b'\n') - block.count(b'\r')
+    return length
+
 def split_genome_by_chromosome(fasta_file, output_dir):
     """Разделение генома по хромосомам"""
     output_dir = Path(output_dir)
@@ -106,60 +190,70 @@ def split_genome_by_chromosome(fasta_file, output_dir):
     print(f"📄 Разделяем {fasta_file} по хромосомам...")
     
     chromosomes = {}
-    current_chr = None
-    current_seq = []
-    
-    with open(fasta_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line.startswith('>'):
-                # Сохраняем предыдущую хромосому
-                if current_chr:
-                    chr_file = output_dir / f"{current_chr}.fa"
-                    with open(chr_file, 'w') as cf:
-                        cf.write(f">{current_chr}\n")
-                        cf.write(''.join(current_seq) + '\n')
-                    chromosomes[current_chr] = str(chr_file)
-                    print(f"   ✅ {current_chr}: {len(''.join(current_seq))} bp")
-                
-                # Начинаем новую хромосому
-                current_chr = line[1:].split()[0]
-                current_seq = []
-            else:
-                current_seq.append(line)
-        
-        # Сохраняем последнюю хромосому
-        if current_chr:
+    if os.path.getsize(fasta_file) == 0:
+        print(f"✅ Разделено на 0 хромосом")
+        return chromosomes
+    
+    # Заголовки ищем в отображении файла поиском b'\n>' в C; последовательность
+    # каждой хромосомы копируется ядром (os.sendfile) из исходного файла,
+    # так что память Python не зависит от размера хромосомы.
+    # Переводы строк внутри последовательности сохраняются - Z-Hunt их пропускает.
+    with open(fasta_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header_start = 0 if mm[:1] == b'>' else _next_header(mm, 0)
+        while header_start != -1:
+            name_end = mm.find(b'\n', header_start)
+            if name_end == -1:
+                name_end = len(mm)
+            next_header = _next_header(mm, name_end)
+            seq_start = min(name_end + 1, len(mm))
+            seq_end = len(mm) if next_header == -1 else next_header
+            
+            current_chr = mm[header_start + 1:name_end].decode().split()[0]
+            
             chr_file = output_dir / f"{current_chr}.fa"
-            with open(chr_file, 'w') as cf:
-                cf.write(f">{current_chr}\n")
-                cf.write(''.join(current_seq) + '\n')
+            with open(chr_file, 'wb') as cf:
+                cf.write(f">{current_chr}\n".encode())
+                cf.flush()
+                _copy_range(mm, f.fileno(), cf.fileno(), seq_start, seq_end - seq_start)
+                if seq_end == seq_start or mm[seq_end - 1] != ord('\n'):
+                    cf.write(b'\n')
             chromosomes[current_chr] = str(chr_file)
-            print(f"   ✅ {current_chr}: {len(''.join(current_seq))} bp")
+            
+            length = _count_bases(mm, seq_start, seq_end)
+            print(f"   ✅ {current_chr}: {length} bp")
+            
+            header_start = next_header
     
     print(f"✅ Разделено на {len(chromosomes)} хромосом")
     return chromosomes
 
-def run_zhunt_on_chromosome(chr_name, chr_file, work_dir, monitor, use_rust=False):
+def _tail_log(log_file, size=LOG_TAIL_BYTES):
+    """Последние size байт лог-файла"""
+    with open(log_file, 'rb') as f:
+        f.seek(max(0, os.path.getsize(log_file) - size))
+        return f.read().decode(errors='replace')
+
+async def run_zhunt_on_chromosome(chr_name, chr_file, work_dir, monitor):
     """Запуск Z-Hunt на одной хромосоме"""
     start_time = time.time()
     
-    if use_rust:
-        # Попытка использовать Rust версию
-        cmd = ["./tools/zhunt-rust/target/release/zhunt", chr_file]
-    else:
-        # Стандартная C версия
-        cmd = ["./tools/zhunt/zhunt2", "12", "8", "12", chr_file]
+    # Окно 12 динуклеотидов, размеры 8-12
+    cmd = [ZHUNT_BINARY, "12", "8", "12", chr_file]
+    
+    print(f"🔬 Запуск {chr_name}...")
     
-    print(f"🔬 Запуск {chr_name} ({'Rust' if use_rust else 'C'})...")
+    # Вывод Z-Hunt пишется ядром прямо в лог-файлы, минуя Python
+    log_file = Path(work_dir) / f"{chr_name}.log"
+    err_file = Path(work_dir) / f"{chr_name}.err"
     
     try:
-        # Запускаем процесс
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        with open(log_file, 'wb') as logp, open(err_file, 'wb') as errp:
+            process = await asyncio.create_subprocess_exec(
+                *cmd, stdout=logp, stderr=errp)
         monitor.register_process(chr_name, process)
         
         # Ждем завершения
-        stdout, stderr = process.communicate()
+        await process.wait()
         
         elapsed = time.time() - start_time
         
@@ -185,8 +279,10 @@ def run_zhunt_on_chromosome(chr_name, chr_file, work_dir, monitor, use_rust=Fals
                 'chromosome': chr_name,
                 'success': False,
                 'time': elapsed,
-                'error': stderr,
-                'stdout': stdout
+                'error': _tail_log(err_file),
+                'stdout': _tail_log(log_file),
+                'log_file': str(log_file),
+                'err_file': str(err_file)
             }
             
     except Exception as e:
@@ -197,11 +293,51 @@ def run_zhunt_on_chromosome(chr_name, chr_file, work_dir, monitor, use_rust=Fals
             'time': time.time() - start_time
         }
 
+async def run_zhunt_all(chromosomes, work_dir, monitor, max_workers):
+    """Запуск Z-Hunt на всех хромосомах, не более max_workers процессов одновременно"""
+    # Без привязки к ядрам: процессы распределяет планировщик ОС
+    slots = asyncio.Semaphore(max_workers)
+    
+    async def run_one(chr_name, chr_file):
+        async with slots:
+            return await run_zhunt_on_chromosome(chr_name, chr_file, work_dir, monitor)
+    
+    return await asyncio.gather(*(
+        run_one(chr_name, chr_file) for chr_name, chr_file in chromosomes.items()
+    ))
+
+# Строк .probability файла на один блок разбора
+PROBABILITY_CHUNK_ROWS = 1_000_000
+
+def _iter_probability_chunks(prob_file):
+    """Блоки (start, end, zscore) .probability файла; пустой файл - ни одного блока"""
+    # Разбор C-парсером pandas блоками вместо split() по строкам;
+    # лишние поля (последовательность, antisyn) отбрасываются через usecols.
+    # Позиции читаются как текст, чтобы отбраковать нецелые так же, как int()
+    try:
+        reader = pd.read_csv(prob_file, sep=r'\s+', engine='c', comment='#',
+                             header=None, usecols=[0, 1, 2],
+                             names=['start', 'end', 'zscore'],
+                             dtype={'start': str, 'end': str},
+                             chunksize=PROBABILITY_CHUNK_ROWS)
+    except pd.errors.EmptyDataError:
+        return
+    try:
+        yield from reader
+    except pd.errors.ParserError as e:
+        # Блок, где нет ни одной строки из 3 полей, парсер с usecols отвергает.
+        # Записи чередуются с однопольными anti/syn строками, так что такой
+        # блок бывает только в конце файла - структур в нём нет
+        if 'Too many columns specified' not in str(e):
+            raise
+    finally:
+        reader.close()
+
 def extract_zdna_results(results, output_file, min_zscore=300, max_zscore=400):
     """Извлечение Z-DNA структур из .probability файлов"""
     print(f"🧬 Извлекаем Z-DNA структуры (Z-score {min_zscore}-{max_zscore})...")
     
-    zdna_regions = []
+    frames = []
     
     for result in results:
         if not result['success']:
@@ -214,35 +350,30 @@ def extract_zdna_results(results, output_file, min_zscore=300, max_zscore=400):
         chr_name = result['chromosome']
         print(f"   📊 Обрабатываем {chr_name}...")
         
-        with open(prob_file, 'r') as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
-                if not line or line.startswith('#'):
-                    continue
-                    
-                try:
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        start_pos = int(parts[0])
-                        end_pos = int(parts[1])
-                        zscore = float(parts[2])
-                        
-                        if min_zscore <= zscore <= max_zscore:
-                            zdna_regions.append({
-                                'chromosome': chr_name,
-                                'start': start_pos,
-                                'end': end_pos,
-                                'zscore': zscore,
-                                'length': end_pos - start_pos + 1
-                            })
-                except (ValueError, IndexError):
-                    continue
-    
-    # Сохраняем результаты
-    with open(output_file, 'w') as f:
-        f.write("chromosome\tstart\tend\tzscore\tlength\n")
-        for region in zdna_regions:
-            f.write(f"{region['chromosome']}\t{region['start']}\t{region['end']}\t{region['zscore']}\t{region['length']}\n")
+        for chunk in _iter_probability_chunks(prob_file):
+            zscore = chunk['zscore']
+            if not pd.api.types.is_float_dtype(zscore):
+                zscore = pd.to_numeric(zscore, errors='coerce')
+            keep = (zscore.between(min_zscore, max_zscore) &
+                    chunk['start'].str.fullmatch(r'[+-]?\d+', na=False) &
+                    chunk['end'].str.fullmatch(r'[+-]?\d+', na=False))
+            if not keep.any():
+                continue
+            
+            start = chunk['start'][keep].astype('int64').to_numpy()
+            end = chunk['end'][keep].astype('int64').to_numpy()
+            frames.append(pd.DataFrame({
+                'chromosome': chr_name,
+                'start': start,
+                'end': end,
+                'zscore': zscore[keep].to_numpy(dtype='float64'),
+                'length': end - start + 1
+            }))
+    
+    # Сохраняем результаты одной записью вместо построчного f.write
+    columns = ['chromosome', 'start', 'end', 'zscore', 'length']
+    zdna_regions = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    zdna_regions.to_csv(output_file, sep='\t', index=False)
     
     print(f"✅ Найдено {len(zdna_regions)} Z-DNA структур")
     print(f"📄 Результаты сохранены в {output_file}")
@@ -269,6 +400,11 @@ def main():
     print("⚡ Максимальная загрузка CPU!")
     print()
     
+    if not os.path.exists(ZHUNT_BINARY):
+        print(f"❌ Z-Hunt не найден: {ZHUNT_BINARY}")
+        sys.exit(1)
+    print("🔧 Используем C версию Z-Hunt")
+    
     # Создаем рабочую директорию
     work_dir = Path("z_hunt_results")
     work_dir.mkdir(exist_ok=True)
@@ -296,26 +432,8 @@ def main():
     max_workers = min(len(large_chromosomes), psutil.cpu_count())
     print(f"💻 Используем {max_workers} параллельных процессов")
     
-    # Проверяем доступность Rust версии
-    use_rust = os.path.exists("tools/zhunt-rust/target/release/zhunt")
-    if use_rust:
-        print("🦀 Используем БЫСТРУЮ Rust версию!")
-    else:
-        print("🔧 Используем стандартную C версию")
-    
     # Запускаем анализ в параллель
-    results = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Отправляем все задачи
-        future_to_chr = {
-            executor.submit(run_zhunt_on_chromosome, chr_name, chr_file, work_dir, monitor, use_rust): chr_name
-            for chr_name, chr_file in large_chromosomes.items()
-        }
-        
-        # Собираем результаты
-        for future in concurrent.futures.as_completed(future_to_chr):
-            result = future.result()
-            results.append(result)
+    results = asyncio.run(run_zhunt_all(large_chromosomes, work_dir, monitor, max_workers))
     
     # Останавливаем мониторинг
     monitor.stop_monitoring()
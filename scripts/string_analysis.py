@@ -4,12 +4,97 @@ STRING Database Functional Enrichment Analysis
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
+import numpy as np
+import csv
+import io
 import json
 import time
 import sys
+import atexit
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# (connect, read) timeouts for STRING API calls, seconds
+REQUEST_TIMEOUT = (5, 60)
+
+def _make_session():
+    """
+    One HTTP session for all STRING calls: keep-alive connection pooling
+    to the API host, with retries on rate limiting and server errors
+    """
+    session = requests.Session()
+    retry = Retry(total=5, backoff_factor=0.5,
+                  status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=None)  # STRING queries are safe to re-POST
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry))
+    session.headers['User-Agent'] = 'bioinfo_homework'
+    return session
+
+_SESSION = _make_session()
+atexit.register(_SESSION.close)
+
+# On-disk cache of STRING responses: <dir>/<method>/<sha1 of query>.tsv
+CACHE_DIR = Path.home() / '.cache' / 'string_api'
+CACHE_TTL = 7 * 24 * 3600  # seconds
+
+def _post_tsv(string_api_url, output_format, method, params):
+    """
+    POST a STRING API query and return the response text.
+    Identical queries are answered from the disk cache while it is fresh.
+    """
+    query = {k: v for k, v in params.items() if k != 'caller_identity'}
+    key = hashlib.sha1(json.dumps([string_api_url, output_format, method, query],
+                                  sort_keys=True).encode()).hexdigest()
+    cache_path = CACHE_DIR / method / f"{key}.{output_format}"
+    try:
+        if time.time() - cache_path.stat().st_mtime < CACHE_TTL:
+            return cache_path.read_text()
+    except OSError:
+        pass  # Not cached yet
+    
+    response = _SESSION.post(f"{string_api_url}/{output_format}/{method}", data=params,
+                             timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    text = response.text
+    
+    # Write-then-rename, so concurrent runs never read a partial file
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(text)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Cache is best-effort
+    return text
+
+# Identifiers per get_string_ids request, and requests in flight at once
+ID_CHUNK_SIZE = 500
+ID_CHUNK_WORKERS = 4
+
+# Column types of STRING TSV responses; other columns are kept as text
+ENRICHMENT_DTYPES = {'number_of_genes': 'Int32', 'number_of_genes_in_background': 'Int32',
+                     'pvalue': np.float64, 'fdr': np.float64}
+NETWORK_DTYPES = {'score': np.float32}
+
+def _read_tsv(text, dtypes=None, **kwargs):
+    """
+    Parse a STRING TSV response with the pandas C reader.
+    Text columns are kept verbatim; only empty typed fields become NaN.
+    """
+    if not text.strip():
+        return pd.DataFrame()
+    dtypes = dtypes or {}
+    header = text.partition('\n')[0].rstrip('\r').split('\t')
+    return pd.read_csv(io.StringIO(text), sep='\t', quoting=csv.QUOTE_NONE,
+                       dtype={col: dtypes.get(col, str) for col in header},
+                       keep_default_na=False, na_values={col: [''] for col in dtypes},
+                       on_bad_lines='skip', **kwargs)
+
 def read_gene_list(gene_file):
     """Read gene list from file"""
     genes = []
@@ -29,35 +114,37 @@ def convert_flybase_to_string(flybase_genes, species_id=7227):
     output_format = "tsv"
     method = "get_string_ids"
     
-    # Prepare parameters
-    params = {
-        "identifiers": "\r".join(flybase_genes),  # Join genes with carriage return
-        "species": species_id,
-        "limit": 1,
-        "echo_query": 1,
-        "caller_identity": "bioinfo_homework"
-    }
+    # Prepare parameters, one request per chunk of identifiers
+    def chunk_params(genes):
+        return {
+            "identifiers": "\r".join(genes),  # Join genes with carriage return
+            "species": species_id,
+            "limit": 1,
+            "echo_query": 1,
+            "caller_identity": "bioinfo_homework"
+        }
+    chunks = [flybase_genes[i:i + ID_CHUNK_SIZE] for i in range(0, len(flybase_genes), ID_CHUNK_SIZE)]
     
     try:
-        response = requests.post(f"{string_api_url}/{output_format}/{method}", data=params)
-        response.raise_for_status()
+        # Chunks are mapped independently, so they are sent concurrently
+        # over the shared session; results are kept in input order
+        with ThreadPoolExecutor(max_workers=ID_CHUNK_WORKERS) as executor:
+            texts = list(executor.map(
+                lambda genes: _post_tsv(string_api_url, output_format, method, chunk_params(genes)),
+                chunks))
         
-        # Parse response
-        lines = response.text.strip().split('\n')
-        header = lines[0].split('\t')
-        
-        string_ids = []
-        mapping = {}
-        
-        for line in lines[1:]:
-            if line.strip():
-                parts = line.split('\t')
-                if len(parts) >= 2:
-                    query_id = parts[0]
-                    string_id = parts[1]
-                    if string_id != 'Error':
-                        string_ids.append(string_id)
-                        mapping[query_id] = string_id
+        # Parse response: query in the first column, STRING ID in the second
+        frames = [df.set_axis([0, 1], axis=1) for df in (_read_tsv(text, usecols=[0, 1]) for text in texts)
+                  if df.shape[1] == 2]
+        if frames:
+            df = pd.concat(frames, ignore_index=True)
+            query_ids, mapped_ids = df[0], df[1]
+            valid = mapped_ids.notna() & ~mapped_ids.isin(['', 'Error'])
+            string_ids = mapped_ids[valid].tolist()
+            mapping = dict(zip(query_ids[valid], string_ids))
+        else:
+            string_ids = []
+            mapping = {}
         
         print(f"✅ Mapped {len(string_ids)} genes to STRING IDs")
         return string_ids, mapping
@@ -85,31 +172,13 @@ def get_functional_enrichment(string_ids, species_id=7227):
     }
     
     try:
-        response = requests.post(f"{string_api_url}/{output_format}/{method}", data=params)
-        response.raise_for_status()
+        text = _post_tsv(string_api_url, output_format, method, params)
         
         # Parse enrichment results
-        lines = response.text.strip().split('\n')
-        if len(lines) < 2:
+        df = _read_tsv(text, ENRICHMENT_DTYPES)
+        if df.empty:
             print("⚠️  No enrichment results returned")
             return None
-            
-        header = lines[0].split('\t')
-        
-        enrichment_data = []
-        for line in lines[1:]:
-            if line.strip():
-                parts = line.split('\t')
-                if len(parts) >= len(header):
-                    enrichment_data.append(dict(zip(header, parts)))
-        
-        df = pd.DataFrame(enrichment_data)
-        
-        # Convert numeric columns
-        numeric_cols = ['number_of_genes', 'number_of_genes_in_background', 'pvalue', 'fdr']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
         
         print(f"✅ Found {len(df)} enrichment terms")
         return df
@@ -136,27 +205,11 @@ def get_protein_interactions(string_ids, species_id=7227):
     }
     
     try:
-        response = requests.post(f"{string_api_url}/{output_format}/{method}", data=params)
-        response.raise_for_status()
+        text = _post_tsv(string_api_url, output_format, method, params)
         
-        lines = response.text.strip().split('\n')
-        if len(lines) < 2:
+        df = _read_tsv(text, NETWORK_DTYPES)
+        if df.empty:
             return None
-            
-        header = lines[0].split('\t')
-        
-        network_data = []
-        for line in lines[1:]:
-            if line.strip():
-                parts = line.split('\t')
-                if len(parts) >= len(header):
-                    network_data.append(dict(zip(header, parts)))
-        
-        df = pd.DataFrame(network_data)
-        
-        # Convert score column
-        if 'score' in df.columns:
-            df['score'] = pd.to_numeric(df['score'], errors='coerce')
         
         print(f"✅ Found {len(df)} protein interactions")
         return df
@@ -246,13 +299,15 @@ def main():
         print("❌ No genes could be mapped to STRING")
         sys.exit(1)
     
-    # Get functional enrichment
+    # Enrichment and interactions only depend on the mapping: request both
+    # at once over the shared session, so the wait is the slower of the two
     print("\n📊 Running functional enrichment analysis...")
-    enrichment_df = get_functional_enrichment(string_ids)
-    
-    # Get protein interactions
-    print("\n🕸️  Getting protein interaction network...")
-    network_df = get_protein_interactions(string_ids)
+    print("🕸️  Getting protein interaction network...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        enrichment_future = executor.submit(get_functional_enrichment, string_ids)
+        network_future = executor.submit(get_protein_interactions, string_ids)
+        enrichment_df = enrichment_future.result()
+        network_df = network_future.result()
     
     # Save results
     print("\n💾 Saving results...")
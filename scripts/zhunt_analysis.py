@@ -6,45 +6,152 @@ Analyzes Z-DNA predictions from Z-Hunt and filters by Z-score threshold
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from Bio import SeqIO
+from pandas.api.types import union_categoricals
+import matplotlib
+matplotlib.use('Agg')
 import argparse
 import os
 
-def parse_zhunt_output(zhunt_file):
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Z-Hunt output format: chr start end length score sequence
+ZHUNT_COLUMNS = ['chromosome', 'start', 'end', 'length', 'z_score', 'sequence']
+POSITION_COLUMNS = ['start', 'end', 'length']
+
+# Rows parsed per chunk
+ZHUNT_CHUNK_ROWS = 1_000_000
+
+# Points drawn on the cumulative Z-score curve
+CDF_POINTS = 1024
+
+# Z-score format in the BED score column
+BED_FLOAT_FORMAT = '%.7g'
+
+def _integer_rows(column):
+    """
+    Rows of a parsed position column that hold an integer
+    """
+    if pd.api.types.is_integer_dtype(column):
+        return pd.Series(True, index=column.index)
+    if pd.api.types.is_float_dtype(column):
+        # Numeric column with gaps (short rows are NaN)
+        return column.notna() & (column % 1 == 0)
+    # Text column: some token in this chunk was not a number
+    return column.astype(str).str.fullmatch(r'[+-]?\d+', na=False)
+
+def _clean_chunk(chunk):
+    """
+    Keep rows with integer positions and a numeric Z-score; type the columns
+    """
+    z_score = chunk['z_score']
+    if not pd.api.types.is_float_dtype(z_score):
+        z_score = pd.to_numeric(z_score, errors='coerce')
+    valid = z_score.notna()
+    for column in POSITION_COLUMNS:
+        valid &= _integer_rows(chunk[column])
+    
+    chunk = chunk[valid].copy()
+    # Narrow types: Drosophila coordinates fit int32 and Z-scores float32
+    chunk['chromosome'] = chunk['chromosome'].astype('category')
+    for column in POSITION_COLUMNS:
+        chunk[column] = chunk[column].astype(np.int32)
+    chunk['z_score'] = z_score[valid].astype(np.float32)
+    chunk['sequence'] = chunk['sequence'].fillna('')
+    return chunk
+
+def _concat_chunks(chunks, ignore_index=False):
+    """
+    Concatenate parsed chunks, keeping chromosome categorical
+    """
+    # Chunks have their own category sets; concatenating them directly would
+    # fall back to object columns, so chromosomes are unioned separately
+    df = pd.concat(chunks, ignore_index=ignore_index)
+    df['chromosome'] = union_categoricals(
+        [chunk['chromosome'] for chunk in chunks]).remove_unused_categories()
+    return df
+
+def _truncate_fields(fields):
+    """
+    Keep the Z-Hunt columns of a row with extra fields
+    """
+    return fields[:len(ZHUNT_COLUMNS)]
+
+def _read_zhunt(zhunt_file, chunksize, engine, **kwargs):
+    """
+    Chunked reader for Z-Hunt output; short rows are padded with NaN
+    """
+    # No usecols: with it the C reader rejects a chunk in which every row
+    # lacks the sequence field
+    return pd.read_csv(zhunt_file, sep=r'\s+', engine=engine, comment='#', header=None,
+                       names=ZHUNT_COLUMNS, dtype={'chromosome': str, 'sequence': str},
+                       chunksize=chunksize, **kwargs)
+
+def iter_zhunt_chunks(zhunt_file, chunksize=ZHUNT_CHUNK_ROWS):
+    """
+    Parse a Z-Hunt output file with the pandas C reader, one chunk at a time
+    """
+    # Column types are inferred per chunk; malformed rows only cost their
+    # own chunk a text-level check
+    n_chunks = 0
+    try:
+        with _read_zhunt(zhunt_file, chunksize, 'c', low_memory=False) as reader:
+            for chunk in reader:
+                yield _clean_chunk(chunk)
+                n_chunks += 1
+        return
+    except pd.errors.ParserError:
+        # A row with more than six fields: the C reader cannot drop the extras,
+        # so the rest of the file is parsed by the python reader, which can.
+        # Both readers count rows the same way, so the chunks already yielded
+        # are skipped.
+        pass
+    with _read_zhunt(zhunt_file, chunksize, 'python', on_bad_lines=_truncate_fields) as reader:
+        for i, chunk in enumerate(reader):
+            if i >= n_chunks:
+                yield _clean_chunk(chunk)
+
+def parse_zhunt_output(zhunt_file, zmin=None, zmax=None, scores=None):
     """
     Parse Z-Hunt output file and extract relevant information
+    With zmin/zmax, rows outside the Z-score range are dropped chunk by chunk
+    and never kept in memory. If a scores list is given, the chromosome and
+    z_score columns of every parsed row are appended to it (for statistics
+    before filtering).
     """
-    results = []
-    
-    with open(zhunt_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#'):
-                # Z-Hunt output format: chr start end length score sequence
-                parts = line.split()
-                if len(parts) >= 5:
-                    try:
-                        result = {
-                            'chromosome': parts[0],
-                            'start': int(parts[1]),
-                            'end': int(parts[2]),
-                            'length': int(parts[3]),
-                            'z_score': float(parts[4]),
-                            'sequence': parts[5] if len(parts) > 5 else ''
-                        }
-                        results.append(result)
-                    except (ValueError, IndexError):
-                        continue
-    
-    return pd.DataFrame(results)
+    chunks = []
+    n_rows = 0
+    for chunk in iter_zhunt_chunks(zhunt_file):
+        # Row numbers count parsed rows across chunks (BED names use them)
+        chunk.index = pd.RangeIndex(n_rows, n_rows + len(chunk))
+        n_rows += len(chunk)
+        if scores is not None:
+            scores.append(chunk[['chromosome', 'z_score']])
+        if zmin is not None or zmax is not None:
+            chunk = chunk[_zscore_mask(chunk, zmin, zmax)]
+        chunks.append(chunk)
+    if not chunks:
+        return pd.DataFrame(columns=ZHUNT_COLUMNS)
+    return _concat_chunks(chunks)
+
+def _zscore_mask(df, threshold_min=None, threshold_max=None):
+    """
+    Rows with threshold_min <= z_score <= threshold_max (open bounds for None)
+    """
+    mask = pd.Series(True, index=df.index)
+    if threshold_min is not None:
+        mask &= df['z_score'] >= threshold_min
+    if threshold_max is not None:
+        mask &= df['z_score'] <= threshold_max
+    return mask
 
 def filter_by_zscore(df, threshold_min=300, threshold_max=400):
     """
     Filter Z-DNA results by Z-score threshold
     """
-    filtered_df = df[(df['z_score'] >= threshold_min) & (df['z_score'] <= threshold_max)]
+    filtered_df = df[_zscore_mask(df, threshold_min, threshold_max)]
     print(f"Filtered {len(filtered_df)} regions with Z-score between {threshold_min} and {threshold_max}")
     print(f"Original: {len(df)} regions, Filtered: {len(filtered_df)} regions")
     return filtered_df
@@ -75,15 +182,33 @@ def create_bed_file(df, output_file):
     bed_df['name'] = 'Z-DNA_' + bed_df.index.astype(str)
     bed_df['strand'] = '.'
     
-    # BED format: chr start end name score strand
+    # BED format: chr start end name score strand.
+    # One explicit float format (float32 Z-scores carry ~7 significant digits)
     bed_df = bed_df[['chromosome', 'start', 'end', 'name', 'z_score', 'strand']]
-    bed_df.to_csv(output_file, sep='\t', header=False, index=False)
+    bed_df.to_csv(output_file, sep='\t', header=False, index=False, float_format=BED_FLOAT_FORMAT)
     print(f"BED file saved to: {output_file}")
 
-def plot_zscore_distribution(df, output_dir):
+def save_parquet(df, output_file):
+    """
+    Save results as zstd-compressed Parquet for fast reloading (needs pyarrow)
+    """
+    if pa is None:
+        return
+    df.to_parquet(output_file, engine='pyarrow', compression='zstd', index=False)
+    print(f"Parquet file saved to: {output_file}")
+
+def plot_zscore_distribution(df, output_dir, chr_counts=None):
     """
-    Create plots for Z-score distribution analysis
+    Create plots for Z-score distribution analysis.
+    chr_counts: per-chromosome counts from analyze_zdna_distribution, if available
     """
+    # Plotting libraries are only loaded when there is something to plot
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    if chr_counts is None:
+        chr_counts = df['chromosome'].value_counts()
+    
     plt.figure(figsize=(15, 10))
     
     # Z-score histogram
@@ -112,8 +237,7 @@ def plot_zscore_distribution(df, output_dir):
     
     # Chromosome distribution
     plt.subplot(2, 3, 4)
-    chr_counts = df['chromosome'].value_counts().head(10)
-    chr_counts.plot(kind='bar')
+    chr_counts.head(10).plot(kind='bar')
     plt.xlabel('Chromosome')
     plt.ylabel('Number of Z-DNA regions')
     plt.title('Z-DNA Distribution by Chromosome')
@@ -121,9 +245,11 @@ def plot_zscore_distribution(df, output_dir):
     
     # Z-score box plot by chromosome
     plt.subplot(2, 3, 5)
-    top_chrs = df['chromosome'].value_counts().head(8).index
+    top_chrs = chr_counts.head(8).index
     df_top_chrs = df[df['chromosome'].isin(top_chrs)]
-    sns.boxplot(data=df_top_chrs, x='chromosome', y='z_score')
+    # Boxes in order of appearance, only for the chromosomes shown
+    sns.boxplot(data=df_top_chrs, x='chromosome', y='z_score',
+                order=list(pd.unique(df_top_chrs['chromosome'])))
     plt.xlabel('Chromosome')
     plt.ylabel('Z-score')
     plt.title('Z-score Distribution by Chromosome')
@@ -131,9 +257,9 @@ def plot_zscore_distribution(df, output_dir):
     
     # Cumulative Z-score distribution
     plt.subplot(2, 3, 6)
-    sorted_scores = np.sort(df['z_score'])
-    cumulative = np.arange(1, len(sorted_scores) + 1) / len(sorted_scores)
-    plt.plot(sorted_scores, cumulative)
+    # Sampled at plot resolution instead of sorting every score
+    cumulative = np.linspace(0, 1, CDF_POINTS)
+    plt.plot(np.quantile(df['z_score'].to_numpy(), cumulative), cumulative)
     plt.xlabel('Z-score')
     plt.ylabel('Cumulative Probability')
     plt.title('Cumulative Z-score Distribution')
@@ -162,9 +288,12 @@ def main():
     print(f"Output directory: {args.output_dir}")
     print(f"Z-score filter: {args.min_zscore} - {args.max_zscore}")
     
-    # Parse Z-Hunt results
+    # Parse Z-Hunt results, filtering by Z-score while reading; only the
+    # chromosome and Z-score of the rejected rows are kept for statistics
     print("\nParsing Z-Hunt output...")
-    df = parse_zhunt_output(args.input)
+    scores = []
+    filtered_df = parse_zhunt_output(args.input, args.min_zscore, args.max_zscore, scores)
+    df = _concat_chunks(scores, ignore_index=True) if scores else pd.DataFrame(columns=['chromosome', 'z_score'])
     
     if df.empty:
         print("No Z-DNA regions found in the input file!")
@@ -176,7 +305,8 @@ def main():
     
     # Filter by Z-score
     print(f"\n=== Filtering by Z-score ({args.min_zscore}-{args.max_zscore}) ===")
-    filtered_df = filter_by_zscore(df, args.min_zscore, args.max_zscore)
+    print(f"Filtered {len(filtered_df)} regions with Z-score between {args.min_zscore} and {args.max_zscore}")
+    print(f"Original: {len(df)} regions, Filtered: {len(filtered_df)} regions")
     
     if filtered_df.empty:
         print("No Z-DNA regions pass the Z-score filter!")
@@ -184,15 +314,16 @@ def main():
     
     # Analyze filtered results
     print("\n=== After Filtering ===")
-    analyze_zdna_distribution(filtered_df)
+    chr_counts = analyze_zdna_distribution(filtered_df)
     
     # Save results
     filtered_df.to_csv(f"{args.output_dir}/zdna_filtered.csv", index=False)
+    save_parquet(filtered_df, f"{args.output_dir}/zdna_filtered.parquet")
     create_bed_file(filtered_df, f"{args.output_dir}/zdna_filtered.bed")
     
     # Create visualizations
     print("\nCreating visualizations...")
-    plot_zscore_distribution(filtered_df, args.output_dir)
+    plot_zscore_distribution(filtered_df, args.output_dir, chr_counts)
     
     print(f"\nAnalysis complete! Check {args.output_dir}/ for results.")
 
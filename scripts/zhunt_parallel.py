@@ -6,11 +6,46 @@ Parallel Z-Hunt Analysis by Chromosome
 import subprocess
 import time
 import os
+import mmap
+import re
 import sys
 from pathlib import Path
 import concurrent.futures
 from collections import defaultdict
 
+# zhunt2 window size, min and max size (dinucleotides)
+ZHUNT_PARAMS = (12, 8, 12)
+
+# Block size and blank-line pattern for copying zhunt2 output
+COPY_BLOCK_SIZE = 1 << 20
+BLANK_LINE = re.compile(rb'\n[ \t\r\f\v]*(?=\n)')
+
+# Threads writing chromosome files while the genome is split
+SPLIT_WRITE_WORKERS = 4
+
+def _next_header(mm, pos):
+    """Offset of the next '>' header line after pos, or -1"""
+    i = mm.find(b'\n>', pos)
+    return -1 if i == -1 else i + 1
+
+def _write_all(fd, data):
+    """os.write until the whole buffer is written"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _write_chromosome(chr_file, chr_name, sequence, trailer):
+    """Write one chromosome FASTA: header, sequence slice and trailing newline"""
+    fd = os.open(chr_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _write_all(fd, f">{chr_name}\n".encode())
+        _write_all(fd, sequence)
+        if trailer:
+            _write_all(fd, trailer)
+    finally:
+        os.close(fd)
+        sequence.release()
+
 def split_genome_by_chromosome(fasta_file, output_dir):
     """Split genome FASTA by chromosomes"""
     output_dir = Path(output_dir)
@@ -19,44 +54,55 @@ def split_genome_by_chromosome(fasta_file, output_dir):
     print(f"📄 Splitting {fasta_file} by chromosomes...")
     
     chromosomes = {}
-    current_chr = None
-    current_seq = []
-    
-    with open(fasta_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line.startswith('>'):
-                # Save previous chromosome
-                if current_chr:
-                    chr_file = output_dir / f"{current_chr}.fa"
-                    with open(chr_file, 'w') as cf:
-                        cf.write(f">{current_chr}\n")
-                        cf.write(''.join(current_seq) + '\n')
-                    chromosomes[current_chr] = str(chr_file)
+    if os.path.getsize(fasta_file) == 0:
+        print(f"✅ Split into 0 chromosomes")
+        return chromosomes
+    
+    # Headers are located with mm.find(b'\n>') and every sequence is written
+    # straight from the mapping; its newlines are kept, zhunt2 skips them.
+    # Files are written by a thread pool so parsing does not wait on the disk
+    with open(fasta_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+         concurrent.futures.ThreadPoolExecutor(max_workers=SPLIT_WRITE_WORKERS) as executor:
+        view = memoryview(mm)
+        writes = []
+        try:
+            header_start = 0 if mm[:1] == b'>' else _next_header(mm, 0)
+            while header_start != -1:
+                name_end = mm.find(b'\n', header_start)
+                if name_end == -1:
+                    name_end = len(mm)
+                next_header = _next_header(mm, name_end)
+                seq_start = min(name_end + 1, len(mm))
+                seq_end = len(mm) if next_header == -1 else next_header
                 
-                # Start new chromosome
-                current_chr = line[1:].split()[0]  # Get chromosome name
-                current_seq = []
+                current_chr = mm[header_start + 1:name_end].decode().split()[0]  # Get chromosome name
                 print(f"   Found chromosome: {current_chr}")
-            else:
-                current_seq.append(line)
-        
-        # Save last chromosome
-        if current_chr:
-            chr_file = output_dir / f"{current_chr}.fa"
-            with open(chr_file, 'w') as cf:
-                cf.write(f">{current_chr}\n")
-                cf.write(''.join(current_seq) + '\n')
-            chromosomes[current_chr] = str(chr_file)
+                
+                chr_file = output_dir / f"{current_chr}.fa"
+                trailer = b'\n' if seq_end == seq_start or mm[seq_end - 1] != ord('\n') else b''
+                writes.append(executor.submit(_write_chromosome, chr_file, current_chr,
+                                              view[seq_start:seq_end], trailer))
+                chromosomes[current_chr] = str(chr_file)
+                
+                header_start = next_header
+            
+            for write in writes:
+                write.result()
+        finally:
+            # Slices of the mapping must be gone before it is closed
+            concurrent.futures.wait(writes)
+            view.release()
     
     print(f"✅ Split into {len(chromosomes)} chromosomes")
     return chromosomes
 
-def run_zhunt_on_chromosome(chr_name, chr_file, output_dir, params=(12, 8, 12)):
+def run_zhunt_on_chromosome(chr_name, chr_file, output_dir, params=ZHUNT_PARAMS):
     """Run Z-Hunt on a single chromosome"""
     output_file = Path(output_dir) / f"{chr_name}_zhunt.txt"
     
     start_time = time.time()
+    # zhunt2 takes a single FASTA path (no stdin mode) and scans one sequence
+    # per run, so every chromosome gets its own process
     cmd = ["./tools/zhunt/zhunt2", str(params[0]), str(params[1]), str(params[2]), chr_file]
     
     print(f"🔬 Starting {chr_name}...")
@@ -70,8 +116,7 @@ def run_zhunt_on_chromosome(chr_name, chr_file, output_dir, params=(12, 8, 12)):
         
         if result.returncode == 0:
             # Count lines
-            with open(output_file, 'r') as f:
-                line_count = sum(1 for line in f if line.strip())
+            line_count = _count_nonempty(output_file)
             
             print(f"✅ {chr_name}: {elapsed:.1f}s, {file_size:.1f}MB, {line_count} regions")
             return {
@@ -100,19 +145,56 @@ def run_zhunt_on_chromosome(chr_name, chr_file, output_dir, params=(12, 8, 12)):
             'output_file': str(output_file)
         }
 
+def _nonblank_blocks(f):
+    """
+    Read a binary file in large blocks of whole lines with blank lines
+    removed; an unterminated last line comes as the final block
+    """
+    tail = b''
+    while True:
+        block = f.read(COPY_BLOCK_SIZE)
+        if not block:
+            break
+        # Only whole lines are filtered; the partial last line waits for the
+        # next block. The leading newline lets the pattern see a blank first line
+        block = tail + block
+        cut = block.rfind(b'\n') + 1
+        block, tail = BLANK_LINE.sub(b'', b'\n' + block[:cut])[1:], block[cut:]
+        if block:
+            yield block
+    if tail.strip():
+        yield tail
+
+def _block_lines(block):
+    """Number of lines in a block from _nonblank_blocks"""
+    return block.count(b'\n') + (block[-1:] != b'\n')
+
+def _copy_nonblank(inf, outf):
+    """
+    Copy a binary file in large blocks, dropping blank lines.
+    Returns the number of lines written.
+    """
+    lines = 0
+    for block in _nonblank_blocks(inf):
+        outf.write(block)
+        lines += _block_lines(block)
+    return lines
+
+def _count_nonempty(path):
+    """Number of non-blank lines in a file"""
+    with open(path, 'rb') as f:
+        return sum(_block_lines(block) for block in _nonblank_blocks(f))
+
 def combine_results(results, output_file):
     """Combine chromosome results into single file"""
     print(f"🔗 Combining results into {output_file}...")
     
     total_lines = 0
-    with open(output_file, 'w') as outf:
+    with open(output_file, 'wb') as outf:
         for result in results:
             if result['success'] and os.path.exists(result['output_file']):
-                with open(result['output_file'], 'r') as inf:
-                    for line in inf:
-                        if line.strip():
-                            outf.write(line)
-                            total_lines += 1
+                with open(result['output_file'], 'rb') as inf:
+                    total_lines += _copy_nonblank(inf, outf)
     
     file_size = os.path.getsize(output_file) / (1024 * 1024)
     print(f"✅ Combined: {total_lines:,} lines, {file_size:.1f} MB")
@@ -153,21 +235,19 @@ def main():
     
     print(f"\n🚀 Processing {len(large_chromosomes)} large chromosomes in parallel...")
     
-    # Run Z-Hunt in parallel (max 4 processes to avoid overwhelming system)
-    results = []
-    max_workers = min(4, len(large_chromosomes))
+    # Run Z-Hunt in parallel, one zhunt2 per core; the threads only wait on
+    # the child processes
+    max_workers = max(1, min(len(large_chromosomes), os.cpu_count() or 4))
     
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
         # Submit all jobs
-        future_to_chr = {
-            executor.submit(run_zhunt_on_chromosome, chr_name, chr_file, work_dir): chr_name
+        futures = [
+            executor.submit(run_zhunt_on_chromosome, chr_name, chr_file, work_dir, ZHUNT_PARAMS)
             for chr_name, chr_file in large_chromosomes.items()
-        }
+        ]
         
-        # Collect results
-        for future in concurrent.futures.as_completed(future_to_chr):
-            result = future.result()
-            results.append(result)
+        # Collect results in genome order
+        results = [future.result() for future in futures]
     
     # Combine successful results
     successful_results = [r for r in results if r['success']]
@@ -5,10 +5,22 @@ Z-Hunt with Progress Monitoring
 
 import subprocess
 import time
+import mmap
 import os
+import re
+import signal
 import sys
 from pathlib import Path
 
+# Seconds between progress updates
+PROGRESS_INTERVAL = 5.0
+
+# Bytes scanned per block when counting genome size
+COUNT_BLOCK_SIZE = 8 * 1024 * 1024
+
+# A newline followed by a blank (empty or whitespace-only) line
+BLANK_LINE = re.compile(rb'\n[ \t\r\f\v]*(?=\n)')
+
 def get_file_size(filepath):
     """Get file size in MB"""
     try:
@@ -16,14 +28,52 @@ def get_file_size(filepath):
     except:
         return 0
 
+def _count_bases(mm, start, end):
+    """Count sequence bytes in mm[start:end], excluding line breaks"""
+    length = 0
+    for block_start in range(start, end, COUNT_BLOCK_SIZE):
+        block = mm[block_start:min(block_start + COUNT_BLOCK_SIZE, end)]
+        length += len(block) - block.count(b'\n') - block.count(b'\r')
+    return length
+
+def _count_nonempty(filepath):
+    """Count non-blank lines in a file, reading it in large blocks"""
+    lines = 0
+    tail = b''
+    with open(filepath, 'rb') as f:
+        while True:
+            block = f.read(COUNT_BLOCK_SIZE)
+            if not block:
+                break
+            # Whole lines only; the leading newline exposes a blank first line
+            block = tail + block
+            cut = block.rfind(b'\n') + 1
+            block, tail = block[:cut], block[cut:]
+            lines += block.count(b'\n') - len(BLANK_LINE.findall(b'\n' + block))
+    return lines + bool(tail.strip())
+
 def get_genome_size(fasta_file):
     """Estimate genome size for progress calculation"""
     print("📏 Calculating genome size...")
+    if os.path.getsize(fasta_file) == 0:
+        return 0
     size = 0
-    with open(fasta_file, 'r') as f:
-        for line in f:
-            if not line.startswith('>'):
-                size += len(line.strip())
+    with open(fasta_file, 'rb') as f, \
+         mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Headers are located with C-level find(); sequence between them is
+        # counted block-wise with bytes.count() instead of line by line
+        pos = 0
+        while pos < len(mm):
+            if mm[pos:pos + 1] == b'>':
+                header_end = mm.find(b'\n', pos)
+                if header_end == -1:
+                    break
+                pos = header_end + 1
+                continue
+            next_header = mm.find(b'\n>', pos)
+            seq_end = len(mm) if next_header == -1 else next_header + 1
+            size += _count_bases(mm, pos, seq_end)
+            pos = seq_end
     return size
 
 def run_zhunt_with_progress(genome_file, output_file, min_size=12, window=8, max_size=12):
@@ -50,28 +100,38 @@ def run_zhunt_with_progress(genome_file, output_file, min_size=12, window=8, max
     
     start_time = time.time()
     
+    def report_progress(signum=None, frame=None):
+        # Check output file size
+        file_size = get_file_size(output_file)
+        elapsed = time.time() - start_time
+        
+        # Estimate progress (very rough)
+        # Z-Hunt typically produces ~1-10 MB per million bp
+        estimated_progress = min(95, (file_size / (max(genome_size, 1) / 1000000)) * 10)
+        
+        print(f"\r   ⏱️  {elapsed:.0f}s | 📄 {file_size:.1f} MB | 📈 {estimated_progress:.1f}% | Status: Running...", 
+              end="", flush=True)
+    
     # Run process and redirect output
     with open(output_file, 'w') as outf:
         process = subprocess.Popen(cmd, stdout=outf, stderr=subprocess.PIPE, text=True)
         
-        # Monitor progress
-        while process.poll() is None:
-            # Check output file size
-            file_size = get_file_size(output_file)
-            elapsed = time.time() - start_time
-            
-            # Estimate progress (very rough)
-            # Z-Hunt typically produces ~1-10 MB per million bp
-            estimated_progress = min(95, (file_size / (genome_size / 1000000)) * 10)
-            
-            print(f"\r   ⏱️  {elapsed:.0f}s | 📄 {file_size:.1f} MB | 📈 {estimated_progress:.1f}% | Status: Running...", 
-                  end="", flush=True)
-            
-            time.sleep(5)  # Update every 5 seconds
+        # Monitor progress: a SIGALRM timer reports every 5 seconds while
+        # the main thread blocks on the child instead of polling it
+        report_progress()
+        use_timer = hasattr(signal, 'setitimer')
+        if use_timer:
+            previous_handler = signal.signal(signal.SIGALRM, report_progress)
+            signal.setitimer(signal.ITIMER_REAL, PROGRESS_INTERVAL, PROGRESS_INTERVAL)
+        try:
+            _, stderr = process.communicate()
+        finally:
+            if use_timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous_handler)
         
         # Process finished
         return_code = process.returncode
-        stderr = process.stderr.read()
         
         elapsed = time.time() - start_time
         final_size = get_file_size(output_file)
@@ -83,8 +143,7 @@ def run_zhunt_with_progress(genome_file, output_file, min_size=12, window=8, max
             
             # Count lines in output
             try:
-                with open(output_file, 'r') as f:
-                    line_count = sum(1 for line in f if line.strip())
+                line_count = _count_nonempty(output_file)
                 print(f"   📊 Found {line_count:,} potential Z-DNA regions")
             except:
                 print("   ⚠️  Could not count results")
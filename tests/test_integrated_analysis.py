@@ -0,0 +1,45 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import integrated_analysis
+
+
+def _zdna(positions, chrom='chr2L'):
+    return pd.DataFrame({'Хромосома': chrom, 'Позиция': positions,
+                         'Z-score': 350.0, 'Последовательность': 'CGCGCGCGCGCG'})
+
+
+def _expected_pairs(g4_pos, zdna_pos, window):
+    return sorted((g, z) for g, gp in enumerate(g4_pos)
+                  for z, zp in enumerate(sorted(zdna_pos)) if abs(zp - gp) <= window)
+
+
+def test_query_finds_pairs_near_chromosome_start():
+    # Z-DNA ближе window к позиции 0: интервалы индекса начинались бы с отрицательных координат
+    zdna_pos, g4_pos, window = [5, 500, 2000], np.array([0, 10, 1200]), 1000
+    chrom_index = integrated_analysis.build_zdna_index(_zdna(zdna_pos), window)['chr2L']
+    
+    g_idx, z_idx = integrated_analysis._query_zdna_index(chrom_index, g4_pos, window)
+    
+    assert sorted(zip(g_idx.tolist(), z_idx.tolist())) == _expected_pairs(g4_pos, zdna_pos, window)
+    assert len(g_idx) == 6
+
+
+def test_ncls_and_searchsorted_paths_agree():
+    rng = np.random.default_rng(0)
+    zdna_pos = rng.integers(0, 5000, 200)
+    g4_pos = rng.integers(0, 5000, 100)
+    window = 300
+    chrom_index = integrated_analysis.build_zdna_index(_zdna(zdna_pos), window)['chr2L']
+    
+    fast = integrated_analysis._query_zdna_index(chrom_index, g4_pos, window)
+    plain = integrated_analysis._query_zdna_index(dict(chrom_index, ncls=None), g4_pos, window)
+    
+    assert fast[0].tolist() == plain[0].tolist()
+    assert fast[1].tolist() == plain[1].tolist()
+    assert len(fast[0]) == len(_expected_pairs(g4_pos, zdna_pos, window))